@@ -3,24 +3,37 @@
 
 Images are described whether or not a QMD references them yet, so the cache is
 warm by the time they're used. Results are cached by file MD5 in
-.llm_cache/images/. See discover_images() for how context is found.
+.llm_cache/images/ and indexed in its manifest.jsonl (helpers.image_store).
+See discover_images() for how context is found.
+
+An image that is a perceptual near-duplicate of one already described (same
+figure re-exported at another resolution or format) reuses that description
+instead of costing a call (helpers.image_similarity). Each reuse is recorded in
+.llm_cache/images/near_duplicates.jsonl for review.
 
 Usage:
     python scripts/describe_images.py                  # standard run
     python scripts/describe_images.py --dry-run        # discover only
     python scripts/describe_images.py --test           # 10 images only
     python scripts/describe_images.py --test 5         # 5 images only
-    python scripts/describe_images.py --concurrency 3
+    python scripts/describe_images.py --concurrency 3  # starting parallelism
+    python scripts/describe_images.py --max-concurrency 8
+    python scripts/describe_images.py --batch-size 6   # small images 6 per request
+    python scripts/describe_images.py --bulk           # batch-prediction job
+    python scripts/describe_images.py --resume         # continue an interrupted run
+    python scripts/describe_images.py --retry-failed   # only earlier failures
+    python scripts/describe_images.py --near-duplicate-distance -1  # no reuse
+    python scripts/describe_images.py --near-duplicate-report       # audit reuse
 """
 
 import argparse
 import asyncio
-import hashlib
-import json
 import logging
 import os
 import re
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
@@ -30,13 +43,40 @@ from helpers.gemini_client import (  # noqa: E402
     setup_gemini,
     create_gemini_cache_from_content,
     refresh_gemini_cache,
-    call_gemini_vision,
-    check_and_wait_for_rate_limits,
-    record_api_request,
+    call_gemini_vision_async,
+    call_gemini_vision_batch_async,
+    bulk_vision_request,
+    write_bulk_job,
+    run_bulk_job,
+    reserve_api_request_async,
+    plan_daily_budget,
+    count_tokens,
     is_quota_error,
     CACHE_TTL_SECONDS,
     IMAGE_MIME_TYPES,
     MODEL_NAME,
+    VISION_IMAGE_TOKEN_ESTIMATE,
+    usage_ledger,
+)
+from helpers.concurrency import AimdController, ThroughputMeter  # noqa: E402
+from helpers.image_prep import prep_stats  # noqa: E402
+from helpers.image_similarity import (  # noqa: E402
+    DEFAULT_MAX_DISTANCE,
+    NearDuplicateIndex,
+    SignatureCache,
+)
+from helpers.image_store import image_description_store  # noqa: E402
+from helpers.jsonl_store import JsonlStore  # noqa: E402
+from helpers.media_index import MediaMd5Index  # noqa: E402
+from helpers.quota_ledger import DailyQuotaExceeded  # noqa: E402
+from helpers.run_journal import DONE, FAILED, PENDING, RunJournal  # noqa: E402
+from helpers.structured_output import (  # noqa: E402
+    StructuredOutputError,
+    array_schema,
+    object_schema,
+    parse_structured,
+    string_schema,
+    validate,
 )
 
 # ── Logging setup ─────────────────────────────────────────────────────────────
@@ -51,6 +91,10 @@ log = logging.getLogger(__name__)
 MODEL = MODEL_NAME  # shared with the rest of the AI scripts via gemini_client
 DOCS_DIR = "DOCS"
 CACHE_DIR = ".llm_cache/images"
+JOURNAL_FILE = f"{CACHE_DIR}/journal.jsonl"  # per-image run status, see --resume
+SIGNATURE_FILE = f"{CACHE_DIR}/dhash.jsonl"  # perceptual hashes by MD5
+NEAR_DUPLICATES_FILE = f"{CACHE_DIR}/near_duplicates.jsonl"  # reused descriptions
+BULK_JOB_FILE = ".llm_cache/bulk/describe_images.jsonl"  # --bulk (gitignored)
 PROMPT_FILE = ".github/scripts/ai/prompt_templates/image_description_prompt.md"
 # CACHE_TTL_SECONDS is imported from gemini_client
 CACHE_REFRESH_BUFFER_SECONDS = 300  # refresh when < 5 min left
@@ -59,6 +103,12 @@ MIN_DESCRIPTION_CHARS = 50
 VALID_IMAGE_TYPES = {"diagram", "table", "chart", "map", "photo", "decorative"}
 CONTEXT_LINES_BEFORE = 30  # ~1-2 paragraphs
 CONTEXT_LINES_AFTER = 15  # ~1 paragraph
+SERVER_BUSY_MARKERS = ("503", "502", "529", "UNAVAILABLE", "overloaded")
+CALL_TIMEOUT_SECONDS = 120  # one image; a batch adds BATCH_TIMEOUT_PER_IMAGE each
+BATCH_TIMEOUT_PER_IMAGE = 30
+BATCH_MARKER = "=== IMAGE {n} ==="  # introduces each image of a batched request
+BATCH_KEY = "image_{n}"  # its answer's property in the batched JSON answer
+DISCOVERY_WORKERS = min(8, (os.cpu_count() or 1) * 2)  # project folders walked at once
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -66,117 +116,180 @@ CONTEXT_LINES_AFTER = 15  # ~1 paragraph
 # ─────────────────────────────────────────────────────────────────────────────
 
 
+def _extract_fence_after(text: str, heading: str, prompt_path: Path) -> str:
+    pattern = re.compile(
+        re.escape(heading) + r".*?```(?:\w*\n)?(.*?)```",
+        re.DOTALL | re.IGNORECASE,
+    )
+    m = pattern.search(text)
+    if not m:
+        raise ValueError(
+            f"Could not find fenced code block after '{heading}' in {prompt_path}"
+        )
+    return m.group(1).strip()
+
+
 def parse_prompt_file(prompt_path: Path) -> tuple:
     """Pull the three fenced blocks out of the prompt markdown, returning
     (system_instruction, user_prompt, context_template) — each the code fence
     under its ## heading."""
     text = prompt_path.read_text(encoding="utf-8")
+    system_instruction = _extract_fence_after(text, "## System Instruction", prompt_path)
+    user_prompt = _extract_fence_after(text, "## User Prompt", prompt_path)
+    context_template = _extract_fence_after(
+        text, "## Optional: Context Injection Block", prompt_path
+    )
+    return system_instruction, user_prompt, context_template
 
-    def _extract_fence_after(heading):
-        pattern = re.compile(
-            re.escape(heading) + r".*?```(?:\w*\n)?(.*?)```",
-            re.DOTALL | re.IGNORECASE,
-        )
-        m = pattern.search(text)
-        if not m:
-            raise ValueError(
-                f"Could not find fenced code block after '{heading}' in {prompt_path}"
-            )
-        return m.group(1).strip()
 
-    system_instruction = _extract_fence_after("## System Instruction")
-    user_prompt = _extract_fence_after("## User Prompt")
-    context_template = _extract_fence_after("## Optional: Context Injection Block")
-    return system_instruction, user_prompt, context_template
+def parse_batch_instruction(prompt_path: Path) -> "str | None":
+    """The "## Optional: Batch Instruction Block" fence, or None if the
+    prompt file has none (batched requests are then not possible)."""
+    text = prompt_path.read_text(encoding="utf-8")
+    try:
+        return _extract_fence_after(
+            text, "## Optional: Batch Instruction Block", prompt_path
+        )
+    except ValueError:
+        return None
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Image discovery
 # ─────────────────────────────────────────────────────────────────────────────
 
+# Characters that end a file name when scanning back from an image extension
+# (path separators, and the "<" / "|" of HTML and tables). The others only
+# might — "fig(1).png" and "it's.png" are valid names — so a name is indexed
+# from each of them too. No file name is longer than _REF_MAX_NAME.
+_REF_HARD_BOUNDARY = frozenset("/\\<|")
+_REF_SOFT_BOUNDARY = frozenset(" \t=()[]\"'")
+_REF_MAX_NAME = 255
+_IMAGE_EXT_RE = re.compile(
+    r"\.(?=" + "|".join(ext[1:] for ext in IMAGE_MIME_TYPES) + ")", re.IGNORECASE
+)
 
-def _find_context_in_qmd(img_filename: str, qmd_path: Path) -> str:
-    """
-    Search *qmd_path* for any line that mentions *img_filename* and return
-    the surrounding lines as context (up to MAX_CONTEXT_CHARS).
-    Returns an empty string if the file cannot be read or the name is absent.
-    """
-    try:
-        lines = qmd_path.read_text(encoding="utf-8", errors="replace").splitlines()
-    except OSError:
-        return ""
 
+def _reference_index(lines: list) -> dict:
+    """{image file name: index of the first line that mentions it}, from one
+    pass over lines. A name is indexed from every boundary before its
+    extension ("a-media/my image.png" gives "my image.png" and "image.png"),
+    matching what a substring search for the bare file name would find."""
+    refs = {}
     for line_idx, line in enumerate(lines):
-        if img_filename in line:
-            start = max(0, line_idx - CONTEXT_LINES_BEFORE)
-            end = min(len(lines), line_idx + CONTEXT_LINES_AFTER + 1)
-            ctx_lines = lines[start:line_idx] + lines[line_idx + 1 : end]
-            return "\n".join(ctx_lines)[:MAX_CONTEXT_CHARS]
+        for m in _IMAGE_EXT_RE.finditer(line):
+            dot = m.start()
+            for ext in IMAGE_MIME_TYPES:
+                end = dot + len(ext)
+                if line[dot:end].lower() != ext:
+                    continue
+                j = dot - 1
+                stop = max(-1, dot - _REF_MAX_NAME)
+                while j > stop and line[j] not in _REF_HARD_BOUNDARY:
+                    if line[j] in _REF_SOFT_BOUNDARY:
+                        refs.setdefault(line[j + 1 : end], line_idx)
+                    j -= 1
+                refs.setdefault(line[j + 1 : end], line_idx)
+    return refs
 
-    return ""
 
+class _QmdContext:
+    """A .qmd read and indexed once; context() is then a dict lookup."""
 
-def discover_images(docs_dir: Path) -> list:
-    """Find every image under *-media/ dirs and pair it with QMD context.
+    def __init__(self, qmd_path: Path):
+        try:
+            text = qmd_path.read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            text = ""
+        self.lines = text.splitlines()
+        self.refs = _reference_index(self.lines)
+
+    def context(self, img_filename: str) -> str:
+        """Lines around the first mention of img_filename (up to
+        MAX_CONTEXT_CHARS), or "" if it isn't mentioned."""
+        line_idx = self.refs.get(img_filename)
+        if line_idx is None:
+            return ""
+        start = max(0, line_idx - CONTEXT_LINES_BEFORE)
+        end = min(len(self.lines), line_idx + CONTEXT_LINES_AFTER + 1)
+        ctx_lines = self.lines[start:line_idx] + self.lines[line_idx + 1 : end]
+        return "\n".join(ctx_lines)[:MAX_CONTEXT_CHARS]
+
+
+def _discover_in_media_dir(media_dir: Path, qmds: dict) -> list:
+    """Image dicts for one *-media dir. qmds caches _QmdContext by path, so
+    every .qmd in a folder is read once however many images point at it."""
+
+    def _qmd(path):
+        if path not in qmds:
+            qmds[path] = _QmdContext(path)
+        return qmds[path]
+
+    parent = media_dir.parent
+    # Primary candidate: the QMD whose stem matches the media dir stem
+    # e.g. "2023_PUM_v1-media" → stem "2023_PUM_v1" → "2023_PUM_v1.qmd"
+    media_stem = media_dir.name[: -len("-media")]  # strip trailing "-media"
+    primary_qmd = parent / f"{media_stem}.qmd"
+    candidates = [primary_qmd] if primary_qmd.exists() else []
+    # Fallback: all other QMDs in the same directory
+    candidates += [q for q in sorted(parent.glob("*.qmd")) if q != primary_qmd]
 
-    Context comes from the QMD sharing the media dir's stem (e.g.
-    2023_PUM_v1-media/ → 2023_PUM_v1.qmd), falling back to other QMDs in the same
-    folder. Images referenced nowhere are still returned (orphans, empty context)
-    so they're ready once referenced. Each result is a dict with image_path,
-    context, and qmd_path (None for orphans)."""
     results = []
-
-    for media_dir in sorted(docs_dir.rglob("*-media")):
-        if not media_dir.is_dir():
+    for img_path in sorted(media_dir.iterdir()):
+        if not img_path.is_file():
+            continue
+        if img_path.suffix.lower() not in IMAGE_MIME_TYPES:
             continue
 
-        parent = media_dir.parent
+        context, used_qmd = "", None
+        for qmd in candidates:
+            context = _qmd(qmd).context(img_path.name)
+            if context:
+                used_qmd = qmd
+                break
+        if not context:
+            log.debug("Orphan (no QMD reference): %s", img_path.name)
 
-        # Primary candidate: the QMD whose stem matches the media dir stem
-        # e.g. "2023_PUM_v1-media" → stem "2023_PUM_v1" → "2023_PUM_v1.qmd"
-        media_stem = media_dir.name[: -len("-media")]  # strip trailing "-media"
-        primary_qmd = parent / f"{media_stem}.qmd"
+        results.append({"image_path": img_path, "context": context, "qmd_path": used_qmd})
+    return results
 
-        # Fallback: all QMDs in the same directory
-        sibling_qmds = sorted(parent.glob("*.qmd"))
 
-        for img_path in sorted(media_dir.iterdir()):
-            if not img_path.is_file():
-                continue
-            if img_path.suffix.lower() not in IMAGE_MIME_TYPES:
-                continue
+def _discover_in_folder(folder: Path, recursive: bool) -> dict:
+    """{media dir: image dicts} for the *-media dirs under folder."""
+    pattern = folder.rglob if recursive else folder.glob
+    qmds: dict = {}
+    return {
+        media_dir: _discover_in_media_dir(media_dir, qmds)
+        for media_dir in pattern("*-media")
+        if media_dir.is_dir()
+    }
 
-            img_filename = img_path.name
-            context = ""
-            used_qmd = None
-
-            # 1. Try the primary (name-matched) QMD first
-            if primary_qmd.exists():
-                context = _find_context_in_qmd(img_filename, primary_qmd)
-                if context:
-                    used_qmd = primary_qmd
-
-            # 2. Fall back to other siblings
-            if not context:
-                for qmd in sibling_qmds:
-                    if qmd == primary_qmd:
-                        continue
-                    context = _find_context_in_qmd(img_filename, qmd)
-                    if context:
-                        used_qmd = qmd
-                        break
-
-            if not context:
-                log.debug("Orphan (no QMD reference): %s", img_filename)
-
-            results.append(
-                {
-                    "image_path": img_path,
-                    "context": context,
-                    "qmd_path": used_qmd,
-                }
-            )
 
+def discover_images(docs_dir: Path, workers: int = DISCOVERY_WORKERS) -> list:
+    """Find every image under *-media/ dirs and pair it with QMD context.
+
+    Context comes from the QMD sharing the media dir's stem (e.g.
+    2023_PUM_v1-media/ → 2023_PUM_v1.qmd), falling back to other QMDs in the same
+    folder. Images referenced nowhere are still returned (orphans, empty context)
+    so they're ready once referenced. Each result is a dict with image_path,
+    context, and qmd_path (None for orphans).
+
+    Each .qmd is read and indexed by referenced file name once, and the
+    project folders under docs_dir are walked in parallel. Results come back
+    in sorted media-dir order whatever the scheduling."""
+    by_media_dir = {}
+    # Media dirs directly under docs_dir, then one task per project folder.
+    by_media_dir.update(_discover_in_folder(docs_dir, recursive=False))
+    folders = sorted(
+        p for p in docs_dir.iterdir() if p.is_dir() and not p.name.endswith("-media")
+    )
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for found in pool.map(lambda f: _discover_in_folder(f, recursive=True), folders):
+            by_media_dir.update(found)
+
+    results = []
+    for media_dir in sorted(by_media_dir):
+        results.extend(by_media_dir[media_dir])
     return results
 
 
@@ -185,33 +298,14 @@ def discover_images(docs_dir: Path) -> list:
 # ─────────────────────────────────────────────────────────────────────────────
 
 
-def md5_of_file(path: Path) -> str:
-    h = hashlib.md5()
-    with path.open("rb") as fh:
-        for chunk in iter(lambda: fh.read(65536), b""):
-            h.update(chunk)
-    return h.hexdigest()
-
-
 def load_cache_entry(cache_dir: Path, md5: str):
-    p = cache_dir / f"{md5}.json"
-    if p.exists():
-        try:
-            return json.loads(p.read_text())
-        except json.JSONDecodeError:
-            return None
-    return None
+    return image_description_store(cache_dir).get(md5)
 
 
 def save_cache_entry(
     cache_dir: Path, md5: str, image_type: str, description: str
 ) -> None:
-    p = cache_dir / f"{md5}.json"
-    p.write_text(
-        json.dumps(
-            {"image_type": image_type, "description": description}, ensure_ascii=False
-        )
-    )
+    image_description_store(cache_dir).put(md5, image_type, description)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -219,37 +313,65 @@ def save_cache_entry(
 # ─────────────────────────────────────────────────────────────────────────────
 
 
-_FENCE_RE = re.compile(r"^```[^\n]*\n(.*?)```\s*$", re.DOTALL)
+# The JSON answer for one image, requested as the response schema.
+IMAGE_SCHEMA = object_schema(
+    {
+        "image_type": string_schema(sorted(VALID_IMAGE_TYPES)),
+        "title": string_schema(),
+        "description": string_schema(),
+        "keywords": array_schema(string_schema()),
+    }
+)
 
 
-def parse_response(text: str):
-    """Parse Gemini's structured output into (image_type, description), or None if
-    it fails validation. Tolerates thinking-model answers wrapped in a fence."""
-    # Strip outer markdown fence if the model wrapped the whole answer
-    m = _FENCE_RE.match(text.strip())
-    if m:
-        text = m.group(1)
-
-    def _block(tag):
-        pattern = re.compile(
-            r"\[" + re.escape(tag) + r"\]\s*(.*?)"
-            r"(?=\[(?:IMAGE_TYPE|TITLE|DESCRIPTION|KEYWORDS)\]|\Z)",
-            re.DOTALL | re.IGNORECASE,
-        )
-        m = pattern.search(text)
-        return m.group(1).strip() if m else ""
+def batch_schema(count: int) -> dict:
+    """The answer to a batched request: one IMAGE_SCHEMA per BATCH_KEY."""
+    return object_schema(
+        {BATCH_KEY.format(n=n): IMAGE_SCHEMA for n in range(1, count + 1)}
+    )
 
-    image_type = _block("IMAGE_TYPE").lower().strip()
-    description = _block("DESCRIPTION")
 
-    if image_type not in VALID_IMAGE_TYPES:
-        log.debug("Invalid image_type: %r", image_type)
-        return None
+def _image_result(answer: dict):
+    """(image_type, description) from a schema-valid answer, or None when the
+    description is too short to be useful."""
+    description = answer["description"].strip()
     if len(description) < MIN_DESCRIPTION_CHARS:
         log.debug("Description too short (%d chars)", len(description))
         return None
+    return answer["image_type"], description
 
-    return image_type, description
+
+def parse_response(text: str):
+    """Parse Gemini's IMAGE_SCHEMA answer into (image_type, description), or
+    None if it fails validation."""
+    try:
+        answer = parse_structured(text, IMAGE_SCHEMA)
+    except StructuredOutputError as e:
+        log.debug("Invalid answer: %s", e)
+        return None
+    return _image_result(answer)
+
+
+def parse_batch_response(text: str, count: int) -> dict:
+    """Split a batch_schema(count) answer into {n: (image_type, description)}
+    for the images whose own answer is valid, so one bad answer (or a
+    truncated tail) costs only the images it covers."""
+    try:
+        answer = parse_structured(text, {"type": "OBJECT"})
+    except StructuredOutputError as e:
+        log.debug("Invalid batch answer: %s", e)
+        return {}
+    results = {}
+    for n in range(1, count + 1):
+        value = answer.get(BATCH_KEY.format(n=n))
+        errors = validate(value, IMAGE_SCHEMA) if value is not None else ["missing"]
+        if errors:
+            log.debug("Batch answer for image %d: %s", n, errors[0])
+            continue
+        result = _image_result(value)
+        if result is not None:
+            results[n] = result
+    return results
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -325,6 +447,14 @@ class _CacheState:
 # ─────────────────────────────────────────────────────────────────────────────
 
 
+def _is_overload(exc: BaseException) -> bool:
+    """Errors that mean Gemini wants fewer concurrent calls."""
+    if isinstance(exc, asyncio.TimeoutError):
+        return True
+    exc_str = str(exc)
+    return is_quota_error(exc_str) or any(code in exc_str for code in SERVER_BUSY_MARKERS)
+
+
 def _build_context_message(context: str, context_template: str) -> str:
     if not context.strip():
         return "No surrounding context is available for this image."
@@ -333,200 +463,280 @@ def _build_context_message(context: str, context_template: str) -> str:
     )
 
 
-async def describe_image(
+async def _call_with_retries(
     cache_state: _CacheState,
-    image_path: Path,
-    context: str,
-    context_template: str,
-    model: str,
-    semaphore: asyncio.Semaphore,
-    max_attempts: int = 4,
+    name: str,
+    call,
+    parse,
+    estimated_tokens: int,
+    controller: AimdController,
+    max_attempts: int,
+    report: "dict | None",
+    timeout: float = CALL_TIMEOUT_SECONDS,
 ):
-    """
-    Call Gemini to describe a single image.
-    Returns (image_type, description) or None after exhausting retries.
-    """
-    loop = asyncio.get_event_loop()
+    """The retry loop behind single and batched requests. call(cache,
+    reservation) makes the request; parse(raw) returns the result, or None
+    to retry. Returns None after exhausting retries. report, if given, is
+    filled with attempts, latency_s (of the last call), prompt_tokens,
+    output_tokens and the last error, for the run journal."""
+    report = report if report is not None else {}
+    for key in ("attempts", "prompt_tokens", "output_tokens"):
+        report.setdefault(key, 0)
+    for attempt in range(max_attempts):
+        report["attempts"] += 1
+        try:
+            cache_state.ensure_alive()
+
+            # The controller slot covers just the call, so 429/503/timeouts
+            # shrink the concurrency and the backoff sleeps below don't hold
+            # a slot. Reserve-then-reconcile: the estimate holds the slot
+            # until the response reports the real input tokens. Waiting for
+            # rate-limit room doesn't count against the call timeout.
+            async with controller.slot():
+                reservation = await reserve_api_request_async(estimated_tokens)
+                started = time.monotonic()
+                response = await asyncio.wait_for(
+                    call(cache_state.cache, reservation), timeout=timeout
+                )
+                report["latency_s"] = time.monotonic() - started
+            if response.usage is not None:
+                report["prompt_tokens"] += response.usage.prompt_tokens
+                report["output_tokens"] += (
+                    response.usage.output_tokens + response.usage.thinking_tokens
+                )
+            raw = response.text
 
-    async with semaphore:
-        for attempt in range(max_attempts):
-            try:
-                cache_state.ensure_alive()
-                context_msg = _build_context_message(context, context_template)
-
-                def _call():
-                    check_and_wait_for_rate_limits(0)  # token count unknown pre-call
-                    text = call_gemini_vision(
-                        image_path=image_path,
-                        context_text=context_msg,
-                        cache=cache_state.cache,
-                        model=model,
-                    )
-                    record_api_request(0)
-                    return text
+            result = parse(raw)
+            if result is not None:
+                return result
 
-                raw = await asyncio.wait_for(
-                    loop.run_in_executor(None, _call),
-                    timeout=120,
+            log.debug("Raw response for %s:\n%s", name, raw[:800])
+            report["error"] = "unparseable response"
+            last = attempt == max_attempts - 1
+            if not last:
+                log.warning("Parse failed for %s — retrying...", name)
+            else:
+                log.error(
+                    "Parse failed on final attempt for %s — skipping.",
+                    name,
                 )
+                return None
+
+        except asyncio.TimeoutError:
+            report["error"] = "timeout"
+            last = attempt == max_attempts - 1
+            if not last:
+                wait = 5 * (attempt + 1)
+                log.warning(
+                    "Timeout for %s — retrying in %ds...", name, wait
+                )
+                await asyncio.sleep(wait)
+            else:
+                log.error(
+                    "Timeout on final attempt for %s — skipping.", name
+                )
+                return None
 
-                result = parse_response(raw)
-                if result is not None:
-                    return result
+        except DailyQuotaExceeded:
+            raise  # stops the run; --resume picks up the rest tomorrow
 
-                log.debug("Raw response for %s:\n%s", image_path.name, raw[:800])
-                last = attempt == max_attempts - 1
-                if not last:
-                    log.warning("Parse failed for %s — retrying...", image_path.name)
-                else:
-                    log.error(
-                        "Parse failed on final attempt for %s — skipping.",
-                        image_path.name,
-                    )
-                    return None
+        except Exception as exc:
+            exc_str = str(exc)
+            report["error"] = f"{type(exc).__name__}: {exc_str[:200]}"
 
-            except asyncio.TimeoutError:
+            if is_quota_error(exc_str):
+                wait = 2 ** (attempt + 2)  # 4 s, 8 s, 16 s, 32 s
+                log.warning(
+                    "[attempt %d/%d] QUOTA/RATE-LIMIT for %s — waiting %ds.\n  %s",
+                    attempt + 1, max_attempts, name, wait, exc_str[:400],
+                )
+                await asyncio.sleep(wait)
+                continue
+
+            # Transient server errors (503 / 502 / 529) — exponential backoff
+            if any(code in exc_str for code in SERVER_BUSY_MARKERS):
+                wait = 5 * (2**attempt)  # 5 s, 10 s, 20 s, 40 s
                 last = attempt == max_attempts - 1
-                if not last:
-                    wait = 5 * (attempt + 1)
-                    log.warning(
-                        "Timeout for %s — retrying in %ds...", image_path.name, wait
-                    )
-                    await asyncio.sleep(wait)
-                else:
+                if last:
                     log.error(
-                        "Timeout on final attempt for %s — skipping.", image_path.name
+                        "[attempt %d/%d] SERVER ERROR (final) for %s — skipping.\n  %s",
+                        attempt + 1, max_attempts, name, exc_str[:400],
                     )
                     return None
+                log.warning(
+                    "[attempt %d/%d] SERVER ERROR for %s — retrying in %ds.\n  %s",
+                    attempt + 1, max_attempts, name, wait, exc_str[:400],
+                )
+                await asyncio.sleep(wait)
+                continue
 
-            except Exception as exc:
-                exc_str = str(exc)
+            # Cache expired mid-run — invalidate and let ensure_alive recreate
+            if "CachedContent" in exc_str and (
+                "not found" in exc_str.lower() or "expired" in exc_str.lower()
+            ):
+                log.warning("Cache expired mid-run — recreating...")
+                cache_state.invalidate()
+                cache_state.ensure_alive()
+                continue
 
-                if is_quota_error(exc_str):
-                    wait = 2 ** (attempt + 2)  # 4 s, 8 s, 16 s, 32 s
-                    log.warning(
-                        "[attempt %d/%d] QUOTA/RATE-LIMIT for %s — waiting %ds.\n  %s",
-                        attempt + 1, max_attempts, image_path.name, wait, exc_str[:400],
-                    )
-                    await asyncio.sleep(wait)
-                    continue
+            last = attempt == max_attempts - 1
+            if not last:
+                log.warning(
+                    "[attempt %d/%d] API error for %s — retrying.\n"
+                    "  type: %s\n  detail: %s",
+                    attempt + 1, max_attempts, name,
+                    type(exc).__name__, exc_str[:400],
+                )
+            else:
+                log.error(
+                    "[attempt %d/%d] API error (final) for %s — skipping.\n"
+                    "  type: %s\n  detail: %s",
+                    attempt + 1, max_attempts, name,
+                    type(exc).__name__, exc_str[:400],
+                )
+                return None
 
-                # Transient server errors (503 / 502 / 529) — exponential backoff
-                if any(
-                    code in exc_str
-                    for code in ("503", "502", "529", "UNAVAILABLE", "overloaded")
-                ):
-                    wait = 5 * (2**attempt)  # 5 s, 10 s, 20 s, 40 s
-                    last = attempt == max_attempts - 1
-                    if last:
-                        log.error(
-                            "[attempt %d/%d] SERVER ERROR (final) for %s — skipping.\n  %s",
-                            attempt + 1, max_attempts, image_path.name, exc_str[:400],
-                        )
-                        return None
-                    log.warning(
-                        "[attempt %d/%d] SERVER ERROR for %s — retrying in %ds.\n  %s",
-                        attempt + 1, max_attempts, image_path.name, wait, exc_str[:400],
-                    )
-                    await asyncio.sleep(wait)
-                    continue
+    return None
 
-                # Cache expired mid-run — invalidate and let ensure_alive recreate
-                if "CachedContent" in exc_str and (
-                    "not found" in exc_str.lower() or "expired" in exc_str.lower()
-                ):
-                    log.warning("Cache expired mid-run — recreating...")
-                    cache_state.invalidate()
-                    cache_state.ensure_alive()
-                    continue
 
-                last = attempt == max_attempts - 1
-                if not last:
-                    log.warning(
-                        "[attempt %d/%d] API error for %s — retrying.\n"
-                        "  type: %s\n  detail: %s",
-                        attempt + 1, max_attempts, image_path.name,
-                        type(exc).__name__, exc_str[:400],
-                    )
-                else:
-                    log.error(
-                        "[attempt %d/%d] API error (final) for %s — skipping.\n"
-                        "  type: %s\n  detail: %s",
-                        attempt + 1, max_attempts, image_path.name,
-                        type(exc).__name__, exc_str[:400],
-                    )
-                    return None
+async def describe_image(
+    cache_state: _CacheState,
+    image_path: Path,
+    context: str,
+    context_template: str,
+    model: str,
+    controller: AimdController,
+    max_attempts: int = 4,
+    report: "dict | None" = None,
+):
+    """
+    Call Gemini to describe a single image.
+    Returns (image_type, description) or None after exhausting retries;
+    report is filled as in _call_with_retries.
+    """
+    context_msg = _build_context_message(context, context_template)
+    return await _call_with_retries(
+        cache_state,
+        image_path.name,
+        lambda cache, reservation: call_gemini_vision_async(
+            image_path=image_path,
+            context_text=context_msg,
+            cache=cache,
+            model=model,
+            reservation=reservation,
+            response_schema=IMAGE_SCHEMA,
+        ),
+        parse_response,
+        VISION_IMAGE_TOKEN_ESTIMATE + count_tokens(context_msg),
+        controller,
+        max_attempts,
+        report,
+    )
 
-        return None
+
+async def describe_image_batch(
+    cache_state: _CacheState,
+    items: list,
+    context_template: str,
+    batch_instruction: str,
+    model: str,
+    controller: AimdController,
+    max_attempts: int = 2,
+    report: "dict | None" = None,
+) -> dict:
+    """
+    Describe several work items in one request, each image introduced by
+    its BATCH_MARKER and context. Returns {md5: (image_type, description)}
+    for the answers that parsed; the caller describes the rest one by one.
+    The request is retried only when no answer parses at all.
+    """
+    instruction = batch_instruction.replace("{count}", str(len(items)))
+    texts = [
+        BATCH_MARKER.format(n=n)
+        + "\n"
+        + _build_context_message(item["context"], context_template)
+        for n, item in enumerate(items, 1)
+    ]
+    images = [(item["image_path"], text) for item, text in zip(items, texts)]
+    results = await _call_with_retries(
+        cache_state,
+        f"batch of {len(items)} ({items[0]['image_path'].name}, ...)",
+        lambda cache, reservation: call_gemini_vision_batch_async(
+            images,
+            instruction,
+            cache=cache,
+            model=model,
+            reservation=reservation,
+            response_schema=batch_schema(len(items)),
+        ),
+        lambda raw: parse_batch_response(raw, len(items)) or None,
+        VISION_IMAGE_TOKEN_ESTIMATE * len(items)
+        + count_tokens(instruction + "".join(texts)),
+        controller,
+        max_attempts,
+        report,
+        timeout=CALL_TIMEOUT_SECONDS + BATCH_TIMEOUT_PER_IMAGE * (len(items) - 1),
+    )
+    return {items[n - 1]["md5"]: result for n, result in (results or {}).items()}
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-# Main async runner
+# Work planning
 # ─────────────────────────────────────────────────────────────────────────────
 
 
-async def run(args: argparse.Namespace) -> None:
-    docs_dir = Path(DOCS_DIR).resolve()
-    cache_dir = Path(CACHE_DIR).resolve()
-    prompt_path = Path(getattr(args, "prompt_file", PROMPT_FILE)).resolve()
-
-    if not docs_dir.exists():
-        log.error("DOCS directory not found: %s", docs_dir)
-        sys.exit(1)
-    if not prompt_path.exists():
-        log.error("Prompt file not found: %s", prompt_path)
-        sys.exit(1)
-
-    # ── Parse prompt ──────────────────────────────────────────────────────────
-    system_instruction, user_prompt, context_template = parse_prompt_file(prompt_path)
-    log.info("Prompt file parsed successfully.")
-
-    # ── Discover images ───────────────────────────────────────────────────────
+def _print_dry_run(image_paths: list, docs_dir: Path) -> None:
+    print(f"\n{'─' * 60}")
+    print(f"DRY RUN — {len(image_paths)} image reference(s) found:\n")
+    for image_path in image_paths:
+        try:
+            label = image_path.relative_to(docs_dir.parent)
+        except ValueError:
+            label = image_path
+        print(f"  {label}")
+    print("\nNo API calls made.")
+
+
+def _plan_from_discovery(args: argparse.Namespace, docs_dir: Path, cache_dir: Path):
+    """Discover, hash and deduplicate every image. Returns (work_list,
+    total_unique, cached_count, described_paths), or None when there's
+    nothing to call. described_paths maps the MD5 of each image already
+    described to one of its files."""
     log.info("Scanning %s for image references...", docs_dir)
     all_refs = discover_images(docs_dir)
     log.info("Found %d image reference(s) total.", len(all_refs))
 
     if not all_refs:
         log.info("No images found. Exiting.")
-        return
+        return None
 
     if args.dry_run:
-        print(f"\n{'─' * 60}")
-        print(f"DRY RUN — {len(all_refs)} image reference(s) found:\n")
-        for ref in all_refs:
-            try:
-                label = ref["image_path"].relative_to(docs_dir.parent)
-            except ValueError:
-                label = ref["image_path"]
-            print(f"  {label}")
-        print("\nNo API calls made.")
-        return
-
-    # ── Initialise cache dir ──────────────────────────────────────────────────
-    cache_dir.mkdir(parents=True, exist_ok=True)
+        _print_dry_run([ref["image_path"] for ref in all_refs], docs_dir)
+        return None
 
     # ── Compute MD5s and deduplicate ──────────────────────────────────────────
-    path_to_md5 = {}
-    for ref in all_refs:
-        p = ref["image_path"]
-        if p not in path_to_md5:
-            try:
-                path_to_md5[p] = md5_of_file(p)
-            except OSError as exc:
-                log.warning("Cannot read %s: %s", p, exc)
-                path_to_md5[p] = ""
+    # Unchanged files cost one stat (helpers.media_index); misses hash in parallel.
+    md5_index = MediaMd5Index()
+    path_to_md5 = md5_index.md5_many([ref["image_path"] for ref in all_refs])
+    md5_index.save()
+    for p, md5 in path_to_md5.items():
+        if md5 is None:
+            log.warning("Cannot read %s", p)
+    log.info(
+        "Image MD5s: %d from the index, %d hashed.", md5_index.hits, md5_index.misses
+    )
 
     seen_md5 = set()
     work_list = []
-    cached_count = 0
+    described_paths = {}
 
     for ref in all_refs:
-        md5 = path_to_md5.get(ref["image_path"], "")
+        md5 = path_to_md5.get(ref["image_path"]) or ""
         if not md5 or md5 in seen_md5:
             continue
         seen_md5.add(md5)
         if load_cache_entry(cache_dir, md5) is not None:
-            cached_count += 1
+            described_paths[md5] = ref["image_path"]
         else:
             work_list.append({**ref, "md5": md5})
 
@@ -534,76 +744,494 @@ async def run(args: argparse.Namespace) -> None:
     log.info(
         "Unique images: %d  |  Already cached: %d  |  To describe: %d",
         total_unique,
-        cached_count,
+        len(described_paths),
         len(work_list),
     )
+    return work_list, total_unique, len(described_paths), described_paths
+
+
+def _rel(path, root: Path) -> "str | None":
+    return Path(os.path.relpath(path, root)).as_posix() if path else None
+
+
+def _pack_requests(work_list: list, batch_size: int, max_bytes: int) -> list:
+    """Group work_list into requests: images up to max_bytes share a request
+    batch_size at a time, larger ones go alone. Order is kept otherwise."""
+    requests, small = [], []
+    for item in work_list:
+        try:
+            size = item["image_path"].stat().st_size
+        except OSError:
+            size = max_bytes + 1  # let the single-image path report it
+        if batch_size <= 1 or size > max_bytes:
+            requests.append([item])
+            continue
+        small.append(item)
+        if len(small) == batch_size:
+            requests.append(small)
+            small = []
+    if small:
+        requests.append(small)
+    return requests
+
+
+def _journal_fields(item: dict, root: Path) -> dict:
+    """What --resume needs to rebuild a work item, with repo-relative paths."""
+    return {
+        "image_path": _rel(item["image_path"], root),
+        "qmd_path": _rel(item["qmd_path"], root),
+        "context": item["context"],
+    }
+
+
+def _plan_from_journal(
+    journal: RunJournal, statuses: list, root: Path, cache_dir: Path
+) -> list:
+    """Work items for the journal entries with one of statuses. Images since
+    described are marked done; missing or changed ones are skipped (the next
+    full run picks them up under their new MD5)."""
+    entries = {
+        md5: entry
+        for md5, entry in journal.entries(*statuses).items()
+        if entry.get("image_path")
+    }
+    paths = {md5: root / entry["image_path"] for md5, entry in entries.items()}
+    # Unchanged files cost a stat; only a changed image is hashed again.
+    md5_index = MediaMd5Index()
+    current = md5_index.md5_many(paths.values())
+    md5_index.save()
+
+    work_list = []
+    for md5, entry in entries.items():
+        if load_cache_entry(cache_dir, md5) is not None:
+            journal.record(md5, DONE)
+            continue
+        if current.get(paths[md5]) != md5:
+            log.warning(
+                "Skipping %s: missing or changed since the last run.",
+                entry["image_path"],
+            )
+            continue
+        work_list.append(
+            {
+                "image_path": paths[md5],
+                "context": entry.get("context", ""),
+                "qmd_path": root / entry["qmd_path"] if entry.get("qmd_path") else None,
+                "md5": md5,
+            }
+        )
+    return work_list
+
+
+def _split_near_duplicates(
+    work_list: list, described_paths: dict, cache_dir: Path, max_distance: int
+) -> tuple:
+    """Split work_list into the images to describe and near-duplicates of an
+    image described already or earlier in work_list. Returns (to_describe,
+    followers), each follower a (item, source md5, source path, distance)."""
+    if max_distance < 0:
+        return work_list, []
+    paths = {**described_paths, **{item["md5"]: item["image_path"] for item in work_list}}
+    cache = SignatureCache(SIGNATURE_FILE)
+    signatures = cache.signatures(paths)
+    store = image_description_store(cache_dir)
+    index = NearDuplicateIndex(max_distance)
+    # Every described image with a known hash, including ones no longer in DOCS.
+    for md5, signature in sorted(cache.items()):
+        if md5 in store:
+            index.add(md5, signature)
+
+    to_describe, followers = [], []
+    for item in work_list:
+        signature = signatures.get(item["md5"])
+        match = index.nearest(signature) if signature else None
+        if match:
+            source, distance = match
+            followers.append((item, source, paths.get(source), distance))
+        else:
+            to_describe.append(item)
+            if signature:
+                index.add(item["md5"], signature)
+    if followers:
+        log.info(
+            "Near-duplicates (<= %d bits): %d image(s) will reuse a description.",
+            max_distance,
+            len(followers),
+        )
+    return to_describe, followers
+
+
+def _reuse_descriptions(
+    followers: list, cache_dir: Path, journal: RunJournal, root: Path
+) -> list:
+    """Copy each source's description to its near-duplicates and record the
+    reuse for review. Returns the followers whose source isn't described."""
+    store = image_description_store(cache_dir)
+    waiting, records = [], []
+    for follower in followers:
+        item, source, source_path, distance = follower
+        entry = store.get(source)
+        if entry is None:
+            waiting.append(follower)
+            continue
+        save_cache_entry(
+            cache_dir, item["md5"], entry["image_type"], entry["description"]
+        )
+        journal.record(item["md5"], DONE)
+        records.append(
+            (
+                item["md5"],
+                {
+                    "source": source,
+                    "distance": distance,
+                    "image_path": _rel(item["image_path"], root),
+                    "source_path": _rel(source_path, root),
+                },
+            )
+        )
+        log.info(
+            "Reused: %s ← %s (%d bits)",
+            _rel(item["image_path"], root),
+            _rel(source_path, root) or source,
+            distance,
+        )
+    JsonlStore(NEAR_DUPLICATES_FILE, "near-duplicate report").put_many(records)
+    return waiting
+
+
+def print_near_duplicate_report() -> None:
+    """Print the recorded reuses grouped by the image that was described."""
+    clusters: dict = {}
+    report = JsonlStore(NEAR_DUPLICATES_FILE, "near-duplicate report")
+    for md5, entry in report.items():
+        clusters.setdefault(entry["source"], []).append((md5, entry))
+    print(f"\n{'─' * 60}")
+    print(
+        f"NEAR-DUPLICATES — {len(clusters)} cluster(s), "
+        f"{sum(map(len, clusters.values()))} reused description(s)\n"
+    )
+    for source, members in sorted(clusters.items(), key=lambda c: -len(c[1])):
+        source_path = next(
+            (e["source_path"] for _, e in members if e.get("source_path")), None
+        )
+        print(f"  {source_path or source}")
+        for md5, entry in sorted(members, key=lambda m: m[1]["distance"]):
+            print(f"    {entry['distance']:>3} bits  {entry.get('image_path') or md5}")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Bulk mode
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+def describe_in_bulk(
+    work_list: list,
+    system_instruction: str,
+    user_prompt: str,
+    context_template: str,
+    cache_dir: Path,
+    journal: RunJournal,
+) -> tuple:
+    """Describe work_list through one batch-prediction job (see
+    gemini_client.run_bulk_job) and ingest the answers into the cache and
+    the journal. Requests are written to the job file one at a time as they
+    are built. Images too large to inline are left out and recorded as failed,
+    so --retry-failed describes them with interactive calls. Returns
+    (described, failed)."""
+    too_large: set = set()
+
+    def requests():
+        for item in work_list:
+            request = bulk_vision_request(
+                item["image_path"],
+                _build_context_message(item["context"], context_template),
+                system_instruction=system_instruction,
+                user_prompt=user_prompt,
+                response_schema=IMAGE_SCHEMA,
+            )
+            if request is None:
+                too_large.add(item["md5"])
+                continue
+            yield item["md5"], request
+
+    count = write_bulk_job(BULK_JOB_FILE, requests())
+    log.info("Bulk job: %d image(s) written to %s", count, BULK_JOB_FILE)
+    for md5 in sorted(too_large):
+        journal.record(md5, FAILED, error="too large for a bulk job")
+    if too_large:
+        log.warning(
+            "%d image(s) too large to inline — left for --retry-failed.", len(too_large)
+        )
+    results = (
+        run_bulk_job(
+            BULK_JOB_FILE, "clms-image-description", model=MODEL, label="images (bulk)"
+        )
+        if count
+        else {}
+    )
+
+    described, failed = 0, len(too_large)
+    for item in work_list:
+        if item["md5"] in too_large:
+            continue
+        answer = results.get(item["md5"])
+        parsed = parse_response(answer.text) if answer is not None else None
+        report = {"attempts": 1}
+        if answer is not None and answer.usage is not None:
+            report["prompt_tokens"] = answer.usage.prompt_tokens
+            report["output_tokens"] = (
+                answer.usage.output_tokens + answer.usage.thinking_tokens
+            )
+        if parsed is None:
+            report["error"] = "no answer" if answer is None else "unparseable response"
+            journal.record(item["md5"], FAILED, **report)
+            failed += 1
+            continue
+        save_cache_entry(cache_dir, item["md5"], *parsed)
+        journal.record(item["md5"], DONE, **report)
+        described += 1
+    return described, failed
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Main async runner
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+async def run(args: argparse.Namespace) -> None:
+    docs_dir = Path(DOCS_DIR).resolve()
+    cache_dir = Path(CACHE_DIR).resolve()
+    prompt_path = Path(getattr(args, "prompt_file", PROMPT_FILE)).resolve()
+
+    if not docs_dir.exists():
+        log.error("DOCS directory not found: %s", docs_dir)
+        sys.exit(1)
+    if not prompt_path.exists():
+        log.error("Prompt file not found: %s", prompt_path)
+        sys.exit(1)
+
+    # ── Parse prompt ──────────────────────────────────────────────────────────
+    system_instruction, user_prompt, context_template = parse_prompt_file(prompt_path)
+    batch_instruction = parse_batch_instruction(prompt_path)
+    batch_size = args.batch_size
+    if batch_size > 1 and batch_instruction is None:
+        log.warning("Prompt file has no batch instruction block — one image per request.")
+        batch_size = 1
+    log.info("Prompt file parsed successfully.")
+
+    journal = RunJournal(JOURNAL_FILE, transient=("context",))
+    described_paths: dict = {}
+    if args.resume or args.retry_failed:
+        # ── Work straight from the journal: no discovery, no full re-hash ────
+        statuses = [PENDING] if args.resume else []
+        statuses += [FAILED] if args.retry_failed else []
+        work_list = _plan_from_journal(journal, statuses, docs_dir.parent, cache_dir)
+        total_unique, cached_count = len(work_list), 0
+        log.info(
+            "Journal (%s): %d image(s) to describe.", "/".join(statuses), len(work_list)
+        )
+        if args.dry_run:
+            _print_dry_run([item["image_path"] for item in work_list], docs_dir)
+            return
+    else:
+        planned = _plan_from_discovery(args, docs_dir, cache_dir)
+        if planned is None:
+            return
+        work_list, total_unique, cached_count, described_paths = planned
+        # Record the whole plan before any call, so an interrupted run can
+        # be resumed from the journal (--resume).
+        journal.plan(
+            {item["md5"]: _journal_fields(item, docs_dir.parent) for item in work_list}
+        )
+
+    # ── Near-duplicates reuse a description instead of a call ─────────────────
+    work_list, followers = _split_near_duplicates(
+        work_list, described_paths, cache_dir, args.near_duplicate_distance
+    )
+    reused = len(followers)
+    followers = _reuse_descriptions(followers, cache_dir, journal, docs_dir.parent)
+    reused -= len(followers)
 
     if not work_list:
         log.info("All images already described. Nothing to do.")
-        _print_summary(total_unique, cached_count, 0, 0)
+        _print_summary(total_unique, cached_count, 0, 0, reused)
         return
     # ── Test-mode limit ─────────────────────────────────────────────────────────────
     if args.test is not None:
         limit = args.test
         log.warning("TEST MODE: limiting to %d image(s).", limit)
         work_list = work_list[:limit]
+    if args.bulk:
+        # ── One batch-prediction job: own quota, no interactive limits ─────────
+        setup_gemini(api_key=os.environ.get("GEMINI_API_KEY", ""))
+        newly_described, failed = describe_in_bulk(
+            work_list,
+            system_instruction,
+            user_prompt,
+            context_template,
+            cache_dir,
+            journal,
+        )
+        waiting = _reuse_descriptions(followers, cache_dir, journal, docs_dir.parent)
+        reused += len(followers) - len(waiting)
+        journal.compact()
+        _print_summary(total_unique, cached_count, newly_described, failed, reused)
+        return
+
+    # ── Pack small images into shared requests ───────────────────────────────
+    requests = _pack_requests(work_list, batch_size, args.batch_max_kb * 1024)
+    if len(requests) < len(work_list):
+        log.info("%d image(s) in %d request(s).", len(work_list), len(requests))
+    # ── Daily quota plan ──────────────────────────────────────────────────────
+    # The quota ledger is shared with update_documentation.py, so plan against
+    # what is really left today rather than stopping hard partway through.
+    # The quota counts requests, so a batch costs one.
+    budget = plan_daily_budget(len(requests), "image description requests")
+    if budget < len(requests):
+        deferred = sum(len(request) for request in requests[budget:])
+        requests = requests[:budget]
+        log.warning(
+            "Describing %d image(s) now; %d deferred to a later run.",
+            len(work_list) - deferred,
+            deferred,
+        )
+        work_list = [item for request in requests for item in request]
+    if not work_list:
+        _print_summary(total_unique, cached_count, 0, 0, reused)
+        return
+
     # ── Gemini client & cache ─────────────────────────────────────────────────
     setup_gemini(api_key=os.environ.get("GEMINI_API_KEY", ""))
 
     cache_state = _CacheState(system_instruction, user_prompt, MODEL)
     cache_state.ensure_alive()
 
-    # ── Process images in parallel chunks ─────────────────────────────────────
-    semaphore = asyncio.Semaphore(args.concurrency)
+    # ── Process images from one queue, adaptive concurrency ──────────────────
+    # Workers pull the next image as soon as they finish one, so a slow image
+    # never holds up the rest; the controller decides how many calls are in
+    # flight (see helpers.concurrency).
+    controller = AimdController(
+        initial=args.concurrency,
+        max_limit=max(args.concurrency, args.max_concurrency),
+        is_overload=_is_overload,
+        on_change=lambda old, new, why: log.info(
+            "Concurrency %d → %d (%s)", old, new, why
+        ),
+    )
+    throughput = ThroughputMeter()
+    queue: asyncio.Queue = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
     newly_described = 0
     failed = 0
-    total_to_process = len(work_list)
     done_idx = 0
-    CHUNK = args.concurrency * 4
 
-    try:
-        for chunk_start in range(0, total_to_process, CHUNK):
-            chunk = work_list[chunk_start : chunk_start + CHUNK]
-            tasks = [
-                describe_image(
-                    cache_state,
-                    item["image_path"],
-                    item["context"],
-                    context_template,
-                    MODEL,
-                    semaphore,
-                )
-                for item in chunk
-            ]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+    def _finish(item, result, report) -> None:
+        nonlocal newly_described, failed, done_idx
+        done_idx += 1
+        throughput.tick()
+        global_idx = cached_count + done_idx
+        label = _rel_label(item["image_path"], docs_dir)
+        rate = (
+            f"{throughput.per_minute():.1f} img/min, "
+            f"concurrency {controller.current_limit}"
+        )
 
-            for item, result in zip(chunk, results):
-                done_idx += 1
-                global_idx = cached_count + done_idx
-                label = _rel_label(item["image_path"], docs_dir)
+        if isinstance(result, Exception):
+            log.error("[%d/%d] ERROR: %s — %s", global_idx, total_unique, label, result)
+            report["error"] = f"{type(result).__name__}: {str(result)[:200]}"
+            failed += 1
+        elif result is None:
+            log.warning("[%d/%d] FAILED: %s (%s)", global_idx, total_unique, label, rate)
+            failed += 1
+        else:
+            image_type, description = result
+            save_cache_entry(cache_dir, item["md5"], image_type, description)
+            report.pop("error", None)
+            newly_described += 1
+            print(f"[{global_idx}/{total_unique}] Described: {label} ({rate})")
+        described = result is not None and not isinstance(result, Exception)
+        journal.record(item["md5"], DONE if described else FAILED, **report)
+
+    async def _describe_alone(item, report) -> None:
+        try:
+            result = await describe_image(
+                cache_state,
+                item["image_path"],
+                item["context"],
+                context_template,
+                MODEL,
+                controller,
+                report=report,
+            )
+        except DailyQuotaExceeded:
+            raise
+        except Exception as exc:
+            result = exc
+        _finish(item, result, report)
+
+    async def _describe_batch(items) -> None:
+        batch_report: dict = {}
+        try:
+            results = await describe_image_batch(
+                cache_state,
+                items,
+                context_template,
+                batch_instruction,
+                MODEL,
+                controller,
+                report=batch_report,
+            )
+        except DailyQuotaExceeded:
+            raise
+        except Exception as exc:
+            log.warning(
+                "Batch of %d failed (%s) — describing one by one.", len(items), exc
+            )
+            results = {}
+        # Each image is charged an equal share of the batch request.
+        share = {
+            "attempts": batch_report.get("attempts", 0),
+            "latency_s": batch_report.get("latency_s"),
+            "prompt_tokens": batch_report.get("prompt_tokens", 0) // len(items),
+            "output_tokens": batch_report.get("output_tokens", 0) // len(items),
+        }
+        for item in items:
+            if item["md5"] in results:
+                _finish(item, results[item["md5"]], dict(share))
+                continue
+            # Like batch_with_retry for text: what the batch answer lacks is
+            # asked for again, here one image per request.
+            log.info(
+                "No usable batch answer for %s — describing it alone.",
+                _rel_label(item["image_path"], docs_dir),
+            )
+            await _describe_alone(item, dict(share))
 
-                if isinstance(result, Exception):
-                    log.error(
-                        "[%d/%d] ERROR: %s — %s",
-                        global_idx,
-                        total_unique,
-                        label,
-                        result,
-                    )
-                    failed += 1
-                elif result is None:
-                    log.warning("[%d/%d] FAILED: %s", global_idx, total_unique, label)
-                    failed += 1
-                else:
-                    image_type, description = result
-                    save_cache_entry(cache_dir, item["md5"], image_type, description)
-                    newly_described += 1
-                    print(f"[{global_idx}/{total_unique}] Described: {label}")
+    async def _worker() -> None:
+        while True:
+            try:
+                request = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            if len(request) == 1:
+                await _describe_alone(request[0], {})
+            else:
+                await _describe_batch(request)
 
+    try:
+        # One worker per slot the controller could ever grant; the ones above
+        # the current limit wait inside controller.slot().
+        workers = min(controller.max_limit, len(requests))
+        await asyncio.gather(*(_worker() for _ in range(workers)))
     except KeyboardInterrupt:
-        log.info("Interrupted — already-saved entries are preserved.")
+        log.info("Interrupted — already-saved entries are preserved; --resume continues.")
+    # Near-duplicates of images described just now; the rest stay pending.
+    waiting = _reuse_descriptions(followers, cache_dir, journal, docs_dir.parent)
+    reused += len(followers) - len(waiting)
+    journal.compact()
 
-    _print_summary(total_unique, cached_count, newly_described, failed)
+    _print_summary(total_unique, cached_count, newly_described, failed, reused)
 
 
 def _rel_label(image_path: Path, docs_dir: Path) -> str:
@@ -613,14 +1241,19 @@ def _rel_label(image_path: Path, docs_dir: Path) -> str:
         return image_path.name
 
 
-def _print_summary(total: int, cached: int, described: int, failed: int) -> None:
+def _print_summary(
+    total: int, cached: int, described: int, failed: int, reused: int = 0
+) -> None:
     print(f"\n{'═' * 60}")
     print("SUMMARY")
     print(f"{'─' * 60}")
     print(f"  Total unique images found : {total}")
     print(f"  Already cached (skipped)  : {cached}")
     print(f"  Newly described           : {described}")
+    print(f"  Reused (near-duplicate)   : {reused}")
     print(f"  Failed                    : {failed}")
+    prep_stats.print_summary()
+    usage_ledger.print_summary()
     print(f"{'═' * 60}\n")
 
 
@@ -642,13 +1275,68 @@ def build_parser() -> argparse.ArgumentParser:
         "--concurrency",
         type=int,
         default=5,
-        help="Max parallel Gemini requests (default: 5)",
+        help="Initial parallel Gemini requests (default: 5)",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=16,
+        help="Upper bound the adaptive concurrency may grow to; "
+        "set it to --concurrency for a fixed level (default: 16)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Send up to N small images (see --batch-max-kb) in one request, "
+        "each with its own context; answers that don't parse are retried one "
+        "image per request (default: 1, no batching)",
+    )
+    parser.add_argument(
+        "--batch-max-kb",
+        type=int,
+        default=200,
+        metavar="KB",
+        help="Largest image file that may share a request (default: 200)",
+    )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Describe everything through one batch-prediction job instead of "
+        "interactive calls (for backfills, e.g. after a prompt change); waits "
+        "for the job, and a re-run re-attaches to it",
     )
     parser.add_argument(
         "--dry-run",
         action="store_true",
         help="Discover and list images without calling the API",
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Describe the images the journal still has pending (interrupted "
+        "or deferred), without rediscovering or re-hashing DOCS",
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Describe only the images that failed in earlier runs "
+        "(combine with --resume for both)",
+    )
+    parser.add_argument(
+        "--near-duplicate-distance",
+        type=int,
+        default=DEFAULT_MAX_DISTANCE,
+        metavar="BITS",
+        help="Reuse the description of an image whose perceptual hash differs "
+        f"in at most BITS of 256 bits; -1 disables (default: {DEFAULT_MAX_DISTANCE})",
+    )
+    parser.add_argument(
+        "--near-duplicate-report",
+        action="store_true",
+        help="Print the recorded near-duplicate reuses by cluster and exit",
+    )
     parser.add_argument(
         "--test",
         nargs="?",
@@ -664,7 +1352,14 @@ def build_parser() -> argparse.ArgumentParser:
 def main() -> None:
     parser = build_parser()
     args = parser.parse_args()
-    asyncio.run(run(args))
+    if args.near_duplicate_report:
+        print_near_duplicate_report()
+        return
+    try:
+        asyncio.run(run(args))
+    except DailyQuotaExceeded as exc:
+        log.error("%s — run again with --resume after the quota resets (UTC).", exc)
+        sys.exit(1)
 
 
 if __name__ == "__main__":
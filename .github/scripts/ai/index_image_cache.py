@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Maintain .llm_cache/images/manifest.jsonl (helpers.image_store).
+
+Without options, indexes raw <md5>.json files the manifest doesn't have yet
+(the describer does this on its own too). --rebuild re-reads every raw file
+and rewrites the manifest from scratch, e.g. after hand-editing descriptions.
+--shard moves raw files into the two-level ab/cd/<md5>.json layout, --flatten
+moves them back; later describer runs keep whichever layout is on disk.
+
+Usage: index_image_cache.py [--cache-dir DIR] [--rebuild] [--shard | --flatten] [--dry-run]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent  # .github/scripts/ai
+sys.path.insert(0, str(SCRIPT_DIR.parent))
+
+from helpers.image_store import (  # noqa: E402
+    MANIFEST_FILE,
+    ImageDescriptionStore,
+    raw_path,
+    read_raw_file,
+    scan_raw_files,
+)
+
+ROOT_DIR = (SCRIPT_DIR / "../../..").resolve()
+
+
+def relayout(cache_dir: Path, shard: bool, dry_run: bool) -> int:
+    """Move every raw file into the flat or sharded layout. Returns how many
+    moved; shard directories left empty are removed."""
+    moved = 0
+    for md5, path in sorted(scan_raw_files(cache_dir).items()):
+        target = raw_path(cache_dir, md5, shard)
+        if path == target:
+            continue
+        moved += 1
+        if dry_run:
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        path.replace(target)
+        for parent in (path.parent, path.parent.parent):
+            if parent != cache_dir:
+                try:
+                    parent.rmdir()
+                except OSError:
+                    pass  # still holds other files
+    return moved
+
+
+def rebuild(cache_dir: Path, dry_run: bool) -> dict:
+    """Re-read every raw file and rewrite the manifest with exactly those."""
+    stats = {"indexed": 0, "unreadable": 0}
+    records = []
+    for md5, path in sorted(scan_raw_files(cache_dir).items()):
+        entry = read_raw_file(path)
+        if entry is None:
+            stats["unreadable"] += 1
+        else:
+            records.append((md5, entry))
+    stats["indexed"] = len(records)
+    if not dry_run:
+        (cache_dir / MANIFEST_FILE).unlink(missing_ok=True)
+        store = ImageDescriptionStore(cache_dir)
+        store.manifest.put_many(records)
+        store.manifest.compact(force=True)
+    return stats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Index raw image descriptions into .llm_cache/images/manifest.jsonl"
+    )
+    parser.add_argument("--cache-dir", type=Path, default=ROOT_DIR / ".llm_cache" / "images")
+    parser.add_argument(
+        "--rebuild", action="store_true", help="Rewrite the manifest from the raw files"
+    )
+    layout = parser.add_mutually_exclusive_group()
+    layout.add_argument(
+        "--shard", action="store_true", help="Move raw files into ab/cd/<md5>.json"
+    )
+    layout.add_argument(
+        "--flatten", action="store_true", help="Move raw files back to <md5>.json"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Report only")
+    args = parser.parse_args()
+
+    cache_dir = args.cache_dir.resolve()
+    if not cache_dir.is_dir():
+        print(f"[IMAGES] No image cache at {cache_dir}")
+        return 0
+
+    if args.shard or args.flatten:
+        moved = relayout(cache_dir, shard=args.shard, dry_run=args.dry_run)
+        layout_name = "sharded" if args.shard else "flat"
+        print(f"[IMAGES] {moved} raw file(s) moved to the {layout_name} layout")
+
+    if args.rebuild:
+        stats = rebuild(cache_dir, args.dry_run)
+        print(
+            f"[IMAGES] Manifest rebuilt: {stats['indexed']} description(s), "
+            f"{stats['unreadable']} unreadable raw file(s) skipped"
+        )
+    elif args.dry_run:
+        store = ImageDescriptionStore(cache_dir, read_only=True)
+        print(f"[IMAGES] {len(store)} description(s) available")
+    else:
+        store = ImageDescriptionStore(cache_dir)
+        print(f"[IMAGES] Manifest holds {len(store)} description(s)")
+
+    if args.dry_run:
+        print("[DRY RUN] Nothing written")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
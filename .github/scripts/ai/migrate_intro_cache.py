@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Move per-file intro cache entries (.llm_cache/DOCS__<...>.qmd.json) into the
+single intros.jsonl store (helpers.file_updater.IntroCacheStore).
+
+Entries already in the store are newer and win. The per-file JSONs are
+deleted afterwards unless --keep-files is given. The store reads leftover
+per-file entries as a fallback, so migrating is safe to do at any time.
+
+Usage: migrate_intro_cache.py [--cache-dir DIR] [--docs-dir DIR] [--keep-files] [--dry-run]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent  # .github/scripts/ai
+sys.path.insert(0, str(SCRIPT_DIR.parent))
+
+from helpers.file_updater import (  # noqa: E402
+    IntroCacheStore,
+    get_intro_cache_path,
+    intro_store_key,
+    load_intro_cache,
+)
+
+ROOT_DIR = (SCRIPT_DIR / "../../..").resolve()
+
+
+def legacy_paths_by_name(docs_dir: Path, cache_dir: Path) -> dict:
+    """{per-file cache name: repo-relative .qmd path} for every .qmd in docs_dir,
+    so names whose parts contain "__" still map back to the right path."""
+    root = docs_dir.parent
+    return {
+        get_intro_cache_path(qmd.relative_to(root), cache_dir).name: qmd.relative_to(root)
+        for qmd in docs_dir.rglob("*.qmd")
+    }
+
+
+def migrate(cache_dir: Path, docs_dir: Path, keep_files: bool, dry_run: bool) -> dict:
+    store = IntroCacheStore(cache_dir)
+    known = legacy_paths_by_name(docs_dir, cache_dir)
+    stats = {"migrated": 0, "already_in_store": 0, "empty": 0, "guessed_paths": 0}
+
+    records = []
+    legacy_files = sorted(cache_dir.glob("*.qmd.json"))
+    for cache_path in legacy_files:
+        doc_path = known.get(cache_path.name)
+        if doc_path is None:
+            # Document no longer in DOCS: rebuild the path from the name.
+            doc_path = Path(*cache_path.name[: -len(".json")].split("__"))
+            stats["guessed_paths"] += 1
+        data = load_intro_cache(cache_path)
+        if not data:
+            stats["empty"] += 1
+        elif intro_store_key(doc_path) in store.store:
+            stats["already_in_store"] += 1
+        else:
+            records.append((intro_store_key(doc_path), data))
+
+    if dry_run:
+        stats["migrated"] = len(records)
+    else:
+        stats["migrated"] = store.store.put_many(records)
+        store.store.compact(force=True)
+        if not keep_files:
+            for cache_path in legacy_files:
+                cache_path.unlink()
+
+    print(
+        f"[MIGRATE] {len(legacy_files)} per-file entr(ies): {stats['migrated']} migrated, "
+        f"{stats['already_in_store']} already in store, {stats['empty']} empty/unreadable"
+    )
+    if stats["guessed_paths"]:
+        print(f"[MIGRATE] {stats['guessed_paths']} path(s) rebuilt from the file name")
+    if dry_run:
+        print("[DRY RUN] Nothing written")
+    elif not keep_files and legacy_files:
+        print(f"[MIGRATE] Removed {len(legacy_files)} per-file JSON(s)")
+    return stats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Migrate per-file intro cache JSONs into .llm_cache/intros.jsonl"
+    )
+    parser.add_argument("--cache-dir", type=Path, default=ROOT_DIR / ".llm_cache")
+    parser.add_argument("--docs-dir", type=Path, default=ROOT_DIR / "DOCS")
+    parser.add_argument(
+        "--keep-files", action="store_true", help="Leave the per-file JSONs in place"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Report what would be migrated"
+    )
+    args = parser.parse_args()
+
+    if not args.cache_dir.is_dir():
+        print(f"[MIGRATE] No cache directory at {args.cache_dir}")
+        return 0
+    migrate(
+        args.cache_dir.resolve(), args.docs_dir.resolve(), args.keep_files, args.dry_run
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
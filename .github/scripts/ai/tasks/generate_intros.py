@@ -5,18 +5,28 @@ TIER 1 (incremental): For files with existing intro/keywords, send only the
 git diff and metadata. The LLM decides whether to update, skip, or escalate.
 
 TIER 2 (full analysis): For new files (no existing intro/keywords) or files
-escalated from Tier 1, send the full QMD body content.
-
-Results are saved to .llm_cache/ but NOT written to .qmd files.
+escalated from Tier 1, send the full QMD body content. With bulk=True (full
+backfills, e.g. after a prompt change) every Tier 2 batch goes out in one
+batch-prediction job instead of interactive calls.
+
+Results are saved to the intro cache store (.llm_cache/intros.jsonl, see
+helpers.file_updater.IntroCacheStore) but NOT written to .qmd files. Each entry
+records the hash of the YAML-stripped body it describes and the prompt version
+(PROMPT_VERSION), so an unchanged body is skipped whatever git says, and a
+renamed, reverted or copied document reuses an intro found by content.
 """
 
 from __future__ import annotations
 
+import hashlib
+import queue
 import re
 import subprocess
+import threading
 import time
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 # Add scripts directories to path for imports
@@ -25,10 +35,13 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))  # scrip
 
 from helpers.gemini_client import (
     count_tokens,
-    check_and_wait_for_rate_limits,
-    record_api_request,
+    reserve_api_request,
+    plan_daily_budget,
     create_smart_batches,
     call_gemini,
+    bulk_text_request,
+    write_bulk_job,
+    run_bulk_job,
     call_gemini_with_cache,
     create_gemini_cache,
     delete_gemini_cache,
@@ -37,11 +50,15 @@ from helpers.gemini_client import (
     DEFAULT_MAX_TOKENS_PER_BATCH,
     DEFAULT_MAX_FILES_PER_BATCH,
 )
+from helpers.git_diff import GitDiffProvider
 from helpers.qmd_utils import find_qmd_files
-from helpers.file_updater import (
-    get_intro_cache_path,
-    load_intro_cache,
-    save_intro_cache,
+from helpers.file_updater import intro_body_hash, intro_cache_store
+from helpers.structured_output import (
+    StructuredOutputError,
+    array_schema,
+    object_schema,
+    parse_structured,
+    string_schema,
 )
 
 # ---------------------------------------------------------------------------
@@ -56,6 +73,41 @@ _TIER2_STATIC_PROMPT_PATH = (
 )
 
 
+def _prompt_version() -> str:
+    """Short hash of both intro prompt templates. Stored with every cache entry;
+    content-hash lookups only reuse intros written under the same prompts."""
+    h = hashlib.sha256()
+    for path in (_TIER1_STATIC_PROMPT_PATH, _TIER2_STATIC_PROMPT_PATH):
+        h.update(path.read_bytes())
+    return h.hexdigest()[:12]
+
+
+PROMPT_VERSION = _prompt_version()
+
+# Response schemas (helpers.structured_output). Tier 1 answers one file; Tier 2
+# answers a batch, one INTRO_SCHEMA per file path (see _tier2_schema).
+TIER1_SCHEMA = object_schema(
+    {
+        "action": string_schema(["no_change", "update", "escalate"]),
+        "introduction": string_schema(),
+        "keywords": array_schema(string_schema()),
+    },
+    required=["action"],
+)
+INTRO_SCHEMA = object_schema(
+    {"introduction": string_schema(), "keywords": array_schema(string_schema())}
+)
+
+# Tier 1 calls in flight at once. Each is a small diff, so wall time is almost
+# all latency; the shared rate limiter still caps RPM/TPM across all of them.
+TIER1_CONCURRENCY = int(os.getenv("TIER1_CONCURRENCY", "8"))
+# Tier 2 batches in flight at once; each carries up to DEFAULT_MAX_FILES_PER_BATCH
+# full documents.
+TIER2_CONCURRENCY = int(os.getenv("TIER2_CONCURRENCY", "4"))
+# Job file of bulk mode, relative to cache_dir (.llm_cache/bulk/ is gitignored).
+BULK_JOB_FILE = Path("bulk") / "generate_intros.jsonl"
+
+
 # ---------------------------------------------------------------------------
 # YAML end-line detection
 # ---------------------------------------------------------------------------
@@ -68,7 +120,10 @@ def get_yaml_end_line(filepath: Path) -> int | None:
         lines = filepath.read_text(encoding="utf-8").splitlines()
     except Exception:
         return None
+    return _yaml_end_of_lines(lines)
 
+
+def _yaml_end_of_lines(lines: list[str]) -> int | None:
     if not lines or lines[0].strip() != "---":
         return None  # No YAML block
 
@@ -87,16 +142,81 @@ def strip_yaml_from_content(content: str, yaml_end_line: int | None) -> str:
     return "".join(lines[yaml_end_line:])
 
 
-def _tier2_new_entry(full_doc_path: Path, yaml_end: int | None) -> dict:
-    """Tier 2 queue entry for a new file with no prior intro/keywords (read body, drop YAML)."""
+def _read_body(full_doc_path: Path) -> tuple[int | None, str]:
+    """(yaml_end, YAML-stripped body) of a .qmd from a single read."""
     content = full_doc_path.read_text(encoding="utf-8")
+    yaml_end = _yaml_end_of_lines(content.splitlines())
+    return yaml_end, strip_yaml_from_content(content, yaml_end)
+
+
+def _tier2_new_entry(
+    full_doc_path: Path, yaml_end: int | None, cached: dict | None = None
+) -> dict:
+    """Tier 2 queue entry for a new file with no prior intro/keywords, or, given
+    the cached entry of a document whose body changed unseen, one that passes the
+    old intro/keywords along. The body is not read here — the Tier 2 producer
+    loads it (see _load_tier2_content)."""
     return {
-        "content": strip_yaml_from_content(content, yaml_end),
-        "prev_keywords": None,
-        "prev_introduction": None,
+        "full_path": full_doc_path,
+        "yaml_end": yaml_end,
+        "prev_keywords": (cached or {}).get("keywords"),
+        "prev_introduction": (cached or {}).get("intro"),
     }
 
 
+def _load_tier2_content(info: dict) -> str:
+    """The YAML-stripped body for a Tier 2 entry ("content" if already loaded)."""
+    if "content" in info:
+        return info["content"]
+    content = info["full_path"].read_text(encoding="utf-8")
+    return strip_yaml_from_content(content, info["yaml_end"])
+
+
+# ---------------------------------------------------------------------------
+# Intro cache entries
+# ---------------------------------------------------------------------------
+
+
+def _save_intro(
+    doc_path: Path, cache_dir: Path, intro: str, keywords: list, body_hash: str | None
+) -> None:
+    """Save an intro/keywords entry; with body_hash it is stamped with the body
+    and PROMPT_VERSION and becomes findable by content."""
+    data = {"intro": intro, "keywords": keywords}
+    if body_hash:
+        data["body_hash"] = body_hash
+        data["prompt_version"] = PROMPT_VERSION
+    intro_cache_store(cache_dir).put(doc_path, data)
+
+
+def _stamp_body_hash(
+    doc_path: Path, cache_dir: Path, cached: dict, body_hash: str, dry_run: bool
+) -> None:
+    """Record body_hash and PROMPT_VERSION on an entry that is still right for the
+    current body (Tier 1 no_change, YAML-only edits, entries from before body
+    hashes), so lookup_content can find it for renames and copies."""
+    if dry_run or cached.get("body_hash") == body_hash:
+        return
+    intro_cache_store(cache_dir).put(
+        doc_path, {**cached, "body_hash": body_hash, "prompt_version": PROMPT_VERSION}
+    )
+
+
+def _reuse_by_content(
+    doc_path: Path, cache_dir: Path, body_hash: str, dry_run: bool
+) -> bool:
+    """Copy the entry of another document with the same body and prompt version
+    (a rename, revert or copy) to doc_path. False when there is none."""
+    store = intro_cache_store(cache_dir)
+    hit = store.lookup_content(body_hash, PROMPT_VERSION)
+    if hit is None:
+        return False
+    if not dry_run:
+        store.put(doc_path, dict(hit))
+    print(f"[PRE-FILTER] Reuse (same body cached): {doc_path.name}")
+    return True
+
+
 # ---------------------------------------------------------------------------
 # YAML-aware diff cleaning
 # ---------------------------------------------------------------------------
@@ -207,56 +327,36 @@ def _build_tier1_dynamic(
 
 def _parse_tier1_response(raw: str) -> dict | None:
     """
-    Parse a Tier 1 LLM response.
+    Parse a Tier 1 LLM response (TIER1_SCHEMA).
 
     Returns one of:
         {"action": "no_change"}
         {"action": "update", "introduction": str, "keywords": list}
         {"action": "escalate"}
-        None  — unparseable (caller should escalate to Tier 2)
+        None  — invalid (caller should escalate to Tier 2)
     """
-    text = raw.replace("\r\n", "\n").strip()
-
-    action_m = re.search(r"(?:^|\n)ACTION:\s*(\S+)", text)
-    if not action_m:
-        print("[TIER1] Could not find ACTION field in response")
+    try:
+        answer = parse_structured(raw, TIER1_SCHEMA)
+    except StructuredOutputError as e:
+        print(f"[TIER1] Invalid response: {e}")
         return None
 
-    action = action_m.group(1).lower().strip()
-
-    if action == "no_change":
-        return {"action": "no_change"}
-    if action == "escalate":
-        return {"action": "escalate"}
-
-    if action == "update":
-        # Match field labels only at the start of a line to avoid false matches
-        # within introduction text that might contain colons.
-        intro_m = re.search(
-            r"(?:^|\n)INTRODUCTION:\s*(.+?)(?=\n[A-Z]+:|\Z)", text, re.DOTALL
-        )
-        keywords_m = re.search(
-            r"(?:^|\n)KEYWORDS:\s*(.+?)(?=\n[A-Z]+:|\Z)", text, re.DOTALL
-        )
-
-        if not intro_m or not keywords_m:
-            print("[TIER1] ACTION=update but missing INTRODUCTION or KEYWORDS fields")
-            return None
-
-        introduction = intro_m.group(1).replace("\n", " ").strip()
-        keywords = [
-            k.strip() for k in keywords_m.group(1).strip().split(",") if k.strip()
-        ]
+    action = answer["action"]
+    if action != "update":
+        return {"action": action}
 
-        # Accept 6-15 as valid; treat 0-3 or 20+ as degenerate → escalate
-        if len(keywords) < 4 or len(keywords) > 20:
-            print(f"[TIER1] Degenerate keyword count ({len(keywords)}) — escalating")
-            return None
+    introduction = " ".join(answer.get("introduction", "").split())
+    keywords = [k.strip() for k in answer.get("keywords", []) if k.strip()]
+    if not introduction or not keywords:
+        print("[TIER1] action=update but missing introduction or keywords")
+        return None
 
-        return {"action": "update", "introduction": introduction, "keywords": keywords}
+    # Accept 6-15 as valid; treat 0-3 or 20+ as degenerate → escalate
+    if len(keywords) < 4 or len(keywords) > 20:
+        print(f"[TIER1] Degenerate keyword count ({len(keywords)}) — escalating")
+        return None
 
-    print(f"[TIER1] Unknown ACTION value: '{action}'")
-    return None
+    return {"action": "update", "introduction": introduction, "keywords": keywords}
 
 
 def _call_tier1_single(
@@ -281,17 +381,30 @@ def _call_tier1_single(
         print(f"[DRY RUN] Tier 1: {input_tokens:,} tokens — returning no_change")
         return {"action": "no_change"}
 
-    check_and_wait_for_rate_limits(input_tokens)
-
     def _do_call():
+        reservation = reserve_api_request(input_tokens)
         if cache is not None:
-            return call_gemini_with_cache(cache, dynamic)
-        static_text = _TIER1_STATIC_PROMPT_PATH.read_text(encoding="utf-8")
-        return call_gemini(model, static_text + "\n\n" + dynamic)
+            result = call_gemini_with_cache(
+                cache,
+                dynamic,
+                reservation=reservation,
+                label="intros-tier1",
+                response_schema=TIER1_SCHEMA,
+            )
+        else:
+            static_text = _TIER1_STATIC_PROMPT_PATH.read_text(encoding="utf-8")
+            result = call_gemini(
+                model,
+                static_text + "\n\n" + dynamic,
+                reservation=reservation,
+                label="intros-tier1",
+                token_count=count_tokens(static_text) + input_tokens,
+                response_schema=TIER1_SCHEMA,
+            )
+        return result.text
 
     try:
         raw = _do_call()
-        record_api_request(input_tokens)
         return _parse_tier1_response(raw)
     except Exception as e:
         error_str = str(e)
@@ -302,7 +415,6 @@ def _call_tier1_single(
             time.sleep(sleep_secs)
             try:
                 raw = _do_call()
-                record_api_request(input_tokens)
                 return _parse_tier1_response(raw)
             except Exception as retry_e:
                 print(f"[TIER1] Retry failed: {retry_e}")
@@ -311,6 +423,84 @@ def _call_tier1_single(
         return None
 
 
+def _escalation_entry(info: dict) -> dict:
+    return {
+        "full_path": info["full_path"],
+        "yaml_end": info["yaml_end"],
+        "prev_keywords": info["keywords"],
+        "prev_introduction": info["introduction"],
+    }
+
+
+def _run_tier1_all(
+    model,
+    cache,
+    tier1_queue: dict,
+    escalations: "queue.Queue",
+    cache_dir: Path,
+    dry_run: bool,
+    stats: dict,
+    concurrency: int,
+) -> None:
+    """Run every Tier 1 file on up to concurrency threads. Results are handled
+    here, on the calling thread, as they complete: updates go to the cache,
+    escalations and parse failures go onto escalations for the Tier 2 worker."""
+    print(f"\n{'=' * 70}")
+    print(
+        f"TIER 1: Processing {len(tier1_queue)} file(s) incrementally "
+        f"(concurrency {concurrency})"
+    )
+    print(f"{'=' * 70}")
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = {
+            pool.submit(
+                _call_tier1_single,
+                model=model,
+                cache=cache,
+                keywords=info["keywords"],
+                introduction=info["introduction"],
+                meta=info["meta"],
+                bump_level=info["bump_level"],
+                clean_diff=info["clean_diff"],
+                dry_run=dry_run,
+            ): doc_path
+            for doc_path, info in tier1_queue.items()
+        }
+        for future in as_completed(futures):
+            doc_path = futures[future]
+            info = tier1_queue[doc_path]
+            result = future.result()
+            label = f"[TIER1] {doc_path.name}  (bump: {info['bump_level']})"
+
+            if result is None:
+                print(f"{label} → parse failure — escalating to Tier 2")
+                stats["tier1_parse_failure"] += 1
+                stats["tier2_escalated"] += 1
+                escalations.put((doc_path, _escalation_entry(info)))
+            elif result["action"] == "no_change":
+                print(f"{label} → no_change")
+                stats["tier1_no_change"] += 1
+                _stamp_body_hash(
+                    doc_path, cache_dir, info["cached"], info["body_hash"], dry_run
+                )
+            elif result["action"] == "update":
+                print(f"{label} → update")
+                stats["tier1_update"] += 1
+                _save_intro(
+                    doc_path,
+                    cache_dir,
+                    result["introduction"],
+                    result["keywords"],
+                    None if dry_run else info["body_hash"],
+                )
+            elif result["action"] == "escalate":
+                print(f"{label} → escalate → Tier 2")
+                stats["tier1_escalate"] += 1
+                stats["tier2_escalated"] += 1
+                escalations.put((doc_path, _escalation_entry(info)))
+
+
 # ---------------------------------------------------------------------------
 # Tier 2 API call — full document analysis
 # ---------------------------------------------------------------------------
@@ -344,60 +534,50 @@ def _build_tier2_dynamic(batch_files: dict) -> str:
     return "\n".join(parts) + "\n"
 
 
-def _parse_tier2_response(raw: str) -> dict:
-    """
-    Parse a Tier 2 LLM response.
+def _tier2_schema(filepaths) -> dict:
+    """The answer to a Tier 2 batch: an INTRO_SCHEMA per file path. The paths are
+    optional, so one missing file doesn't void the batch — _dispatch_tier2_batch
+    retries the missing ones individually."""
+    return object_schema({str(fp): INTRO_SCHEMA for fp in filepaths}, required=[])
+
 
-    Returns a dict mapping filepath strings → {"introduction": str, "keywords": list}.
+def _parse_tier2_response(raw: str, filepaths) -> dict:
     """
-    results = {}
-    blocks = re.split(r"===\s*FILE:\s*", raw)
-    for block in blocks:
-        block = block.strip()
-        if not block:
-            continue
+    Parse a Tier 2 LLM response (_tier2_schema(filepaths)).
 
-        lines = block.split("\n")
-        filepath_line = lines[0].rstrip("= ").strip()
-        if not filepath_line:
-            continue
+    Returns a dict mapping filepath strings → {"introduction": str, "keywords": list}
+    for the files with a usable answer; an invalid response gives {}.
+    """
+    try:
+        answer = parse_structured(raw, _tier2_schema(filepaths))
+    except StructuredOutputError as e:
+        print(f"[TIER2] Invalid response: {e}")
+        return {}
 
-        intro = None
-        keywords_lines = []
-        in_keywords = False
-
-        for line in lines[1:]:
-            if line.startswith("INTRODUCTION:"):
-                intro = line[len("INTRODUCTION:") :].strip()
-                in_keywords = False
-            elif line.startswith("KEYWORDS:"):
-                keywords_lines = [line[len("KEYWORDS:") :].strip()]
-                in_keywords = True
-            elif in_keywords and line.strip():
-                keywords_lines.append(line.strip())
-
-        keywords = None
-        if keywords_lines:
-            keywords_raw = " ".join(keywords_lines)
-            keywords = [k.strip() for k in keywords_raw.split(",") if k.strip()]
+    results = {}
+    for filepath, entry in answer.items():
+        intro = " ".join(entry.get("introduction", "").split())
+        keywords = [k.strip() for k in entry.get("keywords", []) if k.strip()]
 
         if not intro or intro.lower() == "error":
-            print(f"[TIER2] Missing/error introduction for {filepath_line}")
+            print(f"[TIER2] Missing/error introduction for {filepath}")
             continue
         if not keywords or (len(keywords) == 1 and keywords[0].lower() == "error"):
-            print(f"[TIER2] Missing/error keywords for {filepath_line}")
+            print(f"[TIER2] Missing/error keywords for {filepath}")
             continue
 
-        results[filepath_line] = {"introduction": intro, "keywords": keywords}
+        results[filepath] = {"introduction": intro, "keywords": keywords}
 
     return results
 
 
 def _call_tier2_batch_once(
-    model, cache, batch_files: dict, dry_run: bool
+    model, cache, batch_files: dict, dry_run: bool, dynamic: str | None = None
 ) -> dict | None:
-    """Make a single Tier 2 API call. Returns parsed results or None on failure."""
-    dynamic = _build_tier2_dynamic(batch_files)
+    """Make a single Tier 2 API call (dynamic: a prompt already built from
+    batch_files). Returns parsed results or None on failure."""
+    if dynamic is None:
+        dynamic = _build_tier2_dynamic(batch_files)
     input_tokens = count_tokens(dynamic)
 
     print(f"[TIER2] Batch of {len(batch_files)} file(s) (~{input_tokens:,} tokens)")
@@ -421,18 +601,33 @@ def _call_tier2_batch_once(
             for fp in batch_files
         }
 
-    check_and_wait_for_rate_limits(input_tokens)
-
     def _do_call():
+        reservation = reserve_api_request(input_tokens)
         if cache is not None:
-            return call_gemini_with_cache(cache, dynamic)
-        static_text = _TIER2_STATIC_PROMPT_PATH.read_text(encoding="utf-8")
-        return call_gemini(model, static_text + "\n\n" + dynamic)
+            result = call_gemini_with_cache(
+                cache,
+                dynamic,
+                reservation=reservation,
+                label="intros-tier2",
+                items=len(batch_files),
+                response_schema=_tier2_schema(batch_files),
+            )
+        else:
+            static_text = _TIER2_STATIC_PROMPT_PATH.read_text(encoding="utf-8")
+            result = call_gemini(
+                model,
+                static_text + "\n\n" + dynamic,
+                reservation=reservation,
+                label="intros-tier2",
+                token_count=count_tokens(static_text) + input_tokens,
+                items=len(batch_files),
+                response_schema=_tier2_schema(batch_files),
+            )
+        return result.text
 
     try:
         raw = _do_call()
-        record_api_request(input_tokens)
-        results = _parse_tier2_response(raw)
+        results = _parse_tier2_response(raw, batch_files)
         return results if results else None
     except Exception as e:
         error_str = str(e)
@@ -443,8 +638,7 @@ def _call_tier2_batch_once(
             time.sleep(sleep_secs)
             try:
                 raw = _do_call()
-                record_api_request(input_tokens)
-                results = _parse_tier2_response(raw)
+                results = _parse_tier2_response(raw, batch_files)
                 return results if results else None
             except Exception as retry_e:
                 print(f"[TIER2] Retry failed: {retry_e}")
@@ -453,73 +647,286 @@ def _call_tier2_batch_once(
         return None
 
 
+def _dispatch_tier2_batch(
+    model, cache, batch_num: int, batch_files: dict, dynamic: str, dry_run: bool
+) -> dict:
+    """Run one built Tier 2 batch: one call, a single retry on total failure, then
+    files missing from the answer one by one. Returns {str(path): result} for
+    whatever succeeded."""
+    print(f"\n=== Tier 2 batch {batch_num} ===")
+    results = _call_tier2_batch_once(model, cache, batch_files, dry_run, dynamic)
+
+    # Single retry on total failure
+    if results is None:
+        print(f"[TIER2] Batch {batch_num} failed — retrying once")
+        results = _call_tier2_batch_once(model, cache, batch_files, dry_run, dynamic)
+
+    if results is None:
+        print(
+            f"[TIER2] Batch {batch_num} failed after retry — skipping {len(batch_files)} file(s)"
+        )
+        return {}
+
+    # Retry individually any files missing from the response
+    missing = {fp: info for fp, info in batch_files.items() if str(fp) not in results}
+    if missing:
+        print(f"[TIER2] {len(missing)} file(s) missing — retrying individually")
+        for fp, info in missing.items():
+            single = _call_tier2_batch_once(model, cache, {fp: info}, dry_run)
+            if single:
+                results.update(single)
+            else:
+                print(f"[TIER2] Could not process {fp} — skipping")
+    return results
+
+
+# End-of-stream marker between the Tier 2 pipeline stages.
+_STAGE_DONE = object()
+
+
+def _put_unless_stopped(q: "queue.Queue", item, stop: threading.Event) -> bool:
+    """Blocking put that gives up once stop is set, so a failed stage can't leave
+    the others waiting on a full queue forever."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.2)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
 def _process_tier2_all(
-    model, cache, tier2_queue: dict, cache_dir: Path, dry_run: bool
+    model,
+    cache,
+    tier2_queue: dict,
+    cache_dir: Path,
+    dry_run: bool,
+    concurrency: int | None = None,
 ) -> int:
-    """Run every file in tier2_queue (Path → {content, prev_keywords,
-    prev_introduction}) through Tier 2 in smart batches. Returns how many were
-    saved to cache."""
+    """Run every file in tier2_queue (Path → entry from _tier2_new_entry or
+    _escalation_entry) through Tier 2 as a three-stage pipeline:
+
+      producer    — reads bodies one window at a time, smart-batches the window
+                    and builds each batch's dynamic prompt;
+      dispatchers — concurrency threads making the API calls (and retries)
+                    under the shared rate limiter;
+      consumer    — this thread; saves every answered file to the intro cache.
+
+    The queues between stages hold at most concurrency batches, so only a few
+    windows of file bodies are in memory however large the backfill is.
+    Returns how many files were saved to cache."""
     if not tier2_queue:
         return 0
 
-    content_map = {fp: info["content"] for fp, info in tier2_queue.items()}
-    batches = create_smart_batches(
-        content_map,
-        max_tokens=DEFAULT_MAX_TOKENS_PER_BATCH,
-        max_files=DEFAULT_MAX_FILES_PER_BATCH,
-    )
+    workers = max(1, concurrency or TIER2_CONCURRENCY)
+    window = DEFAULT_MAX_FILES_PER_BATCH * workers
+    prompts: queue.Queue = queue.Queue(maxsize=workers)
+    answered: queue.Queue = queue.Queue(maxsize=workers)
+    stop = threading.Event()
+
+    print(f"\n[TIER2] {len(tier2_queue)} file(s), up to {workers} batch(es) in flight")
+
+    def produce():
+        try:
+            items = list(tier2_queue.items())
+            batch_num = 0
+            for start in range(0, len(items), window):
+                loaded = {}
+                for fp, info in items[start : start + window]:
+                    try:
+                        loaded[fp] = {**info, "content": _load_tier2_content(info)}
+                    except OSError as e:
+                        print(f"[TIER2] Could not read {fp}: {e} — skipping")
+                batches = create_smart_batches(
+                    {fp: info["content"] for fp, info in loaded.items()},
+                    max_tokens=DEFAULT_MAX_TOKENS_PER_BATCH,
+                    max_files=DEFAULT_MAX_FILES_PER_BATCH,
+                )
+                for batch in batches:
+                    batch_num += 1
+                    batch_files = {fp: loaded[fp] for fp in batch}
+                    item = (batch_num, batch_files, _build_tier2_dynamic(batch_files))
+                    if not _put_unless_stopped(prompts, item, stop):
+                        return
+        except BaseException:
+            stop.set()
+            raise
+        finally:
+            for _ in range(workers):
+                _put_unless_stopped(prompts, _STAGE_DONE, stop)
+
+    def dispatch():
+        try:
+            while not stop.is_set():
+                try:
+                    item = prompts.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+                if item is _STAGE_DONE:
+                    return
+                batch_num, batch_files, dynamic = item
+                results = _dispatch_tier2_batch(
+                    model, cache, batch_num, batch_files, dynamic, dry_run
+                )
+                if not _put_unless_stopped(answered, (batch_files, results), stop):
+                    return
+        except BaseException:
+            stop.set()
+            raise
+        finally:
+            _put_unless_stopped(answered, _STAGE_DONE, stop)
 
-    print(f"\n[TIER2] {len(tier2_queue)} file(s) in {len(batches)} batch(es)")
     saved = 0
+    with ThreadPoolExecutor(max_workers=workers + 1) as pool:
+        stages = [pool.submit(produce)]
+        stages += [pool.submit(dispatch) for _ in range(workers)]
+        try:
+            finished = 0
+            while finished < workers and not stop.is_set():
+                try:
+                    item = answered.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+                if item is _STAGE_DONE:
+                    finished += 1
+                    continue
+                batch_files, results = item
+                for fp in batch_files:
+                    fp_str = str(fp)
+                    if fp_str not in results:
+                        continue
+                    result = results[fp_str]
+                    body = batch_files[fp]["content"]
+                    _save_intro(
+                        fp if isinstance(fp, Path) else Path(fp),
+                        cache_dir,
+                        result["introduction"],
+                        result["keywords"],
+                        None if dry_run else intro_body_hash(body),
+                    )
+                    print(f"  ✓ [TIER2] Saved: {Path(fp).name}")
+                    saved += 1
+        except BaseException:
+            stop.set()
+            raise
+        # Surface a stage's failure (e.g. the daily-quota exit in a dispatcher).
+        for stage in stages:
+            stage.result()
 
-    for batch_idx, batch_content_map in enumerate(batches, 1):
-        print(f"\n=== Tier 2 batch {batch_idx}/{len(batches)} ===")
-        batch_files = {fp: tier2_queue[fp] for fp in batch_content_map}
+    return saved
 
-        results = _call_tier2_batch_once(model, cache, batch_files, dry_run)
 
-        # Single retry on total failure
-        if results is None:
-            print(f"[TIER2] Batch {batch_idx} failed — retrying once")
-            results = _call_tier2_batch_once(model, cache, batch_files, dry_run)
+def _process_tier2_bulk(tier2_queue: dict, cache_dir: Path, dry_run: bool) -> int:
+    """Run every file in tier2_queue through one batch-prediction job (see
+    gemini_client.run_bulk_job) instead of interactive calls: one request per
+    smart batch, each answered file saved to the intro cache. Files without a
+    usable answer stay uncached and go to Tier 2 again on the next run.
+    Returns how many files were saved to cache."""
+    if not tier2_queue:
+        return 0
 
-        if results is None:
-            print(
-                f"[TIER2] Batch {batch_idx} failed after retry — skipping {len(batch_files)} file(s)"
-            )
-            continue
+    loaded = {}
+    for fp, info in tier2_queue.items():
+        try:
+            loaded[fp] = {**info, "content": _load_tier2_content(info)}
+        except OSError as e:
+            print(f"[TIER2] Could not read {fp}: {e} — skipping")
+    batches = create_smart_batches(
+        {fp: info["content"] for fp, info in loaded.items()},
+        max_tokens=DEFAULT_MAX_TOKENS_PER_BATCH,
+        max_files=DEFAULT_MAX_FILES_PER_BATCH,
+    )
+    jobs = {
+        f"batch-{num}": {fp: loaded[fp] for fp in batch}
+        for num, batch in enumerate(batches, 1)
+    }
+    print(f"\n[TIER2] Bulk job: {len(loaded)} file(s) in {len(jobs)} request(s)")
+    if dry_run:
+        print("[DRY RUN] Tier 2: bulk job not submitted")
+        return 0
 
-        # Retry individually any files missing from the response
-        missing = {
-            fp: info for fp, info in batch_files.items() if str(fp) not in results
-        }
-        if missing:
-            print(f"[TIER2] {len(missing)} file(s) missing — retrying individually")
-            for fp, info in missing.items():
-                single = _call_tier2_batch_once(model, cache, {fp: info}, dry_run)
-                if single:
-                    results.update(single)
-                else:
-                    print(f"[TIER2] Could not process {fp} — skipping")
+    static_text = _TIER2_STATIC_PROMPT_PATH.read_text(encoding="utf-8")
+    job_file = cache_dir / BULK_JOB_FILE
+    write_bulk_job(
+        job_file,
+        {
+            key: bulk_text_request(
+                static_text + "\n\n" + _build_tier2_dynamic(batch_files),
+                response_schema=_tier2_schema(batch_files),
+            )
+            for key, batch_files in jobs.items()
+        },
+    )
+    results = run_bulk_job(
+        job_file, "clms-intro-generation", label="intros-tier2 (bulk)"
+    )
 
-        # Persist results to cache
+    saved = 0
+    for key, batch_files in jobs.items():
+        answer = results.get(key)
+        parsed = (
+            _parse_tier2_response(answer.text, batch_files) if answer is not None else {}
+        )
         for fp, info in batch_files.items():
-            fp_str = str(fp)
-            if fp_str in results:
-                result = results[fp_str]
-                cache_path = get_intro_cache_path(
-                    fp if isinstance(fp, Path) else Path(fp), cache_dir
-                )
-                save_intro_cache(
-                    cache_path,
-                    {
-                        "intro": result["introduction"],
-                        "keywords": result["keywords"],
-                    },
-                )
-                print(f"  ✓ [TIER2] Saved: {Path(fp).name}")
-                saved += 1
+            result = parsed.get(str(fp))
+            if result is None:
+                print(f"[TIER2] No answer for {fp} — left for the next run")
+                continue
+            _save_intro(
+                fp if isinstance(fp, Path) else Path(fp),
+                cache_dir,
+                result["introduction"],
+                result["keywords"],
+                intro_body_hash(info["content"]),
+            )
+            print(f"  ✓ [TIER2] Saved: {Path(fp).name}")
+            saved += 1
+    return saved
+
+
+# Put on the escalation queue once Tier 1 has finished.
+_TIER1_DONE = object()
+
 
+def _run_tier2_stream(
+    model,
+    cache,
+    new_queue: dict,
+    escalations: "queue.Queue",
+    cache_dir: Path,
+    dry_run: bool,
+) -> int:
+    """Tier 2 worker that runs alongside Tier 1: processes new_queue straight
+    away, then escalations until _TIER1_DONE. Each round takes everything
+    already waiting (up to TIER2_CONCURRENCY full batches) and sends it once
+    there is at least a full batch, so a backlog of escalations goes out
+    TIER2_CONCURRENCY batches at a time. Returns how many files were saved to
+    cache."""
+    saved = _process_tier2_all(model, cache, new_queue, cache_dir, dry_run)
+
+    limit = DEFAULT_MAX_FILES_PER_BATCH * max(1, TIER2_CONCURRENCY)
+    pending: dict[Path, dict] = {}
+    done = False
+    while not done:
+        item = escalations.get()
+        while True:
+            if item is _TIER1_DONE:
+                done = True
+                break
+            doc_path, entry = item
+            pending[doc_path] = entry
+            if len(pending) >= limit:
+                break
+            try:
+                item = escalations.get_nowait()
+            except queue.Empty:
+                break
+        if len(pending) >= DEFAULT_MAX_FILES_PER_BATCH:
+            saved += _process_tier2_all(model, cache, pending, cache_dir, dry_run)
+            pending = {}
+
+    saved += _process_tier2_all(model, cache, pending, cache_dir, dry_run)
     return saved
 
 
@@ -528,10 +935,13 @@ def _process_tier2_all(
 # ---------------------------------------------------------------------------
 
 
-def _get_git_diff(filepath_str: str) -> str | None:
+def _get_git_diff(filepath_str: str, diffs: GitDiffProvider | None = None) -> str | None:
     """The -U0 diff of filepath between HEAD~1 and HEAD, or None if it's empty or the
     command fails. Logs a warning on non-zero exit so real git errors aren't mistaken
-    for "no diff"."""
+    for "no diff". With diffs (a provider over the modified files) it is read from
+    the batched git diff instead of a git call of its own."""
+    if diffs is not None and filepath_str in diffs:
+        return diffs.get(filepath_str) or None  # False (git error) was logged
     try:
         result = subprocess.run(
             ["git", "diff", "-U0", "HEAD~1", "HEAD", "--", filepath_str],
@@ -568,11 +978,15 @@ def run(
     testing: bool = False,
     max_files_for_testing: int = 3,
     bump_levels: dict | None = None,
+    tier1_concurrency: int | None = None,
+    bulk: bool = False,
 ) -> dict:
     """Generate introductions and keywords with the two-tier strategy (see the module
     docstring), returning a stats dict. bump_levels is handed over in-memory from the
     versioning task so no file I/O is needed for bump signals; testing caps the run to
-    max_files_for_testing."""
+    max_files_for_testing. tier1_concurrency overrides TIER1_CONCURRENCY. With bulk,
+    Tier 1 runs first and the new files plus its escalations then go to Tier 2 in one
+    batch-prediction job (_process_tier2_bulk), which waits for the job."""
     print("=" * 70)
     print("TASK: Generate Introductions & Keywords (Two-Tier Strategy)")
     print("=" * 70)
@@ -592,6 +1006,10 @@ def run(
         )
 
     modified_paths = set(Path(p) for p in modified_files_list if p.strip())
+    # -U0 diffs of every modified file from one git diff, read as they're needed
+    modified_diffs = GitDiffProvider(
+        "HEAD~1", "HEAD", paths=sorted(str(p) for p in modified_paths), context_lines=0
+    )
 
     # -----------------------------------------------------------------
     # Phase 0: classify every QMD file
@@ -602,6 +1020,8 @@ def run(
         "files_skipped_cached": 0,
         "files_skipped_no_diff": 0,
         "files_skipped_yaml_only": 0,
+        "files_reused_by_content": 0,
+        "files_stale": 0,
         "files_deleted": 0,
         "tier1_no_change": 0,
         "tier1_update": 0,
@@ -613,67 +1033,100 @@ def run(
 
     print("\n[INFO] Scanning QMD files...")
 
+    # Same-body documents queued for Tier 2 go out once; the others copy the
+    # result afterwards (body hash → doc_path sent, and doc_paths waiting on it).
+    tier2_body_owner: dict[str, Path] = {}
+    tier2_same_body: dict[Path, str] = {}
+
+    def queue_tier2(doc_path, full_doc_path, yaml_end, body_hash, cached=None):
+        if body_hash in tier2_body_owner:
+            tier2_same_body[doc_path] = body_hash
+            return
+        tier2_body_owner[body_hash] = doc_path
+        tier2_new_queue[doc_path] = _tier2_new_entry(full_doc_path, yaml_end, cached)
+
     for full_doc_path in find_qmd_files(input_dir, blacklisted_dirs):
         doc_path = full_doc_path.relative_to(root_dir)
-
-        if doc_path not in modified_paths:
-            # Not modified — ensure it has a cache entry; if not, queue for Tier 2
-            cache_path = get_intro_cache_path(doc_path, cache_dir)
-            cached = load_intro_cache(cache_path)
-            if cached.get("intro") and cached.get("keywords"):
-                stats["files_skipped_cached"] += 1
-            else:
-                tier2_new_queue[doc_path] = _tier2_new_entry(
-                    full_doc_path, get_yaml_end_line(full_doc_path)
-                )
-            continue
+        modified = doc_path in modified_paths
 
         # File is in modified_paths — check existence
-        if not full_doc_path.exists():
-            cache_path = get_intro_cache_path(doc_path, cache_dir)
-            if cache_path.exists():
-                cache_path.unlink()
+        if modified and not full_doc_path.exists():
+            if intro_cache_store(cache_dir).delete(doc_path):
                 print(f"[PRE-FILTER] Removed cache for deleted file: {doc_path}")
             stats["files_deleted"] += 1
             continue
 
-        diff = _get_git_diff(str(doc_path))
-        if diff is None:
-            # No diff — only skip if a valid cache already exists
-            cache_path = get_intro_cache_path(doc_path, cache_dir)
-            cached = load_intro_cache(cache_path)
-            if cached.get("intro") and cached.get("keywords"):
-                stats["files_skipped_no_diff"] += 1
-                print(f"[PRE-FILTER] Skip (empty diff, cached): {doc_path.name}")
-                continue
-            # No cache either — queue for full Tier 2 analysis
-            print(f"[PRE-FILTER] No diff but missing cache → Tier 2: {doc_path.name}")
-            tier2_new_queue[doc_path] = _tier2_new_entry(
-                full_doc_path, get_yaml_end_line(full_doc_path)
-            )
+        try:
+            yaml_end, body = _read_body(full_doc_path)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"[WARNING] Could not read {doc_path}: {e} — skipping")
+            continue
+        body_hash = intro_body_hash(body)
+        cached = intro_cache_store(cache_dir).get(doc_path)
+        has_intro = bool(cached.get("intro") and cached.get("keywords"))
+        cached_hash = cached.get("body_hash") if has_intro else None
+
+        # The entry was written for exactly this body: nothing to do, whatever
+        # the diff says (re-runs, edits that were later undone).
+        if cached_hash == body_hash:
+            stats["files_skipped_cached"] += 1
+            if modified:
+                print(
+                    f"[PRE-FILTER] Skip (body unchanged since cached): {doc_path.name}"
+                )
             continue
 
-        yaml_end = get_yaml_end_line(full_doc_path)
-        clean_diff = strip_yaml_hunks_from_diff(diff, yaml_end)
-        if not clean_diff or not clean_diff.strip():
-            # YAML-only diff — only skip if cache is valid
-            cache_path = get_intro_cache_path(doc_path, cache_dir)
-            cached = load_intro_cache(cache_path)
-            if cached.get("intro") and cached.get("keywords"):
-                stats["files_skipped_yaml_only"] += 1
-                print(f"[PRE-FILTER] Skip (YAML-only diff, cached): {doc_path.name}")
-                continue
-            # No cache — queue for Tier 2
-            print(
-                f"[PRE-FILTER] YAML-only diff but missing cache → Tier 2: {doc_path.name}"
-            )
-            tier2_new_queue[doc_path] = _tier2_new_entry(full_doc_path, yaml_end)
+        # Another entry describes this body (rename, revert, copied document).
+        if _reuse_by_content(doc_path, cache_dir, body_hash, dry_run):
+            stats["files_reused_by_content"] += 1
             continue
 
-        cache_path = get_intro_cache_path(doc_path, cache_dir)
-        cached = load_intro_cache(cache_path)
+        if not modified:
+            if has_intro and cached_hash is None:
+                # Entry from before body hashes — trusted as before, and stamped
+                # so later changes to this body are noticed.
+                _stamp_body_hash(doc_path, cache_dir, cached, body_hash, dry_run)
+                stats["files_skipped_cached"] += 1
+            elif has_intro:
+                # Changed in an earlier commit of the push than HEAD~1..HEAD shows
+                print(
+                    f"[PRE-FILTER] Body changed since cached → Tier 2: {doc_path.name}"
+                )
+                stats["files_stale"] += 1
+                queue_tier2(doc_path, full_doc_path, yaml_end, body_hash, cached)
+            else:
+                queue_tier2(doc_path, full_doc_path, yaml_end, body_hash)
+            continue
 
-        if cached.get("intro") and cached.get("keywords"):
+        diff = _get_git_diff(str(doc_path), modified_diffs)
+        clean_diff = strip_yaml_hunks_from_diff(diff, yaml_end) if diff else None
+        if not clean_diff or not clean_diff.strip():
+            reason = "empty diff" if diff is None else "YAML-only diff"
+            if has_intro and cached_hash is None:
+                # Only skip if a valid cache already exists
+                _stamp_body_hash(doc_path, cache_dir, cached, body_hash, dry_run)
+                if diff is None:
+                    stats["files_skipped_no_diff"] += 1
+                else:
+                    stats["files_skipped_yaml_only"] += 1
+                print(f"[PRE-FILTER] Skip ({reason}, cached): {doc_path.name}")
+            elif has_intro:
+                # Nothing in HEAD~1..HEAD, yet the body differs from the cached one
+                print(
+                    f"[PRE-FILTER] {reason} but body changed since cached "
+                    f"→ Tier 2: {doc_path.name}"
+                )
+                stats["files_stale"] += 1
+                queue_tier2(doc_path, full_doc_path, yaml_end, body_hash, cached)
+            else:
+                # No cache either — queue for full Tier 2 analysis
+                print(
+                    f"[PRE-FILTER] {reason} but missing cache → Tier 2: {doc_path.name}"
+                )
+                queue_tier2(doc_path, full_doc_path, yaml_end, body_hash)
+            continue
+
+        if has_intro:
             # Existing intro/keywords → Tier 1 (incremental)
             tier1_queue[doc_path] = {
                 "clean_diff": clean_diff,
@@ -684,21 +1137,30 @@ def run(
                 "bump_level": bump_levels.get(str(doc_path), "unknown"),
                 "full_path": full_doc_path,
                 "yaml_end": yaml_end,
+                "cached": cached,
+                "body_hash": body_hash,
             }
         else:
             # No existing intro/keywords → straight to Tier 2
-            tier2_new_queue[doc_path] = _tier2_new_entry(full_doc_path, yaml_end)
+            queue_tier2(doc_path, full_doc_path, yaml_end, body_hash)
 
     print(
         f"\n[SCAN] {stats['files_skipped_cached']} cached-no-change, "
         f"{stats['files_skipped_no_diff']} empty diff, "
         f"{stats['files_skipped_yaml_only']} YAML-only, "
+        f"{stats['files_reused_by_content']} reused by content, "
         f"{stats['files_deleted']} deleted"
     )
     print(
         f"[SCAN] {len(tier1_queue)} → Tier 1, "
-        f"{len(tier2_new_queue)} → Tier 2 (new/unprocessed)"
+        f"{len(tier2_new_queue)} → Tier 2 (new/unprocessed, "
+        f"{stats['files_stale']} changed since cached)"
     )
+    if tier2_same_body:
+        print(
+            f"[SCAN] {len(tier2_same_body)} more file(s) share a body with a "
+            "Tier 2 file and will copy its result"
+        )
 
     # Testing-mode cap across both queues
     if testing:
@@ -713,6 +1175,28 @@ def run(
                 f"{len(tier1_queue)} Tier 1, {len(tier2_new_queue)} Tier 2"
             )
 
+    # Daily-quota plan: one request per Tier 1 file, roughly one per
+    # DEFAULT_MAX_FILES_PER_BATCH Tier 2 files (none in bulk mode: batch jobs
+    # have their own quota). New/uncached files are dropped first — they stay
+    # uncached and are picked up again by the next run.
+    if not dry_run and (tier1_queue or tier2_new_queue):
+        tier2_requests = (
+            0 if bulk else -(-len(tier2_new_queue) // DEFAULT_MAX_FILES_PER_BATCH)
+        )
+        needed = len(tier1_queue) + tier2_requests
+        budget = plan_daily_budget(needed, "intro generation")
+        if budget < needed:
+            tier1_queue = dict(list(tier1_queue.items())[:budget])
+            t2_files = max(0, budget - len(tier1_queue)) * DEFAULT_MAX_FILES_PER_BATCH
+            if bulk:
+                t2_files = len(tier2_new_queue)
+            deferred = len(tier2_new_queue) - min(t2_files, len(tier2_new_queue))
+            tier2_new_queue = dict(list(tier2_new_queue.items())[:t2_files])
+            print(
+                f"[QUOTA] Running {len(tier1_queue)} Tier 1 and "
+                f"{len(tier2_new_queue)} Tier 2 file(s); {deferred} new file(s) deferred"
+            )
+
     _t_api_start = time.perf_counter()
 
     # -----------------------------------------------------------------
@@ -725,93 +1209,84 @@ def run(
             print("\n[CACHE] Creating Tier 1 cache...")
             tier1_cache = create_gemini_cache(_TIER1_STATIC_PROMPT_PATH)
         # Tier 2 cache is created even without tier2_new_queue because escalations
-        # from Tier 1 may be added later.
-        if tier1_queue or tier2_new_queue:
+        # from Tier 1 may be added later. Bulk requests carry the prompt inline.
+        if not bulk and (tier1_queue or tier2_new_queue):
             print("[CACHE] Creating Tier 2 cache...")
             tier2_cache = create_gemini_cache(_TIER2_STATIC_PROMPT_PATH)
 
     try:
         # ---------------------------------------------------------------------
-        # Phase 2: Tier 1 calls
-        # ---------------------------------------------------------------------
-        tier2_escalated_queue: dict[Path, dict] = {}
-
-        if tier1_queue:
-            print(f"\n{'=' * 70}")
-            print(f"TIER 1: Processing {len(tier1_queue)} file(s) incrementally")
-            print(f"{'=' * 70}")
-
-            for doc_path, info in tier1_queue.items():
-                print(f"\n[TIER1] {doc_path.name}  (bump: {info['bump_level']})")
-
-                result = _call_tier1_single(
-                    model=model,
-                    cache=tier1_cache,
-                    keywords=info["keywords"],
-                    introduction=info["introduction"],
-                    meta=info["meta"],
-                    bump_level=info["bump_level"],
-                    clean_diff=info["clean_diff"],
-                    dry_run=dry_run,
-                )
-
-                if result is None:
-                    print("  → parse failure — escalating to Tier 2")
-                    stats["tier1_parse_failure"] += 1
-                    content = info["full_path"].read_text(encoding="utf-8")
-                    tier2_escalated_queue[doc_path] = {
-                        "content": strip_yaml_from_content(content, info["yaml_end"]),
-                        "prev_keywords": info["keywords"],
-                        "prev_introduction": info["introduction"],
-                    }
-                elif result["action"] == "no_change":
-                    print("  → no_change")
-                    stats["tier1_no_change"] += 1
-                elif result["action"] == "update":
-                    print("  → update")
-                    stats["tier1_update"] += 1
-                    save_intro_cache(
-                        get_intro_cache_path(doc_path, cache_dir),
-                        {
-                            "intro": result["introduction"],
-                            "keywords": result["keywords"],
-                        },
-                    )
-                elif result["action"] == "escalate":
-                    print("  → escalate → Tier 2")
-                    stats["tier1_escalate"] += 1
-                    content = info["full_path"].read_text(encoding="utf-8")
-                    tier2_escalated_queue[doc_path] = {
-                        "content": strip_yaml_from_content(content, info["yaml_end"]),
-                        "prev_keywords": info["keywords"],
-                        "prev_introduction": info["introduction"],
-                    }
-
-        # ---------------------------------------------------------------------
-        # Phase 3: Tier 2 — batch all queued files (new + escalated)
+        # Phase 2 + 3: Tier 1 calls run concurrently while a Tier 2 worker
+        # handles the new files and picks up escalations as they stream in
+        # (bulk: Tier 1 first, then all of Tier 2 in one batch-prediction job).
         # ---------------------------------------------------------------------
-        all_tier2: dict[Path, dict] = {}
-        all_tier2.update(tier2_new_queue)
-        all_tier2.update(tier2_escalated_queue)
-
+        escalations: queue.Queue = queue.Queue()
         stats["tier2_new"] = len(tier2_new_queue)
-        stats["tier2_escalated"] = len(tier2_escalated_queue)
 
-        if all_tier2:
-            print(f"\n{'=' * 70}")
+        if bulk:
+            # Tier 1 first; its escalations join the new files in one bulk job
+            if tier1_queue:
+                _run_tier1_all(
+                    model,
+                    tier1_cache,
+                    tier1_queue,
+                    escalations,
+                    cache_dir,
+                    dry_run,
+                    stats,
+                    tier1_concurrency or TIER1_CONCURRENCY,
+                )
+            tier2_bulk_queue = dict(tier2_new_queue)
+            while not escalations.empty():
+                doc_path, entry = escalations.get_nowait()
+                tier2_bulk_queue[doc_path] = entry
+            saved = _process_tier2_bulk(tier2_bulk_queue, cache_dir, dry_run)
+        else:
+            if tier1_queue or tier2_new_queue:
+                print(f"\n{'=' * 70}")
+                print(
+                    f"TIER 2: {len(tier2_new_queue)} new file(s); "
+                    "Tier 1 escalations join as they arrive"
+                )
+                print(f"{'=' * 70}")
+
+            with ThreadPoolExecutor(max_workers=1) as tier2_pool:
+                tier2_future = tier2_pool.submit(
+                    _run_tier2_stream,
+                    model,
+                    tier2_cache,
+                    tier2_new_queue,
+                    escalations,
+                    cache_dir,
+                    dry_run,
+                )
+                try:
+                    if tier1_queue:
+                        _run_tier1_all(
+                            model,
+                            tier1_cache,
+                            tier1_queue,
+                            escalations,
+                            cache_dir,
+                            dry_run,
+                            stats,
+                            tier1_concurrency or TIER1_CONCURRENCY,
+                        )
+                finally:
+                    escalations.put(_TIER1_DONE)
+                saved = tier2_future.result()
+
+        # Documents whose body matched a Tier 2 file copy its fresh entry
+        for doc_path, body_hash in tier2_same_body.items():
+            if _reuse_by_content(doc_path, cache_dir, body_hash, dry_run):
+                stats["files_reused_by_content"] += 1
+
+        tier2_total = stats["tier2_new"] + stats["tier2_escalated"]
+        if tier2_total:
             print(
-                f"TIER 2: {len(all_tier2)} file(s) "
-                f"({len(tier2_new_queue)} new, {len(tier2_escalated_queue)} escalated)"
+                f"[TIER2] Saved {saved}/{tier2_total} file(s) to cache "
+                f"({stats['tier2_new']} new, {stats['tier2_escalated']} escalated)"
             )
-            print(f"{'=' * 70}")
-            saved = _process_tier2_all(
-                model=model,
-                cache=tier2_cache,
-                tier2_queue=all_tier2,
-                cache_dir=cache_dir,
-                dry_run=dry_run,
-            )
-            print(f"[TIER2] Saved {saved}/{len(all_tier2)} file(s) to cache")
 
         _t_api_end = time.perf_counter()
     finally:
@@ -820,6 +1295,8 @@ def run(
         if tier2_cache is not None:
             delete_gemini_cache(tier2_cache)
 
+    intro_cache_store(cache_dir).compact()
+
     _t_total_end = time.perf_counter()
 
     stats["files_processed"] = (
@@ -840,6 +1317,7 @@ def run(
         f"  Pre-filter: {stats['files_skipped_cached']} cached, "
         f"{stats['files_skipped_no_diff']} empty diff, "
         f"{stats['files_skipped_yaml_only']} YAML-only, "
+        f"{stats['files_reused_by_content']} reused by content, "
         f"{stats['files_deleted']} deleted"
     )
     print(
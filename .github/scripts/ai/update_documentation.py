@@ -22,9 +22,16 @@ SCRIPTS_ROOT = SCRIPT_DIR.parent                      # .github/scripts
 sys.path.insert(0, str(SCRIPT_DIR))
 sys.path.insert(0, str(SCRIPTS_ROOT))
 
-from helpers.gemini_client import setup_gemini, rate_limit_state, RPD_LIMIT, TPM_SAFE  # noqa: E402
+from helpers.gemini_client import (  # noqa: E402
+    setup_gemini,
+    rate_limiter,
+    requests_used_today,
+    usage_ledger,
+    RPD_LIMIT,
+)
 from helpers.qmd_utils import print_mode_banners, find_qmd_files  # noqa: E402
-from helpers.file_updater import apply_all_updates, get_intro_cache_path  # noqa: E402
+from helpers.analysis_cache import DiffAnalysisCache  # noqa: E402
+from helpers.file_updater import apply_all_updates, intro_cache_store  # noqa: E402
 from tasks import generate_intros  # noqa: E402
 
 
@@ -50,10 +57,13 @@ def run_intros_task(
     dry_run: bool,
     testing: bool,
     bump_levels: dict | None = None,
+    tier1_concurrency: int | None = None,
+    bulk: bool = False,
 ) -> set:
     """Generate intros/keywords for the modified files and return the set of files
     that ended up with a cache entry. bump_levels is handed over in-memory from the
-    versioning task so it doesn't have to re-read versions.json."""
+    versioning task so it doesn't have to re-read versions.json; bulk sends Tier 2
+    through one batch-prediction job."""
     modified_files = []
     if modified_files_path and modified_files_path.exists():
         with modified_files_path.open() as f:
@@ -76,13 +86,15 @@ def run_intros_task(
         testing=testing,
         max_files_for_testing=3,
         bump_levels=bump_levels,
+        tier1_concurrency=tier1_concurrency,
+        bulk=bulk,
     )
 
     all_files = set()
+    intro_store = intro_cache_store(CACHE_DIR)
     for full_doc_path in find_qmd_files(INPUT_DIR, BLACKLISTED_DIRS):
         doc_path = full_doc_path.relative_to(ROOT_DIR)
-        cache_path = get_intro_cache_path(doc_path, CACHE_DIR)
-        if cache_path.exists():
+        if intro_store.has(doc_path):
             all_files.add(doc_path)
 
     return all_files
@@ -162,6 +174,25 @@ def main():
         action="store_true",
         help="Enable testing mode (process only first 3 files)",
     )
+    parser.add_argument(
+        "--tier1-concurrency",
+        type=int,
+        metavar="N",
+        help="Tier 1 intro calls in flight at once (default: TIER1_CONCURRENCY env or 8)",
+    )
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Send Tier 2 intro generation through one batch-prediction job instead "
+        "of interactive calls (for full backfills, e.g. after a prompt change); waits "
+        "for the job, and a re-run re-attaches to it",
+    )
+    parser.add_argument(
+        "--clear-analysis-cache",
+        action="store_true",
+        help="Drop cached version/changelog analyses (.llm_cache/diff_analysis.json) "
+        "so every diff is re-analysed, e.g. after a prompt change",
+    )
     parser.add_argument(
         "--skip-file-updates",
         action="store_true",
@@ -170,6 +201,12 @@ def main():
 
     args = parser.parse_args()
 
+    if args.clear_analysis_cache:
+        dropped = DiffAnalysisCache(CACHE_DIR / "diff_analysis.json").clear()
+        print(f"[CACHE] Cleared {dropped} cached diff analyses")
+        if not args.intros and not args.versions:
+            return
+
     if not args.intros and not args.versions:
         print("❌ Error: Must specify at least one of --intros or --versions")
         parser.print_help()
@@ -221,6 +258,8 @@ def main():
                 args.dry_run,
                 args.testing,
                 bump_levels=bump_levels if bump_levels else None,
+                tier1_concurrency=args.tier1_concurrency,
+                bulk=args.bulk,
             )
             files_needing_updates.update(intro_files)
             print(f"\n[INFO] Intro task cached results for {len(intro_files)} files")
@@ -246,12 +285,14 @@ def main():
         print("\n" + "=" * 70)
         print("📊 SESSION SUMMARY")
         print("=" * 70)
+        usage = rate_limiter.snapshot()
+        print(f"API requests this run: {usage['requests_total']:,}")
         print(
-            f"Total API requests: {rate_limit_state['requests_today']}/{RPD_LIMIT:,} daily limit"
-        )
-        print(
-            f"Total tokens: {rate_limit_state['tokens_minute']:,}/{TPM_SAFE:,} per-minute capacity"
+            f"Daily quota: {requests_used_today():,}/{RPD_LIMIT:,} requests used "
+            "today (all runs)"
         )
+        print(f"Total tokens: {usage['tokens_total']:,}")
+        usage_ledger.print_summary()
 
         _t_total_end = time.perf_counter()
         print(f"Total time: {_t_total_end - _t_total_start:.2f}s")
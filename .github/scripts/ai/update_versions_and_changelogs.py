@@ -42,16 +42,21 @@ from helpers.gemini_client import (
     count_tokens,
     get_encoding,
     create_smart_batches,
-    check_and_wait_for_rate_limits,
-    record_api_request,
-    rate_limit_state,
+    reserve_api_request,
+    plan_daily_budget,
+    rate_limiter,
+    usage_ledger,
     is_quota_error,
     extract_retry_delay,
     RPM_SAFE,
     TPM_SAFE,
     RPD_LIMIT,
+    MODEL_NAME,
 )
-from helpers.batch_utils import batch_with_retry
+from helpers.analysis_cache import DiffAnalysisCache, analysis_key, text_hash
+from helpers.batch_utils import run_batches_with_retry
+from helpers.diff_truncation import truncate_diff
+from helpers.git_diff import GitDiffProvider, tree_blobs
 from helpers.qmd_utils import (
     read_qmd_frontmatter,
     write_qmd_frontmatter,
@@ -59,10 +64,17 @@ from helpers.qmd_utils import (
 )
 from helpers.html_safe import sanitize_changelog_html
 from helpers.json_io import load_json_or_empty
+from helpers.structured_output import (
+    StructuredOutputError,
+    object_schema,
+    parse_structured,
+    string_schema,
+)
 
 # Configuration
 VERSIONS_FILE = ".llm_cache/versions.json"
 CHANGELOGS_FILE = ".llm_cache/change_logs.json"  # For inject_changelog.py compatibility
+ANALYSIS_CACHE_FILE = ".llm_cache/diff_analysis.json"  # Reused per-file AI analyses
 DOCS_DIR = "DOCS"
 
 # ⚠️ TESTING GUARDRAILS - Remove these for production! ⚠️
@@ -80,6 +92,13 @@ MAX_COMMITS_FOR_TESTING = 10
 MAX_TOKENS_PER_BATCH = 50_000 if TESTING_MODE else 600_000  # Primary constraint (input)
 MAX_FILES_PER_BATCH = 5 if TESTING_MODE else 15  # Secondary constraint (output safety)
 ABSOLUTE_MAX_TOKENS = 800_000  # Gemini context window limit (leave buffer)
+# Rough answer size per file (version decision + changelog, plus thinking) so a
+# batch's JSON answer stays inside MAX_OUTPUT_TOKENS when batches get wider.
+EST_OUTPUT_TOKENS_PER_FILE = 1_500
+# Batches analysed concurrently; all of them draw from the shared rate limiter.
+MAX_PARALLEL_BATCHES = int(os.getenv("MAX_PARALLEL_BATCHES", "4"))
+
+analysis_cache = DiffAnalysisCache(ANALYSIS_CACHE_FILE)
 
 
 # ═══════════════════════════════════════════════════════════════════════
@@ -242,12 +261,14 @@ def clean_diff_for_ai(diff):
 
 
 def truncate_large_diff(diff, filepath, max_tokens=ABSOLUTE_MAX_TOKENS):
-    """If diff is too large, truncate to fit within token limit"""
+    """If diff is too large, truncate to fit within token limit, keeping whole
+    hunks from the beginning and end (one tokenizer pass, see
+    helpers.diff_truncation)."""
     encoding = get_encoding()
     if not encoding:
         return diff
 
-    tokens = len(encoding.encode(diff))
+    tokens = count_tokens(diff)
 
     if tokens <= max_tokens:
         return diff
@@ -255,38 +276,7 @@ def truncate_large_diff(diff, filepath, max_tokens=ABSOLUTE_MAX_TOKENS):
     print(f"[WARNING] {filepath}: Diff too large ({tokens:,} tokens)")
     print(f"          Truncating to {max_tokens:,} tokens (keeping beginning + end)")
 
-    keep_tokens = max_tokens - 1000
-    half_tokens = keep_tokens // 2
-
-    lines = diff.splitlines(keepends=True)
-
-    beginning = []
-    beginning_tokens = 0
-    for line in lines:
-        line_tokens = len(encoding.encode(line))
-        if beginning_tokens + line_tokens > half_tokens:
-            break
-        beginning.append(line)
-        beginning_tokens += line_tokens
-
-    ending = []
-    ending_tokens = 0
-    for line in reversed(lines):
-        line_tokens = len(encoding.encode(line))
-        if ending_tokens + line_tokens > half_tokens:
-            break
-        ending.insert(0, line)
-        ending_tokens += line_tokens
-
-    skipped_lines = len(lines) - len(beginning) - len(ending)
-
-    truncated = "".join(
-        beginning
-    ) + f"\n\n... [{skipped_lines:,} lines omitted due to size - " f"file was extensively modified] ...\n\n" + "".join(
-        ending
-    )
-
-    return truncated
+    return truncate_diff(diff, max_tokens, encoding, hunk_aware=True)
 
 
 # ═══════════════════════════════════════════════════════════════════════
@@ -621,15 +611,20 @@ def extract_major_version(filename):
 # ═══════════════════════════════════════════════════════════════════════
 
 
-def get_combined_prompt(file_list):
-    """Return the comprehensive combined prompt for version + changelog"""
+def load_prompt_template():
+    """Return the raw version + changelog prompt template"""
     template_path = os.path.join(
         os.path.dirname(__file__),
         "prompt_templates",
         "update_versions_changelog_prompt.txt",
     )
     with open(template_path, "r") as f:
-        template = f.read()
+        return f.read()
+
+
+def get_combined_prompt(file_list):
+    """Return the comprehensive combined prompt for version + changelog"""
+    template = load_prompt_template()
 
     # Create numbered file list to help AI track completeness
     file_list_text = "\n".join([f"{i+1}. {f}" for i, f in enumerate(file_list)])
@@ -642,26 +637,70 @@ def get_combined_prompt(file_list):
     return prompt
 
 
+# The answer for one file (see the prompt's OUTPUT FORMAT); a batch answers
+# with one per file path.
+FILE_ANALYSIS_SCHEMA = object_schema(
+    {
+        "version": object_schema(
+            {
+                "bump": string_schema(["minor", "patch", "error"]),
+                "reason": string_schema(),
+                "confidence": string_schema(["high", "medium", "low", "none"]),
+            }
+        ),
+        "changelog": object_schema(
+            {
+                "format": string_schema(["paragraph", "bullet", "error"]),
+                "summary": string_schema(),
+            }
+        ),
+    }
+)
+
+
+def _is_cacheable(decision):
+    """False for an "error" answer: main() fails on those, and a cached one
+    would fail every later run without asking the API again"""
+    return (
+        decision.get("version", {}).get("bump") != "error"
+        and decision.get("changelog", {}).get("format") != "error"
+    )
+
+
+def batch_response_schema(file_list):
+    """Response schema for a batch: FILE_ANALYSIS_SCHEMA per file path. The paths
+    are optional, so batch_with_retry re-sends just the files an answer leaves out"""
+    return object_schema(
+        {filepath: FILE_ANALYSIS_SCHEMA for filepath in file_list}, required=[]
+    )
+
+
 def process_single_batch(batch_files, batch_num, total_batches):
     """Process one batch of files with Gemini AI"""
-    batch_input = "=== BATCH ANALYSIS (GIT DIFFS) ===\n\n"
+    parts = ["=== BATCH ANALYSIS (GIT DIFFS) ===\n\n"]
+    framing = []
 
     if TESTING_MODE:
         file_sizes = {}
 
+    # Count per diff (memoised by content hash, so the packer's counts are
+    # reused) plus the small framing, instead of re-tokenising the whole batch.
+    input_tokens = 0
     for filepath, diff in batch_files.items():
-        batch_input += f"### FILE: {filepath}\n"
-        batch_input += "=== GIT DIFF ===\n"
-        batch_input += f"{diff}\n\n"
-        batch_input += "---\n\n"
+        header = f"### FILE: {filepath}\n=== GIT DIFF ===\n"
+        parts += [header, f"{diff}\n\n", "---\n\n"]
+        framing.append(header)
+        diff_tokens = count_tokens(diff)
+        input_tokens += diff_tokens
 
         if TESTING_MODE:
             file_sizes[filepath] = {
                 "bytes": len(diff),
-                "tokens": count_tokens(diff),
+                "tokens": diff_tokens,
             }
 
-    input_tokens = count_tokens(batch_input)
+    batch_input = "".join(parts)
+    input_tokens += count_tokens(parts[0] + "".join(framing))
     batch_size_kb = len(batch_input) / 1024
 
     print(
@@ -719,20 +758,29 @@ def process_single_batch(batch_files, batch_num, total_batches):
             }
         return mock_results
 
-    check_and_wait_for_rate_limits(input_tokens)
-
     # Get prompt with explicit file list to prevent AI from "forgetting" files
     file_list = list(batch_files.keys())
     prompt = get_combined_prompt(file_list)
 
     full_prompt = prompt + "\n\n" + batch_input
+    prompt_tokens = input_tokens + count_tokens(prompt)
+    response_schema = batch_response_schema(file_list)
 
     def _do_call():
-        return call_gemini(None, full_prompt)
+        reservation = reserve_api_request(prompt_tokens)
+        return call_gemini(
+            None,
+            full_prompt,
+            reservation=reservation,
+            label="versions",
+            items=len(batch_files),
+            token_count=prompt_tokens,
+            response_schema=response_schema,
+        )
 
     try:
         try:
-            result_text = _do_call()
+            result = _do_call()
         except Exception as e:
             error_str = str(e)
             if is_quota_error(error_str):
@@ -740,21 +788,25 @@ def process_single_batch(batch_files, batch_num, total_batches):
                 sleep_secs = delay + 1 if delay > 0 else 60
                 print(f"[QUOTA] 429 — sleeping {sleep_secs:.0f}s then retrying once")
                 time.sleep(sleep_secs)
-                result_text = _do_call()
+                result = _do_call()
             else:
                 raise
-
-        record_api_request(input_tokens)
+        result_text = result.text
 
         if TESTING_MODE:
-            response_tokens = count_tokens(result_text)
-            print(
-                f"    Response: {response_tokens:,} tokens, {len(result_text):,} bytes"
-            )
+            usage = result.usage
+            if usage is not None:
+                print(
+                    f"    Usage: prompt {usage.prompt_tokens:,} tokens "
+                    f"(estimated {input_tokens:,}), output {usage.output_tokens:,}, "
+                    f"thinking {usage.thinking_tokens:,}"
+                )
+            print(f"    Response: {len(result_text):,} bytes")
+            usage = rate_limiter.snapshot()
             print(
-                f"    Rate limit status: {len(rate_limit_state['requests_minute'])}/{RPM_SAFE} req/min, "
-                f"{rate_limit_state['tokens_minute']:,}/{TPM_SAFE:,} tokens/min, "
-                f"{rate_limit_state['requests_today']}/{RPD_LIMIT} req/day"
+                f"    Rate limit status: {usage['requests_minute']}/{RPM_SAFE} req/min, "
+                f"{usage['tokens_minute']:,}/{TPM_SAFE:,} tokens/min, "
+                f"{usage['requests_today']}/{RPD_LIMIT} req/day"
             )
             print("\n" + "=" * 70)
             print("🔍 DEBUG: Raw LLM Response")
@@ -762,30 +814,9 @@ def process_single_batch(batch_files, batch_num, total_batches):
             print(result_text)
             print("=" * 70 + "\n")
 
-        # call_gemini already strips fences; parse JSON directly
-        results = json.loads(result_text)
-
-        # Validate we got results for ALL files in the batch
-        expected_files = set(batch_files.keys())
-        returned_files = set(results.keys())
-        missing_files = expected_files - returned_files
-
-        if missing_files:
-            print(
-                f"\n❌ ERROR: AI did not return results for all files in batch {batch_num}/{total_batches}"
-            )
-            print(f"    Expected: {len(expected_files)} files")
-            print(f"    Received: {len(returned_files)} files")
-            print("    Missing files:")
-            for filepath in missing_files:
-                print(f"      • {filepath}")
-            print(
-                "\n    This usually means the AI response was truncated or incomplete."
-            )
-            print("    Try reducing MAX_FILES_PER_BATCH or MAX_TOKENS_PER_BATCH.")
-            raise Exception(
-                f"Batch {batch_num}/{total_batches} incomplete: {len(missing_files)} files missing from AI response"
-            )
+        # Files left out of the answer are retried by batch_with_retry; a
+        # malformed entry (or truncated JSON) fails validation for the batch.
+        results = parse_structured(result_text, response_schema)
 
         if TESTING_MODE:
             print("🔍 DEBUG: Parsed JSON Results")
@@ -806,11 +837,11 @@ def process_single_batch(batch_files, batch_num, total_batches):
         )
         return results
 
-    except json.JSONDecodeError as e:
+    except StructuredOutputError as e:
         print(
-            f"\n❌ ERROR: Failed to parse JSON response in batch {batch_num}/{total_batches}"
+            f"\n❌ ERROR: Invalid or incomplete response in batch {batch_num}/{total_batches}"
         )
-        print(f"    JSON Error: {e}")
+        print(f"    {e}")
         print("\n" + "=" * 70)
         print("🔍 DEBUG: Problematic LLM Response")
         print("=" * 70)
@@ -824,34 +855,114 @@ def process_single_batch(batch_files, batch_num, total_batches):
         raise Exception(f"Batch {batch_num}/{total_batches} failed: {e}")
 
 
-def analyze_version_bumps_and_changelogs_batch(file_diffs):
+def get_analysis_cache_keys(filepaths, since_tag, renames):
+    """
+    Map each file to its diff-analysis cache key: the blobs at since_tag (the
+    old path for renames) and HEAD, the prompt template hash and the model.
+    Files with no blob at HEAD get no key; if git fails, no file does.
+    """
+    old_path = {r["new"]: r["old"] for r in renames}
+    old_blobs = tree_blobs(since_tag, [old_path.get(f, f) for f in filepaths])
+    new_blobs = tree_blobs("HEAD", filepaths)
+    if old_blobs is None or new_blobs is None:
+        return {}
+
+    prompt_hash = text_hash(load_prompt_template())
+    keys = {}
+    for filepath in filepaths:
+        if filepath in new_blobs:
+            keys[filepath] = analysis_key(
+                old_blobs.get(old_path.get(filepath, filepath)),
+                new_blobs[filepath],
+                prompt_hash,
+                MODEL_NAME,
+            )
+    return keys
+
+
+def analyze_version_bumps_and_changelogs_batch(file_diffs, cache_keys=None):
     """
     Analyze multiple files for version bump and changelog using smart batching.
     Requires Gemini API - fails if API unavailable (no fallback).
 
-    Uses helpers.batch_utils.batch_with_retry for partial-failure recovery
-    (recursive halving on incomplete batch responses).
+    Batches run on up to MAX_PARALLEL_BATCHES threads via
+    helpers.batch_utils.run_batches_with_retry, each keeping batch_with_retry's
+    partial-failure recovery (recursive halving on incomplete responses).
+    Results are merged in batch order.
+
+    cache_keys ({filepath: key}, see get_analysis_cache_keys) turns on the
+    diff-analysis cache: files with a stored analysis are not sent again, and
+    each finished batch is saved right away so a failed run keeps its progress.
     """
+    cache_keys = cache_keys or {}
+    cached_results = {}
+    for filepath in file_diffs:
+        key = cache_keys.get(filepath)
+        hit = analysis_cache.get(key) if key else None
+        if hit is not None:
+            cached_results[filepath] = hit
+
+    if cached_results:
+        print(
+            f"[CACHE] Reusing {len(cached_results)}/{len(file_diffs)} analyses "
+            f"from {ANALYSIS_CACHE_FILE}"
+        )
+        file_diffs = {
+            fp: diff for fp, diff in file_diffs.items() if fp not in cached_results
+        }
+        if not file_diffs:
+            print("\n✅ All analyses served from cache - no API calls needed")
+            return cached_results
+
     batches = create_smart_batches(
         file_diffs,
         max_tokens=MAX_TOKENS_PER_BATCH,
         max_files=MAX_FILES_PER_BATCH,
+        output_tokens_per_file=EST_OUTPUT_TOKENS_PER_FILE,
     )
     total_batches = len(batches)
 
     if total_batches > 1:
         print(f"\n📦 Split {len(file_diffs)} files into {total_batches} batches")
 
-    all_results = {}
-    for i, batch in enumerate(batches, 1):
-        def _process(sub_batch, _i=i):
-            return process_single_batch(sub_batch, _i, total_batches)
+    # Every changed file needs a decision, so a release that can't fit in
+    # today's remaining quota stops here — before spending any of it.
+    budget = total_batches if DRY_RUN else plan_daily_budget(
+        total_batches, "version analysis"
+    )
+    if budget < total_batches:
+        print("❌ ERROR: Not enough daily quota left to analyze this release.")
+        print("   Re-run after the quota resets (UTC midnight).")
+        sys.exit(1)
+
+    # The debug dumps of DRY_RUN / TESTING_MODE are per-batch blocks, so keep
+    # those runs sequential and readable.
+    workers = 1 if (DRY_RUN or TESTING_MODE) else MAX_PARALLEL_BATCHES
+    if total_batches > 1 and workers > 1:
+        print(f"⚡ Analysing up to {min(workers, total_batches)} batches in parallel")
+
+    def _process(sub_batch, num):
+        results = process_single_batch(sub_batch, num, total_batches)
+        if cache_keys and not DRY_RUN:  # never store the dry-run mocks
+            for filepath in sub_batch:
+                if (
+                    filepath in results
+                    and filepath in cache_keys
+                    and _is_cacheable(results[filepath])
+                ):
+                    analysis_cache.put(cache_keys[filepath], results[filepath])
+            analysis_cache.save()
+        return results
 
-        batch_results = batch_with_retry(batch, _process, max_retries=2)
-        all_results.update(batch_results)
+    all_results = run_batches_with_retry(
+        batches,
+        _process,
+        max_workers=workers,
+        max_retries=2,
+    )
 
     print(f"\n✅ All batches completed: {len(all_results)} files analyzed")
-    return all_results
+    return {**cached_results, **all_results}
 
 
 # ═══════════════════════════════════════════════════════════════════════
@@ -985,6 +1096,7 @@ def initialize_first_release(all_files):
 def main():
     """Main version and changelog update workflow"""
     global TESTING_MODE, DRY_RUN, SKIP_FILE_WRITES, MAX_TOKENS_PER_BATCH, MAX_FILES_PER_BATCH
+    global MAX_PARALLEL_BATCHES
 
     # Re-read env in case it was set after module import
     TESTING_MODE = os.getenv("TESTING_MODE", "false").lower() == "true"
@@ -992,6 +1104,7 @@ def main():
     SKIP_FILE_WRITES = os.getenv("SKIP_FILE_WRITES", "false").lower() == "true"
     MAX_TOKENS_PER_BATCH = 50_000 if TESTING_MODE else 600_000
     MAX_FILES_PER_BATCH = 5 if TESTING_MODE else 15
+    MAX_PARALLEL_BATCHES = int(os.getenv("MAX_PARALLEL_BATCHES", "4"))
 
     print_mode_banners(
         testing_mode=TESTING_MODE,
@@ -1048,6 +1161,13 @@ def main():
     # Paths keep their DOCS/ prefix throughout — no normalization anywhere.
     file_diffs = {}
     file_info = {}
+    # One git diff for all changed files; testing mode needs a per-file base
+    # (last N commits) so it keeps the per-file call.
+    batched_diffs = None
+    if last_tag and not TESTING_MODE:
+        batched_diffs = GitDiffProvider(
+            last_tag, "HEAD", paths=changed_files, renames=renames
+        )
 
     for filepath in changed_files:
         filename = os.path.basename(filepath)
@@ -1058,7 +1178,10 @@ def main():
             print(f"[ERROR] {filepath}: {e}")
             continue
 
-        diff = get_git_diff_for_file(filepath, last_tag)
+        if batched_diffs is not None:
+            diff = batched_diffs.get(filepath)
+        else:
+            diff = get_git_diff_for_file(filepath, last_tag)
 
         if diff is False:
             print(f"[SKIP] {filepath}: Git error, cannot analyze")
@@ -1082,8 +1205,14 @@ def main():
         print("\n✅ No valid files to process")
         return
 
+    # Testing mode diffs start at a per-file commit, not the tag, so the blob
+    # pair wouldn't describe them; those runs always go to the API.
+    cache_keys = {}
+    if last_tag and not TESTING_MODE:
+        cache_keys = get_analysis_cache_keys(list(file_diffs), last_tag, renames)
+
     print(f"\n📊 Analyzing {len(file_diffs)} files for version bumps & changelogs...")
-    bump_decisions = analyze_version_bumps_and_changelogs_batch(file_diffs)
+    bump_decisions = analyze_version_bumps_and_changelogs_batch(file_diffs, cache_keys)
 
     today = datetime.now().strftime("%Y-%m-%d")
     current_tag = last_tag or "initial"
@@ -1169,14 +1298,12 @@ def main():
     print("=" * 70)
 
     if not DRY_RUN:
+        usage = rate_limiter.snapshot()
         print("\n📊 API Usage Summary:")
-        print(
-            f"   Requests: {rate_limit_state['requests_today']} / {RPD_LIMIT} daily limit"
-        )
-        print(f"   Tokens: {rate_limit_state['tokens_minute']:,} in last minute")
-        print(
-            f"   Remaining today: {RPD_LIMIT - rate_limit_state['requests_today']} requests"
-        )
+        print(f"   Requests: {usage['requests_today']} / {RPD_LIMIT} daily limit")
+        print(f"   Tokens: {usage['tokens_minute']:,} in last minute")
+        print(f"   Remaining today: {RPD_LIMIT - usage['requests_today']} requests")
+        usage_ledger.print_summary()
         print("=" * 70)
 
 
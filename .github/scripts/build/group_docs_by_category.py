@@ -22,6 +22,7 @@ os.chdir(root_dir.resolve())
 
 sys.path.insert(0, str(script_dir.parent.resolve()))
 from helpers.categories import directory_for, non_browsable_names  # noqa: E402
+from helpers.media_index import MediaMd5Index  # noqa: E402
 
 # Non-browsable doc mapping file
 NON_BROWSABLE_MAP_PATH = Path(".github/non_browsable_doc_map.json")
@@ -99,8 +100,11 @@ def extract_category_from_qmd(file_path):
     return None
 
 
-def copy_media_and_rewrite(qmd_src, qmd_dst, src_stem, dst_stem):
-    """Copy {src_stem}-media next to qmd_dst as {dst_stem}-media and rewrite refs."""
+def copy_media_and_rewrite(qmd_src, qmd_dst, src_stem, dst_stem, md5_index=None):
+    """Copy {src_stem}-media next to qmd_dst as {dst_stem}-media and rewrite refs.
+
+    With md5_index, the copies are recorded under the originals' MD5s so the
+    image-description injector doesn't hash them again."""
     src_media = qmd_src.parent / f"{src_stem}-media"
     if not (src_media.exists() and src_media.is_dir()):
         return False
@@ -108,6 +112,10 @@ def copy_media_and_rewrite(qmd_src, qmd_dst, src_stem, dst_stem):
     if dst_media.exists():
         shutil.rmtree(dst_media)
     shutil.copytree(src_media, dst_media)
+    if md5_index is not None:
+        for src_file in src_media.rglob("*"):
+            if src_file.is_file():
+                md5_index.carry(src_file, dst_media / src_file.relative_to(src_media))
     if src_stem != dst_stem:
         try:
             with open(qmd_dst, "r", encoding="utf-8") as f:
@@ -154,6 +162,7 @@ def group_qmd_files_by_category(source_dir="origin_DOCS", target_dir="DOCS"):
         print("No .qmd files found in the current directory")
         return
 
+    md5_index = MediaMd5Index()
     for qmd_file in qmd_files:
         category = extract_category_from_qmd(qmd_file)
         rel_source = str(qmd_file.relative_to(source_path))
@@ -179,7 +188,9 @@ def group_qmd_files_by_category(source_dir="origin_DOCS", target_dir="DOCS"):
             shutil.copy2(qmd_file, target_file)
 
             path_mappings[str(target_file.relative_to(target_path))] = rel_source
-            copy_media_and_rewrite(qmd_file, target_file, qmd_file.stem, base)
+            copy_media_and_rewrite(
+                qmd_file, target_file, qmd_file.stem, base, md5_index
+            )
             non_browsable_count += 1
         else:
             target_directory = get_directory_for_category(category)
@@ -191,7 +202,7 @@ def group_qmd_files_by_category(source_dir="origin_DOCS", target_dir="DOCS"):
 
             path_mappings[str(target_file.relative_to(target_path))] = rel_source
             copy_media_and_rewrite(
-                qmd_file, target_file, qmd_file.stem, target_file.stem
+                qmd_file, target_file, qmd_file.stem, target_file.stem, md5_index
             )
             categorized_count += 1
 
@@ -202,6 +213,8 @@ def group_qmd_files_by_category(source_dir="origin_DOCS", target_dir="DOCS"):
                 f"\t[non-browsable] Created {new_non_browsable_assignments} new URL mappings"
             )
 
+    md5_index.save()
+
     mapping_file = target_path / "_meta" / ".temp_path_mapping.json"
     with open(mapping_file, "w", encoding="utf-8") as f:
         json.dump(path_mappings, f, indent=2)
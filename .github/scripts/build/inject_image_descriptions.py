@@ -2,9 +2,11 @@
 """Bake image descriptions into .qmd source before the render.
 
 This used to be a Lua filter that re-hashed every image once per output format.
-Now we hash and look up each image once, here, up front.
+Now we look up each image once, here, up front - through the shared MD5 index
+(helpers/media_index.py), so unchanged images cost a stat rather than a hash.
 
-Descriptions come from .llm_cache/images/<md5>.json (describe_images.py). We set
+Descriptions come from the .llm_cache/images manifest (describe_images.py, see
+helpers/image_store.py), read once rather than a JSON file per image. We set
 fig-alt on the image (becomes the html alt) and, for standalone images, add a
 content-visible gfm block so the text also reaches the .llms.md sidecars. Typst
 gets neither. Re-running is a no-op - images that already have fig-alt are left
@@ -12,13 +14,16 @@ alone.
 """
 
 import argparse
-import hashlib
-import json
 import re
 import sys
 import urllib.parse
 from pathlib import Path
 
+# build/ -> scripts/, for the shared helpers
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from helpers.image_store import image_description_store  # noqa: E402
+from helpers.media_index import MediaMd5Index, md5_of_file  # noqa: E402
+
 # ![caption](src "title"){attrs} - caption is DOTALL so captions that wrap
 # across lines still match.
 IMG_RE = re.compile(
@@ -34,24 +39,9 @@ IMG_RE = re.compile(
 FENCE_RE = re.compile(r"(^```.*?^```)", re.DOTALL | re.MULTILINE)
 
 
-def md5_of_file(path):
-    h = hashlib.md5()
-    with path.open("rb") as fh:
-        for chunk in iter(lambda: fh.read(65536), b""):
-            h.update(chunk)
-    return h.hexdigest()
-
-
 def load_description(cache_dir, md5):
-    p = cache_dir / f"{md5}.json"
-    if not p.exists():
-        return None
-    try:
-        data = json.loads(p.read_text())
-    except json.JSONDecodeError:
-        return None
-    desc = data.get("description") if isinstance(data, dict) else None
-    return desc or None
+    # Read-only: the build never appends to the committed manifest.
+    return image_description_store(cache_dir, read_only=True).description(md5)
 
 
 def resolve_image_path(src, qmd_path):
@@ -81,7 +71,19 @@ def is_block_level(text, start, end):
     return text[line_start:start].strip() == "" and after.strip() == ""
 
 
-def _annotate_segment(text, qmd_path, cache_dir, stats):
+def referenced_images(text, qmd_path):
+    """Local image files process_text() would look up, in order."""
+    parts = FENCE_RE.split(text)
+    for i in range(0, len(parts), 2):
+        for m in IMG_RE.finditer(parts[i]):
+            if "fig-alt" in (m.group("attr") or ""):
+                continue
+            path = resolve_image_path(m.group("src"), qmd_path)
+            if path is not None:
+                yield path
+
+
+def _annotate_segment(text, qmd_path, cache_dir, stats, md5_index=None):
     out = []
     pos = 0
     for m in IMG_RE.finditer(text):
@@ -100,7 +102,8 @@ def _annotate_segment(text, qmd_path, cache_dir, stats):
             out.append(whole)
             continue
 
-        desc = load_description(cache_dir, md5_of_file(path))
+        md5 = md5_index.md5(path) if md5_index else md5_of_file(path)
+        desc = load_description(cache_dir, md5)
         if not desc:
             stats["nodesc"] += 1
             out.append(whole)
@@ -124,11 +127,11 @@ def _annotate_segment(text, qmd_path, cache_dir, stats):
     return "".join(out)
 
 
-def process_text(text, qmd_path, cache_dir, stats):
+def process_text(text, qmd_path, cache_dir, stats, md5_index=None):
     # Annotate only the bits outside code fences (the even-index split parts).
     parts = FENCE_RE.split(text)
     for i in range(0, len(parts), 2):
-        parts[i] = _annotate_segment(parts[i], qmd_path, cache_dir, stats)
+        parts[i] = _annotate_segment(parts[i], qmd_path, cache_dir, stats, md5_index)
     return "".join(parts)
 
 
@@ -156,19 +159,31 @@ def main():
         )
         return
 
+    texts = {qmd: qmd.read_text(encoding="utf-8") for qmd in sorted(docs.rglob("*.qmd"))}
+
+    # Resolve every referenced image's MD5 up front: the build copies keep the
+    # originals' stat, so most come from the index and the rest hash in
+    # parallel. The rewrite pass below only does lookups.
+    md5_index = MediaMd5Index()
+    md5_index.md5_many(
+        path for qmd, text in texts.items() for path in referenced_images(text, qmd)
+    )
+    indexed, hashed = md5_index.hits, md5_index.misses
+
     stats = {"files": 0, "changed": 0, "injected": 0, "nodesc": 0}
-    for qmd in sorted(docs.rglob("*.qmd")):
+    for qmd, text in texts.items():
         stats["files"] += 1
-        text = qmd.read_text(encoding="utf-8")
-        new = process_text(text, qmd, cache_dir, stats)
+        new = process_text(text, qmd, cache_dir, stats, md5_index)
         if new != text:
             qmd.write_text(new, encoding="utf-8")
             stats["changed"] += 1
+    md5_index.save()
 
     print(
         f"[inject_image_descriptions] {stats['files']} qmd files, "
         f"{stats['changed']} modified, {stats['injected']} images annotated, "
-        f"{stats['nodesc']} without a cached description"
+        f"{stats['nodesc']} without a cached description "
+        f"({indexed} image MD5s from the index, {hashed} hashed)"
     )
 
 
@@ -0,0 +1,140 @@
+"""Persistent cache of per-file version/changelog analyses.
+
+A re-triggered release run (after a failure, or on a test-* branch) sees the
+same diffs again. Each analysis is stored under a key of (old blob SHA, new
+blob SHA, prompt template hash, model name): the blob pair pins the diff, so a
+hit means the same input would go to the same prompt on the same model, and
+the stored result is reused instead of calling Gemini. Editing the prompt
+template changes its hash, which misses every old entry; clear() (the
+--clear-analysis-cache option) drops them all explicitly.
+
+Stored as JSON in .llm_cache/diff_analysis.json, which is committed with the
+rest of .llm_cache/, so only the MAX_ENTRIES most recently used are kept."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+MAX_ENTRIES = 2_000
+# Blob id used for a side that doesn't exist (new file / first analysis).
+NULL_BLOB = "0" * 40
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def analysis_key(old_blob: str, new_blob: str, prompt_hash: str, model: str) -> str:
+    return f"{old_blob or NULL_BLOB}..{new_blob or NULL_BLOB}:{prompt_hash}:{model}"
+
+
+class DiffAnalysisCache:
+    """Thread-safe {analysis_key: result} backed by a JSON file, read on first
+    use. put() only marks the cache dirty; call save() to write it."""
+
+    def __init__(self, path: "Path | str", max_entries: int = MAX_ENTRIES) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # Held from snapshot to os.replace, so an older snapshot written by a
+        # slower thread can never replace a newer one.
+        self._save_lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self._loaded = False
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> None:
+        """Read the file once (caller holds the lock)."""
+        self._loaded = True
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] Could not load diff analysis cache: {e}")
+            return
+        if not isinstance(data, dict):
+            return
+        for key, result in (data.get("entries") or {}).items():
+            if isinstance(result, dict):
+                self._entries[key] = result
+
+    def get(self, key: str) -> "dict | None":
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            # Recency is saved with the next write; a hit alone doesn't
+            # rewrite the committed file.
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: str, result: dict) -> None:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def __len__(self) -> int:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            return len(self._entries)
+
+    def save(self) -> None:
+        """Write the entries back if anything changed (atomic replace). Safe to
+        call from several threads: saves are serialised, so the file always
+        ends up with the newest snapshot."""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                # Oldest first, so reloading keeps the LRU order.
+                data = {"entries": dict(self._entries)}
+                self._dirty = False
+            tmp = None
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(
+                    dir=self.path.parent, prefix=".analysis-", suffix=".tmp"
+                )
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=1, ensure_ascii=False)
+                os.replace(tmp, self.path)
+            except OSError as e:
+                print(f"[WARNING] Could not save diff analysis cache: {e}")
+                if tmp and os.path.exists(tmp):
+                    os.unlink(tmp)
+                with self._lock:
+                    self._dirty = True  # try again on the next save()
+
+    def clear(self) -> int:
+        """Drop every entry and delete the file. Returns how many were dropped."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            dropped = len(self._entries)
+            self._entries.clear()
+            self._dirty = False
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+            return dropped
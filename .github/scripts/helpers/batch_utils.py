@@ -1,4 +1,7 @@
-"""Batching helpers for the AI scripts: retry-by-splitting and a testing-mode cap."""
+"""Batching helpers for the AI scripts: retry-by-splitting, parallel batch
+execution and a testing-mode cap."""
+
+from concurrent.futures import ThreadPoolExecutor
 
 from helpers.gemini_client import count_tokens
 
@@ -37,6 +40,45 @@ def batch_with_retry(batch_dict: dict, process_fn, max_retries: int = 2) -> dict
     return partial_results
 
 
+def run_batches_with_retry(
+    batches: list, process_fn, max_workers: int = 1, max_retries: int = 2
+) -> dict:
+    """Run batch_with_retry over every batch on up to max_workers threads and
+    merge the results in batch order, so the outcome doesn't depend on which
+    call finished first. process_fn(sub_batch, batch_num) gets the 1-based
+    number of the batch a sub-batch came from; splits of one batch stay on its
+    worker. The first failing batch (in batch order) re-raises once the batches
+    already in flight finish; batches not yet started are cancelled. Callers
+    reserve rate-limit capacity inside process_fn, so the pool only bounds how
+    many requests can be waiting on the network at once."""
+    if max_workers <= 1 or len(batches) <= 1:
+        results = {}
+        for num, batch in enumerate(batches, 1):
+            results.update(
+                batch_with_retry(batch, lambda b, _n=num: process_fn(b, _n), max_retries)
+            )
+        return results
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(
+                batch_with_retry,
+                batch,
+                lambda b, _n=num: process_fn(b, _n),
+                max_retries,
+            )
+            for num, batch in enumerate(batches, 1)
+        ]
+        results = {}
+        try:
+            for future in futures:
+                results.update(future.result())
+        except BaseException:
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+    return results
+
+
 def apply_testing_cap(
     files_dict: dict,
     max_files: int,
@@ -0,0 +1,83 @@
+"""Best-fit-decreasing packing of sized items into request batches.
+
+Every Gemini batch repeats the prompt template, so the number of batches is
+what costs requests and overhead tokens. The packer places items largest
+first into the open batch they fill most tightly (best fit) instead of closing
+a batch on the first overflow, which lands within a few percent of the lower
+bound on real DOCS size distributions. Pure Python, no tokenizer — callers
+pass sizes in."""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+
+
+@dataclass
+class PackResult:
+    """bins holds item indices per batch (largest first inside each batch)."""
+
+    bins: list = field(default_factory=list)
+    total_tokens: int = 0
+    capacity: int = 0
+    lower_bound: int = 0
+
+    @property
+    def efficiency(self) -> float:
+        """How full the batches are on average: item tokens / batch capacity."""
+        if not self.bins or self.capacity <= 0:
+            return 1.0
+        return min(1.0, self.total_tokens / (len(self.bins) * self.capacity))
+
+    def describe(self) -> str:
+        return (
+            f"{len(self.bins)} batch(es), lower bound {self.lower_bound}, "
+            f"{self.efficiency:.0%} full"
+        )
+
+
+def pack_best_fit_decreasing(
+    sizes: list,
+    capacity: int,
+    max_items: int,
+    output_sizes: list | None = None,
+    max_output: int | None = None,
+) -> PackResult:
+    """Pack items with the given token sizes into as few bins as the heuristic
+    finds, each holding at most capacity tokens, max_items items and (when
+    max_output is set) max_output estimated output tokens. An item bigger than
+    a whole bin gets a bin to itself rather than failing. Ties keep input
+    order, so the result is deterministic."""
+    n = len(sizes)
+    result = PackResult(total_tokens=sum(sizes), capacity=capacity)
+    if n == 0:
+        return result
+
+    outputs = output_sizes if output_sizes is not None else [0] * n
+    out_cap = max_output if max_output is not None else math.inf
+
+    # Open bins as [free_tokens, free_output, item_indices].
+    open_bins: list = []
+    for idx in sorted(range(n), key=lambda i: (-sizes[i], i)):
+        size, out = sizes[idx], outputs[idx]
+        best = None
+        for b in open_bins:
+            if len(b[2]) >= max_items or size > b[0] or out > b[1]:
+                continue
+            if best is None or b[0] < best[0]:
+                best = b
+        if best is None:
+            best = [capacity, out_cap, []]
+            open_bins.append(best)
+        best[0] -= size
+        best[1] -= out
+        best[2].append(idx)
+
+    result.bins = [b[2] for b in open_bins]
+    result.lower_bound = max(
+        math.ceil(result.total_tokens / capacity) if capacity > 0 else n,
+        math.ceil(n / max_items),
+        math.ceil(sum(outputs) / out_cap) if out_cap not in (0, math.inf) else 1,
+        1,
+    )
+    return result
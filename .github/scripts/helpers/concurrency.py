@@ -0,0 +1,188 @@
+"""Adaptive (AIMD) concurrency for async API workers, plus a throughput meter.
+
+A fixed semaphore is either too cautious while Gemini is fast or too eager
+once it starts answering 429/503. AimdController sizes the number of calls in
+flight the way TCP sizes its window: each healthy completion adds
+increase/limit (about +1 per limit's worth of calls), and an overload
+multiplies the limit by decrease. Overloads within one cooldown (about one
+call latency) count once, so a burst of 429s from the same wave halves the
+limit once, not per call.
+
+"Healthy" means the call succeeded, the latency EWMA is within
+latency_tolerance x the lowest latency seen recently, and the error EWMA is
+below error_threshold. Other errors don't shrink the limit but stop it from
+growing. The rate limiter (helpers.rate_limiter) still enforces RPM/TPM;
+this only decides how many requests wait on the service at once."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Callable, Optional
+
+EWMA_ALPHA = 0.2  # weight of the newest latency / error sample
+# The latency floor relaxes 1% per sample, so one lucky call doesn't pin it.
+FLOOR_DRIFT = 1.01
+
+
+class AimdController:
+    """Async slot limiter whose limit moves between min_limit and max_limit.
+
+    Use ``async with controller.slot(): await call()`` around each API call.
+    An exception leaving the block is an overload when is_overload(exc) says
+    so, and a plain error otherwise."""
+
+    def __init__(
+        self,
+        initial: int = 5,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_tolerance: float = 2.0,
+        error_threshold: float = 0.2,
+        is_overload: Optional[Callable[[BaseException], bool]] = None,
+        on_change: Optional[Callable[[int, int, str], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.error_threshold = error_threshold
+        self.is_overload = is_overload or (lambda exc: False)
+        self.on_change = on_change
+        self.clock = clock
+        self.in_flight = 0
+        self.successes = 0
+        self.overloads = 0
+        self.errors = 0
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self._latency_floor: Optional[float] = None
+        self._last_decrease = float("-inf")
+        self._waiters: deque = deque()
+
+    @property
+    def current_limit(self) -> int:
+        return int(self.limit)
+
+    async def acquire(self) -> None:
+        while self.in_flight >= self.current_limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done():
+                    self._wake()  # pass the wake-up on
+                else:
+                    self._waiters.remove(waiter)
+                raise
+        self.in_flight += 1
+
+    def release(self, outcome: str, latency: float = 0.0) -> None:
+        """Free a slot and adapt; outcome is "ok", "overload", "error" or
+        "cancelled" (no signal)."""
+        self.in_flight -= 1
+        self._adapt(outcome, latency)
+        self._wake()
+
+    def _wake(self) -> None:
+        free = self.current_limit - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def _set_limit(self, limit: float, reason: str) -> None:
+        old = self.current_limit
+        self.limit = min(max(limit, self.min_limit), self.max_limit)
+        if self.on_change and self.current_limit != old:
+            self.on_change(old, self.current_limit, reason)
+
+    def _adapt(self, outcome: str, latency: float) -> None:
+        if outcome == "cancelled":
+            return
+        failed = outcome != "ok"
+        self.error_ewma += EWMA_ALPHA * (float(failed) - self.error_ewma)
+
+        if outcome == "overload":
+            self.overloads += 1
+            now = self.clock()
+            cooldown = max(1.0, self.latency_ewma or 0.0)
+            if now - self._last_decrease >= cooldown:
+                self._last_decrease = now
+                self._set_limit(self.limit * self.decrease, "overload")
+            return
+        if outcome == "error":
+            self.errors += 1
+            return
+
+        self.successes += 1
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma += EWMA_ALPHA * (latency - self.latency_ewma)
+        if self._latency_floor is None:
+            self._latency_floor = latency
+        else:
+            self._latency_floor = min(self._latency_floor * FLOOR_DRIFT, latency)
+
+        floor = max(self._latency_floor, 1e-3)
+        latency_ok = self.latency_ewma <= self.latency_tolerance * floor
+        if latency_ok and self.error_ewma < self.error_threshold:
+            self._set_limit(self.limit + self.increase / self.limit, "healthy")
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one slot around an API call and feed its outcome back."""
+        await self.acquire()
+        start = self.clock()
+        try:
+            yield
+        except asyncio.CancelledError:
+            self.release("cancelled")
+            raise
+        except BaseException as exc:
+            overload = isinstance(exc, Exception) and self.is_overload(exc)
+            self.release("overload" if overload else "error")
+            raise
+        self.release("ok", self.clock() - start)
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": self.current_limit,
+            "in_flight": self.in_flight,
+            "successes": self.successes,
+            "overloads": self.overloads,
+            "errors": self.errors,
+            "latency_ewma": self.latency_ewma,
+        }
+
+
+class ThroughputMeter:
+    """Completions per minute over a sliding window."""
+
+    def __init__(self, window: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.clock = clock
+        self._start = clock()
+        self._ticks: deque = deque()
+        self.total = 0
+
+    def tick(self) -> None:
+        self._ticks.append(self.clock())
+        self.total += 1
+
+    def per_minute(self) -> float:
+        now = self.clock()
+        while self._ticks and now - self._ticks[0] > self.window:
+            self._ticks.popleft()
+        elapsed = min(self.window, max(now - self._start, 1.0))
+        return len(self._ticks) * 60.0 / elapsed
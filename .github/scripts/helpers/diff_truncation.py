@@ -0,0 +1,160 @@
+"""Token-budget truncation of large diffs from a single tokenizer pass.
+
+The diff is encoded once; the token offsets (decode_with_offsets) give how many
+tokens precede every line, so the head and tail cut points are found by
+binary search over that prefix sum instead of re-encoding line by line.
+Two modes:
+
+  lines  — keep the first and last lines that fit in half the budget each;
+  hunks  — keep file headers always, and whole hunks from the start and the
+           end; falls back to lines when whole hunks can't use the budget
+           (e.g. one giant hunk).
+
+enc is a tiktoken Encoding; anything with encode() works, and without
+decode_with_offsets the per-line counts are summed instead (still one encode
+per line, never two)."""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+
+# Room kept free for the omission marker and rounding at the cut points.
+MARKER_RESERVE_TOKENS = 1_000
+
+_HUNK_START = "@@"
+_FILE_START = "diff --git "
+
+
+def line_token_prefix(text: str, enc) -> tuple[list, list]:
+    """(lines, prefix) where prefix[i] is the number of tokens before lines[i]
+    and prefix[-1] the total. A token spanning a line break counts for the
+    line it starts in."""
+    lines = text.splitlines(keepends=True)
+    starts = []
+    pos = 0
+    for line in lines:
+        starts.append(pos)
+        pos += len(line)
+
+    decode_with_offsets = getattr(enc, "decode_with_offsets", None)
+    if decode_with_offsets is not None:
+        tokens = enc.encode(text, disallowed_special=())
+        _, offsets = decode_with_offsets(tokens)
+        prefix = [bisect_left(offsets, start) for start in starts]
+        prefix.append(len(tokens))
+        return lines, prefix
+
+    prefix = [0]
+    for line in lines:
+        prefix.append(prefix[-1] + len(enc.encode(line)))
+    return lines, prefix
+
+
+def _omission_marker(skipped_lines: int) -> str:
+    return (
+        f"\n\n... [{skipped_lines:,} lines omitted due to size - "
+        "file was extensively modified] ...\n\n"
+    )
+
+
+def _truncate_lines(lines: list, prefix: list, keep_tokens: int) -> str:
+    half = keep_tokens // 2
+    total = prefix[-1]
+    # head: lines[:head] with prefix[head] <= half
+    head = bisect_right(prefix, half) - 1
+    # tail: lines[tail:] with total - prefix[tail] <= half
+    tail = max(head, bisect_left(prefix, total - half, lo=head))
+    tail = min(tail, len(lines))
+    skipped = tail - head
+    if skipped <= 0:
+        return "".join(lines)
+    return "".join(lines[:head]) + _omission_marker(skipped) + "".join(lines[tail:])
+
+
+def _diff_units(lines: list) -> list:
+    """Split diff lines into (kind, start, end) units: "header" for a file header
+    (diff --git … up to its first @@), "hunk" for each hunk."""
+    if not lines:
+        return []
+    kind = "hunk" if lines[0].startswith(_HUNK_START) else "header"
+    start = 0
+    units = []
+    for i in range(1, len(lines)):
+        if lines[i].startswith(_FILE_START):
+            next_kind = "header"
+        elif lines[i].startswith(_HUNK_START):
+            next_kind = "hunk"
+        else:
+            continue
+        units.append((kind, start, i))
+        kind, start = next_kind, i
+    units.append((kind, start, len(lines)))
+    return units
+
+
+def _truncate_hunks(lines: list, prefix: list, keep_tokens: int) -> str | None:
+    """Whole-hunk truncation, or None when whole hunks would fill less than a
+    quarter of the budget."""
+    units = _diff_units(lines)
+    cost = [prefix[end] - prefix[start] for _, start, end in units]
+    header_cost = sum(c for (kind, _, _), c in zip(units, cost) if kind == "header")
+    budget = keep_tokens - header_cost
+    if budget <= 0:
+        return None
+
+    hunks = [i for i, (kind, _, _) in enumerate(units) if kind == "hunk"]
+    keep = set()
+    half = budget // 2
+    used = 0
+    for i in hunks:  # from the start
+        if used + cost[i] > half:
+            break
+        keep.add(i)
+        used += cost[i]
+    used_tail = 0
+    for i in reversed(hunks):  # from the end, with whatever the head left
+        if i in keep or used + used_tail + cost[i] > budget:
+            break
+        keep.add(i)
+        used_tail += cost[i]
+    if used + used_tail < budget // 4:
+        return None  # mostly one giant hunk — lines keep far more context
+
+    out = []
+    skipped_lines = 0
+    skipped_hunks = 0
+    for i, (kind, start, end) in enumerate(units):
+        if kind == "header" or i in keep:
+            if skipped_hunks:
+                out.append(_hunks_marker(skipped_hunks, skipped_lines))
+                skipped_hunks = skipped_lines = 0
+            out.extend(lines[start:end])
+        else:
+            skipped_hunks += 1
+            skipped_lines += end - start
+    if skipped_hunks:
+        out.append(_hunks_marker(skipped_hunks, skipped_lines))
+    return "".join(out)
+
+
+def _hunks_marker(hunks: int, lines: int) -> str:
+    return (
+        f"\n... [{hunks:,} hunk(s), {lines:,} lines omitted due to size - "
+        "file was extensively modified] ...\n\n"
+    )
+
+
+def truncate_diff(diff: str, max_tokens: int, enc, hunk_aware: bool = False) -> str:
+    """diff cut down to about max_tokens (MARKER_RESERVE_TOKENS are left for the
+    omission marker), keeping its beginning and end. Returned unchanged when it
+    already fits."""
+    lines, prefix = line_token_prefix(diff, enc)
+    if prefix[-1] <= max_tokens:
+        return diff
+    keep_tokens = max(0, max_tokens - MARKER_RESERVE_TOKENS)
+    if hunk_aware:
+        truncated = _truncate_hunks(lines, prefix, keep_tokens)
+        if truncated is not None:
+            return truncated
+    return _truncate_lines(lines, prefix, keep_tokens)
+
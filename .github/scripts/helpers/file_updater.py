@@ -4,10 +4,13 @@ in a single write per file."""
 from __future__ import annotations
 
 from pathlib import Path
+import hashlib
 import json
+import threading
 
 from .qmd_utils import read_qmd_frontmatter, write_qmd_frontmatter
 from .json_io import load_json_or_empty
+from .jsonl_store import JsonlStore
 
 
 def get_intro_cache_path(qmd_path: Path, cache_dir: Path) -> Path:
@@ -27,6 +30,112 @@ def save_intro_cache(cache_path: Path, data: dict) -> None:
         json.dump(data, f, indent=2)
 
 
+def intro_body_hash(body: str) -> str:
+    """SHA-256 of a document's YAML-stripped body, stored as "body_hash" in its
+    intro cache entry. Leading/trailing whitespace doesn't count."""
+    return hashlib.sha256(body.strip().encode("utf-8")).hexdigest()
+
+
+INTRO_STORE_FILE = "intros.jsonl"
+
+
+def intro_store_key(qmd_path: Path) -> str:
+    """Store key of a repo-relative .qmd path (posix separators, e.g. DOCS/a/b.qmd)."""
+    return "/".join(Path(qmd_path).parts)
+
+
+class IntroCacheStore:
+    """All intro/keywords entries of cache_dir in one append-only JSONL file
+    (INTRO_STORE_FILE, see helpers.jsonl_store), read once per process.
+
+    get/put have the semantics of load_intro_cache/save_intro_cache, keyed by
+    the .qmd path instead of its cache file. Entries still in the per-file
+    layout (get_intro_cache_path) are read as a fallback until migrated with
+    ai/migrate_intro_cache.py. lookup_content() finds an entry by
+    (body_hash, prompt_version) — including entries overwritten since the
+    last compaction — so a renamed, reverted or copied document can reuse it."""
+
+    def __init__(self, cache_dir: Path) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.store = JsonlStore(self.cache_dir / INTRO_STORE_FILE, label="intro cache")
+        self._lock = threading.Lock()
+        self._content: dict | None = None
+        self._legacy_files: bool | None = None
+
+    def _legacy_path(self, qmd_path: Path) -> Path | None:
+        """The per-file cache path of qmd_path if it exists. One directory scan
+        decides whether any per-file entries are left at all."""
+        if self._legacy_files is None:
+            self._legacy_files = any(self.cache_dir.glob("*.qmd.json"))
+        if not self._legacy_files:
+            return None
+        legacy = get_intro_cache_path(Path(qmd_path), self.cache_dir)
+        return legacy if legacy.exists() else None
+
+    def get(self, qmd_path: Path) -> dict:
+        data = self.store.get(intro_store_key(qmd_path))
+        if data is not None:
+            return data
+        legacy = self._legacy_path(qmd_path)
+        return load_intro_cache(legacy) if legacy else {}
+
+    def has(self, qmd_path: Path) -> bool:
+        return (
+            intro_store_key(qmd_path) in self.store
+            or self._legacy_path(qmd_path) is not None
+        )
+
+    def put(self, qmd_path: Path, data: dict) -> None:
+        self.store.put(intro_store_key(qmd_path), data)
+        with self._lock:
+            if self._content is not None:
+                self._index(self._content, data)
+
+    def delete(self, qmd_path: Path) -> bool:
+        """Drop the entry (and any per-file leftover). Returns whether one existed."""
+        existed = self.has(qmd_path)
+        self.store.delete(intro_store_key(qmd_path))
+        legacy = self._legacy_path(qmd_path)
+        if legacy:
+            legacy.unlink()
+        return existed
+
+    @staticmethod
+    def _index(content: dict, data: dict) -> None:
+        if data.get("intro") and data.get("keywords"):
+            key = (data.get("body_hash"), data.get("prompt_version"))
+            if all(key):
+                content[key] = data
+
+    def lookup_content(self, body_hash: str, prompt_version: str) -> dict | None:
+        with self._lock:
+            if self._content is None:
+                content: dict = {}
+                for cache_path in sorted(self.cache_dir.glob("*.qmd.json")):
+                    self._index(content, load_intro_cache(cache_path))
+                for data in self.store.superseded():
+                    self._index(content, data)
+                for _, data in self.store.items():
+                    self._index(content, data)
+                self._content = content
+            return self._content.get((body_hash, prompt_version))
+
+    def compact(self) -> None:
+        if self.store.compact():
+            print(f"[CACHE] Compacted {self.store.path.name} ({len(self.store)} entries)")
+
+
+_intro_stores: dict = {}
+
+
+def intro_cache_store(cache_dir: Path) -> IntroCacheStore:
+    """The process-wide IntroCacheStore for cache_dir."""
+    key = Path(cache_dir).resolve()
+    if key not in _intro_stores:
+        _intro_stores[key] = IntroCacheStore(key)
+    return _intro_stores[key]
+
+
 def load_versions_metadata(cache_dir: Path) -> dict:
     """Load version metadata from cache."""
     return load_json_or_empty(cache_dir / "versions.json", label="version metadata")
@@ -56,6 +165,7 @@ def apply_all_updates(
         print("[DRY RUN] Showing updates but NOT modifying files\n")
 
     versions_metadata = load_versions_metadata(cache_dir) if apply_versions else {}
+    intro_store = intro_cache_store(cache_dir)
 
     stats = {
         "files_updated": 0,
@@ -85,9 +195,8 @@ def apply_all_updates(
             updates_desc = []
 
             # 1. Apply intro/keywords if available
-            intro_cache_path = get_intro_cache_path(lookup_path, cache_dir)
-            if intro_cache_path.exists():
-                intro_data = load_intro_cache(intro_cache_path)
+            intro_data = intro_store.get(lookup_path)
+            if intro_data:
                 if intro_data.get("intro"):
                     yaml_data["description"] = (
                         intro_data["intro"].replace("\n", " ").strip()
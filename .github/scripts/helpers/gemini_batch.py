@@ -0,0 +1,117 @@
+"""Batch-prediction backends behind gemini_client's bulk mode.
+
+A bulk job is a JSONL file with one {"key", "request"} line per request, the
+request being a GenerateContentRequest in REST JSON form. A backend submits
+the file, reports the job state and returns the result lines ({"key",
+"response"} or {"key", "error"}).
+
+GenaiBatchBackend goes through the shared google-genai Client: it uploads the
+file, creates a batch job and downloads the result file. FakeBatchBackend
+answers every request from a Python callable instead, for offline tests and
+dry runs. Install either with gemini_client.set_batch_backend()."""
+
+from __future__ import annotations
+
+import json
+from abc import ABC, abstractmethod
+from typing import Callable
+
+JOB_SUCCEEDED = "JOB_STATE_SUCCEEDED"
+TERMINAL_STATES = frozenset(
+    {JOB_SUCCEEDED, "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"}
+)
+
+
+class BatchBackend(ABC):
+    """The three operations bulk mode needs. Subclasses must implement all of
+    them; a missing one fails when the backend is created."""
+
+    @abstractmethod
+    def submit(self, *, job_file: str, model: str, display_name: str) -> str:
+        """Start a job over job_file and return its name."""
+
+    @abstractmethod
+    def state(self, *, job_name: str) -> str:
+        """The job's JOB_STATE_* name."""
+
+    @abstractmethod
+    def results(self, *, job_name: str) -> list:
+        """The result lines of a succeeded job."""
+
+
+class GenaiBatchBackend(BatchBackend):
+    """Real backend: the Files API for the job file plus client.batches."""
+
+    def __init__(self, client) -> None:
+        self._client = client
+
+    def submit(self, *, job_file: str, model: str, display_name: str) -> str:
+        uploaded = self._client.files.upload(
+            file=job_file, config={"display_name": display_name, "mime_type": "jsonl"}
+        )
+        job = self._client.batches.create(
+            model=model, src=uploaded.name, config={"display_name": display_name}
+        )
+        return job.name
+
+    def state(self, *, job_name: str) -> str:
+        state = self._client.batches.get(name=job_name).state
+        return getattr(state, "name", str(state))
+
+    def results(self, *, job_name: str) -> list:
+        job = self._client.batches.get(name=job_name)
+        content = self._client.files.download(file=job.dest.file_name)
+        return content.decode("utf-8").splitlines()
+
+
+def fake_result_line(key: str, answer) -> str:
+    """One result line: answer is the response text, or an Exception for an
+    error line."""
+    if isinstance(answer, Exception):
+        return json.dumps({"key": key, "error": {"message": str(answer)}})
+    response = {
+        "candidates": [{"content": {"role": "model", "parts": [{"text": answer}]}}],
+        "usageMetadata": {
+            "promptTokenCount": 0,
+            "candidatesTokenCount": len(answer.split()),
+        },
+    }
+    return json.dumps({"key": key, "response": response})
+
+
+class FakeBatchBackend(BatchBackend):
+    """Offline backend. responder(key, request) returns the answer text or an
+    Exception (an error line). A job reports JOB_STATE_RUNNING for its first
+    polls_until_done state() calls, then final_state. Submitted jobs are kept
+    in .jobs."""
+
+    def __init__(
+        self,
+        responder: Callable,
+        polls_until_done: int = 1,
+        final_state: str = JOB_SUCCEEDED,
+    ) -> None:
+        self._responder = responder
+        self._polls_until_done = polls_until_done
+        self._final_state = final_state
+        self.jobs: dict[str, dict] = {}
+
+    def submit(self, *, job_file: str, model: str, display_name: str) -> str:
+        with open(job_file, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        name = f"batches/fake-{len(self.jobs) + 1}"
+        self.jobs[name] = {"model": model, "lines": lines, "polls": 0}
+        return name
+
+    def state(self, *, job_name: str) -> str:
+        job = self.jobs[job_name]
+        job["polls"] += 1
+        if job["polls"] <= self._polls_until_done:
+            return "JOB_STATE_RUNNING"
+        return self._final_state
+
+    def results(self, *, job_name: str) -> list:
+        return [
+            fake_result_line(line["key"], self._responder(line["key"], line["request"]))
+            for line in self.jobs[job_name]["lines"]
+        ]
@@ -1,21 +1,48 @@
 """Shared Gemini client: model/rate-limit config, smart batching, API calls (with
 JSON-fence cleaning and 429 handling), and context caching. Initialise once via
-setup_gemini(); other helpers reach the client through get_client()."""
+setup_gemini(); other helpers reach the client through get_client().
 
+API calls return a GeminiResult carrying the real usage_metadata counts; those
+feed the shared rate_limiter and the per-run usage_ledger. Each call has an
+*_async twin that sends the same request through the async transport (the
+client's .aio pool by default, see set_async_transport) for event-loop callers.
+
+Bulk mode (run_bulk_job) sends large one-off jobs through the batch-prediction
+API instead, outside the interactive RPM/TPM limits; see set_batch_backend."""
+
+import asyncio
+import atexit
+import base64
+import hashlib
+import json
 import re
 import sys
 import time
-import threading
 import tempfile
 import os
+from dataclasses import dataclass
 from pathlib import Path as _Path
-from collections import deque
 from typing import Optional
 
 from google import genai
 from google.genai import types as genai_types
 import tiktoken
 
+from helpers.bin_packing import pack_best_fit_decreasing
+from helpers.gemini_batch import (
+    JOB_SUCCEEDED,
+    TERMINAL_STATES,
+    BatchBackend,
+    GenaiBatchBackend,
+)
+from helpers.gemini_transport import AsyncGeminiTransport, GenaiAsyncTransport
+from helpers.image_prep import prepare_image
+from helpers.quota_ledger import DailyQuota, DailyQuotaExceeded, DailyQuotaLedger
+from helpers.rate_limiter import Reservation, SlidingWindowRateLimiter
+from helpers.structured_output import JSON_MIME_TYPE, strip_code_fences
+from helpers.token_cache import TokenCountCache
+from helpers.usage import TokenUsage, UsageLedger
+
 # ---------------------------------------------------------------------------
 # Module-level client  (initialised by setup_gemini; shared across callers)
 # ---------------------------------------------------------------------------
@@ -29,6 +56,26 @@ def get_client() -> "genai.Client":
     return _client
 
 
+# Transport for the *_async calls. Built lazily over the client's .aio surface
+# (one shared HTTP connection pool); tests install a FakeAsyncTransport instead.
+_async_transport: Optional[AsyncGeminiTransport] = None
+
+
+def set_async_transport(transport: "AsyncGeminiTransport | None") -> None:
+    """Route every *_async call through transport (None = back to the real
+    client.aio transport on next use)."""
+    global _async_transport
+    _async_transport = transport
+
+
+def get_async_transport() -> AsyncGeminiTransport:
+    """Return the async transport, wrapping the shared client on first use."""
+    global _async_transport
+    if _async_transport is None:
+        _async_transport = GenaiAsyncTransport(get_client())
+    return _async_transport
+
+
 # ---------------------------------------------------------------------------
 # Model & rate-limit constants  (Gemini 2.5 Flash – tier 1)
 # ---------------------------------------------------------------------------
@@ -68,12 +115,21 @@ def get_encoding():
     return _encoding
 
 
+# Counts memoised by content hash. setup_gemini attaches the on-disk store
+# (gitignored, restored by actions/cache in CI) so unchanged documents aren't
+# re-tokenised on the next run either.
+TOKEN_COUNT_CACHE_PATH = (
+    _Path(__file__).resolve().parents[3] / ".llm_cache" / "token_counts.json"
+)
+token_counts = TokenCountCache(namespace="cl100k_base")
+
+
 def count_tokens(text: str) -> int:
     """Return the number of tokens in *text*, or 0 if encoder unavailable."""
     enc = get_encoding()
     if enc is None:
         return 0
-    return len(enc.encode(text))
+    return token_counts.count(text, lambda t: len(enc.encode(t)))
 
 
 # ---------------------------------------------------------------------------
@@ -86,6 +142,12 @@ def setup_gemini(api_key: str, dry_run: bool = False):
     some callers still pass the result as a `model` argument."""
     global _client
 
+    # Persist token counts for the next run (set TOKEN_COUNT_CACHE=false to skip).
+    if os.getenv("TOKEN_COUNT_CACHE", "true").lower() != "false":
+        token_counts.attach(TOKEN_COUNT_CACHE_PATH)
+        atexit.unregister(token_counts.save)
+        atexit.register(token_counts.save)
+
     if dry_run:
         print("[INFO] DRY_RUN mode: Skipping Gemini API configuration")
         return None
@@ -102,7 +164,7 @@ def setup_gemini(api_key: str, dry_run: bool = False):
         print("[INFO] Gemini API configured successfully (google-genai SDK)")
         print(
             f"[INFO] Rate limits: {RPM_SAFE} req/min, {TPM_SAFE:,} tokens/min,"
-            f" {RPD_LIMIT} req/day"
+            f" {RPD_LIMIT} req/day ({remaining_daily_requests():,} left today)"
         )
         return _client
     except Exception as e:
@@ -111,93 +173,139 @@ def setup_gemini(api_key: str, dry_run: bool = False):
 
 
 # ---------------------------------------------------------------------------
-# Rate-limit state  (module-level so it is shared across all callers)
+# Rate limiting  (one module-level limiter shared by every caller)
 # ---------------------------------------------------------------------------
+rate_limiter = SlidingWindowRateLimiter(RPM_SAFE, TPM_SAFE, RPD_LIMIT)
+
+# RPD is shared across processes (update_documentation.py and describe_images.py
+# run separately, several times a day), so the daily count lives on disk. The
+# file is gitignored and per checkout (see helpers.quota_ledger); daily_quota
+# counts in memory and writes it every few requests and at exit.
+QUOTA_LEDGER_PATH = (
+    _Path(__file__).resolve().parents[3] / ".llm_cache" / "quota_ledger.json"
+)
+quota_ledger = DailyQuotaLedger(QUOTA_LEDGER_PATH)
+daily_quota = DailyQuota(quota_ledger, RPD_LIMIT)
+atexit.register(lambda: daily_quota.flush())
+
+
+def requests_used_today() -> int:
+    """Requests made today (UTC) by every process sharing the quota ledger."""
+    return daily_quota.requests_today()
+
+
+def remaining_daily_requests() -> int:
+    """How many requests are left in today's RPD_LIMIT across all runs. Callers
+    plan big workloads against this up front instead of hitting the hard stop
+    in reserve_api_request partway through."""
+    return max(0, RPD_LIMIT - requests_used_today())
+
+
+def plan_daily_budget(
+    requests_needed: int, label: str, retry_margin: float = 0.1
+) -> int:
+    """How many of requests_needed fit in what is left of today's quota, holding
+    back retry_margin of it for retries and batch splits. Logs when the work
+    has to be cut so the rest can go in a later run."""
+    remaining = remaining_daily_requests()
+    budget = max(0, remaining - max(1, int(remaining * retry_margin)))
+    if requests_needed > budget:
+        print(
+            f"\n⚠️  Daily quota: {label} needs ~{requests_needed:,} request(s) but "
+            f"only {remaining:,} remain today ({budget:,} after retry headroom)"
+        )
+        return budget
+    return requests_needed
 
-# Lock used by parallel callers to serialise the check+record pair so
-# concurrent threads each see each other's reservations before firing.
-rate_limit_lock = threading.Lock()
-
-rate_limit_state = {
-    "requests_minute": deque(maxlen=RPM_LIMIT),
-    "tokens_minute": 0,
-    "minute_start": time.time(),
-    "requests_today": 0,
-    "day_start": time.time(),
-}
-
-
-def reset_minute_window_if_needed():
-    """Reset minute-based counters when a new minute has started."""
-    current_time = time.time()
-    if current_time - rate_limit_state["minute_start"] >= 60:
-        rate_limit_state["minute_start"] = current_time
-        rate_limit_state["tokens_minute"] = 0
-        rate_limit_state["requests_minute"].clear()
-
-
-def reset_day_window_if_needed():
-    """Reset day-based counters when a new day has started."""
-    current_time = time.time()
-    if current_time - rate_limit_state["day_start"] >= 86_400:
-        rate_limit_state["day_start"] = current_time
-        rate_limit_state["requests_today"] = 0
-
-
-def check_and_wait_for_rate_limits(tokens_needed: int):
-    """Block until it's safe to make a request needing tokens_needed input tokens.
-    Exits the process if the daily quota is already used up."""
-    reset_minute_window_if_needed()
-    reset_day_window_if_needed()
-
-    current_time = time.time()
-
-    # Daily hard limit
-    if rate_limit_state["requests_today"] >= RPD_LIMIT:
-        print(f"\n⚠️  Daily request limit reached ({RPD_LIMIT} requests)")
-        print("   Cannot proceed - this would exceed daily quota")
-        sys.exit(1)
 
-    if rate_limit_state["requests_today"] >= RPD_LIMIT - 10:
+def _log_rate_limit_wait(wait: float, window: str) -> None:
+    snap = rate_limiter.snapshot()
+    if window == "RPM":
+        detail = f"{snap['requests_minute']}/{RPM_SAFE} req in the last minute"
+    else:
+        detail = f"{snap['tokens_minute']:,}/{TPM_SAFE:,} tokens in the last minute"
+    print(f"\n⏸️  {window} limit ({detail}), pausing for {wait:.1f}s...")
+
+
+def _reserve_daily_quota() -> None:
+    """Count one request against the daily quota (check and count are one
+    step); raise DailyQuotaExceeded if it is used up, warn when it's nearly
+    gone. May flush the ledger, i.e. file I/O under a flock."""
+    requests_today = daily_quota.reserve()
+    if requests_today is None:
+        raise DailyQuotaExceeded(f"Daily request limit reached ({RPD_LIMIT} requests)")
+    if requests_today >= RPD_LIMIT - 10:
         print(
             f"\n⚠️  WARNING: Approaching daily limit"
-            f" ({rate_limit_state['requests_today']}/{RPD_LIMIT} requests)"
+            f" ({requests_today}/{RPD_LIMIT} requests)"
         )
 
-    # Per-minute request limit
-    requests_in_window = len(rate_limit_state["requests_minute"])
-    if requests_in_window >= RPM_SAFE:
-        wait_time = 60 - (current_time - rate_limit_state["minute_start"])
-        if wait_time > 0:
-            print(
-                f"\n⏸️  RPM limit reached ({requests_in_window}/{RPM_SAFE}),"
-                f" pausing for {wait_time:.1f}s..."
-            )
-            time.sleep(wait_time + 1)
-            reset_minute_window_if_needed()
-
-    # Per-minute token limit — wait if adding this request would exceed the
-    # safe threshold (catches the case where one large request fills the budget
-    # and all subsequent requests in the same minute must wait).
-    tokens_used_so_far = rate_limit_state["tokens_minute"]
-    if tokens_used_so_far + tokens_needed > TPM_SAFE:
-        wait_time = 60 - (current_time - rate_limit_state["minute_start"])
-        if wait_time > 0:
-            print(
-                f"\n⏸️  TPM limit: current {tokens_used_so_far:,} +"
-                f" needed {tokens_needed:,} > safe {TPM_SAFE:,},"
-                f" pausing for {wait_time:.1f}s..."
-            )
-            time.sleep(wait_time + 1)
-            reset_minute_window_if_needed()
-
 
-def record_api_request(tokens_used: int):
-    """Record that one API request was made consuming *tokens_used* tokens."""
-    current_time = time.time()
-    rate_limit_state["requests_minute"].append(current_time)
-    rate_limit_state["tokens_minute"] += tokens_used
-    rate_limit_state["requests_today"] += 1
+def reserve_api_request(estimated_tokens: int) -> Reservation:
+    """Block until a request of estimated_tokens input tokens fits in the sliding
+    RPM/TPM windows, then reserve it — check and reservation are atomic, so
+    concurrent callers can't all slip through the same gap. Pass the result as
+    reservation= to a call_gemini* function; it is reconciled against the
+    response's real usage_metadata. Exits the process if the daily quota is
+    already used up."""
+    try:
+        _reserve_daily_quota()
+    except DailyQuotaExceeded as e:
+        print(f"\n⚠️  {e}")
+        print("   Cannot proceed - this would exceed daily quota")
+        sys.exit(1)
+    try:
+        return rate_limiter.acquire_blocking(
+            estimated_tokens, on_wait=_log_rate_limit_wait
+        )
+    except BaseException:
+        daily_quota.release()
+        raise
+
+
+async def reserve_api_request_async(estimated_tokens: int) -> Reservation:
+    """Async twin of reserve_api_request for the *_async calls: waits for room in
+    the same shared limiter without blocking the event loop. The daily-quota step
+    runs in a worker thread, and a used-up quota raises DailyQuotaExceeded
+    instead of exiting inside a coroutine. If the wait fails or is cancelled,
+    the daily-quota request is given back."""
+    await asyncio.to_thread(_reserve_daily_quota)
+    try:
+        return await rate_limiter.acquire(estimated_tokens, on_wait=_log_rate_limit_wait)
+    except BaseException:
+        daily_quota.release()
+        raise
+
+
+# Per-run token usage by task label; printed by the scripts' summaries.
+usage_ledger = UsageLedger()
+
+
+@dataclass
+class GeminiResult:
+    """What every call_gemini* function returns: the answer text plus the real
+    token usage Gemini reported (None if the response carried no metadata)."""
+
+    text: str
+    usage: Optional[TokenUsage] = None
+
+
+def _account_usage(
+    response, reservation: "Reservation | None", label: str, items: int
+) -> Optional[TokenUsage]:
+    """Read usage_metadata, reconcile the reservation's estimate with the billed
+    input tokens (kept as-is when there is no metadata), and add it to the run
+    ledger under label."""
+    usage = TokenUsage.from_response(response)
+    if reservation is not None and usage is not None:
+        reservation.reconcile(usage.prompt_tokens)
+    usage_ledger.add(label, usage, items=items)
+    if usage is not None:
+        daily_quota.add_usage(
+            prompt_tokens=usage.prompt_tokens,
+            output_tokens=usage.output_tokens + usage.thinking_tokens,
+        )
+    return usage
 
 
 # ---------------------------------------------------------------------------
@@ -207,52 +315,43 @@ def create_smart_batches(
     files: dict,
     max_tokens: int = DEFAULT_MAX_TOKENS_PER_BATCH,
     max_files: int = DEFAULT_MAX_FILES_PER_BATCH,
+    output_tokens_per_file: int = 0,
+    max_output_tokens: "int | None" = None,
 ) -> list:
-    """Greedy bin-pack files ({key: text}) into batches that each stay within
-    max_tokens and max_files, largest files first. Returns a list of dicts with
-    the same key type as files."""
+    """Pack files ({key: text}) into as few batches as possible (best-fit
+    decreasing, see helpers.bin_packing), each within max_tokens including
+    PROMPT_OVERHEAD_TOKENS and within max_files. With output_tokens_per_file,
+    a batch's estimated answer also stays within max_output_tokens (default
+    MAX_OUTPUT_TOKENS). Returns a list of dicts with the same key type as
+    files, largest file first in each."""
     enc = get_encoding()
     if enc is None:
         # No encoder available — put everything in one batch
         return [files]
 
-    # Measure each entry
-    sized = [(key, content, len(enc.encode(content))) for key, content in files.items()]
-    sized.sort(key=lambda x: x[2], reverse=True)  # largest first
-
-    batches = []
-    current_batch = {}
-    current_tokens = 0
-
-    for key, content, tokens in sized:
-        batch_full = len(current_batch) >= max_files
-        would_exceed = current_tokens + tokens + PROMPT_OVERHEAD_TOKENS > max_tokens
-
-        if (batch_full or would_exceed) and current_batch:
-            batches.append(current_batch)
-            current_batch = {}
-            current_tokens = 0
-
-        current_batch[key] = content
-        current_tokens += tokens
-
-    if current_batch:
-        batches.append(current_batch)
+    keys = list(files)
+    sizes = [count_tokens(files[key]) for key in keys]
+    output_sizes = None
+    if output_tokens_per_file:
+        output_sizes = [output_tokens_per_file] * len(keys)
+        max_output_tokens = max_output_tokens or MAX_OUTPUT_TOKENS
+
+    packed = pack_best_fit_decreasing(
+        sizes,
+        capacity=max_tokens - PROMPT_OVERHEAD_TOKENS,
+        max_items=max_files,
+        output_sizes=output_sizes,
+        max_output=max_output_tokens if output_sizes else None,
+    )
+    if len(packed.bins) > 1:
+        print(f"[BATCH] Packed {len(keys)} file(s) into {packed.describe()}")
 
-    return batches
+    return [{keys[i]: files[keys[i]] for i in bin_} for bin_ in packed.bins]
 
 
 # ---------------------------------------------------------------------------
 # Low-level API call
 # ---------------------------------------------------------------------------
-_FENCE_RE_START = re.compile(r"^```(?:json)?\s*", re.MULTILINE)
-_FENCE_RE_END = re.compile(r"\s*```$", re.MULTILINE)
-
-
-def _strip_code_fences(text: str) -> str:
-    """Strip a leading ```/```json fence and trailing ``` from a model response."""
-    text = _FENCE_RE_START.sub("", text.strip())
-    return _FENCE_RE_END.sub("", text).strip()
 
 # Supported image extensions for Gemini vision calls. Maps lowercase suffix
 # (with leading dot) to the corresponding MIME type. Callers can use the dict
@@ -276,14 +375,20 @@ FILE_API_THRESHOLD_TOKENS = 30_000
 MAX_OUTPUT_TOKENS = 32_768
 
 
+def _write_temp_file(data: "str | bytes", suffix: str) -> str:
+    """Write data to a named temp file for a Files API upload; return its path."""
+    mode, encoding = ("w", "utf-8") if isinstance(data, str) else ("wb", None)
+    with tempfile.NamedTemporaryFile(
+        mode=mode, suffix=suffix, delete=False, encoding=encoding
+    ) as f:
+        f.write(data)
+        return f.name
+
+
 def _upload_prompt_as_file(prompt: str) -> object:
     """Upload *prompt* text via the Gemini Files API and return the file object."""
     client = get_client()
-    with tempfile.NamedTemporaryFile(
-        mode="w", suffix=".txt", delete=False, encoding="utf-8"
-    ) as f:
-        f.write(prompt)
-        tmp_path = f.name
+    tmp_path = _write_temp_file(prompt, ".txt")
     try:
         uploaded = client.files.upload(
             file=tmp_path,
@@ -294,40 +399,85 @@ def _upload_prompt_as_file(prompt: str) -> object:
         os.unlink(tmp_path)
 
 
-def call_gemini(model, full_prompt: str) -> str:
-    """Send full_prompt to Gemini and return the text with surrounding code fences
-    stripped. Prompts over FILE_API_THRESHOLD_TOKENS go via the Files API; output
-    is capped at MAX_OUTPUT_TOKENS. model is ignored (kept for back-compat) — the
-    client singleton is used. The caller does its own rate-limit accounting
-    (check_and_wait_for_rate_limits / record_api_request) and retry/split;
-    failures propagate."""
+# Request builders shared by the sync calls and their *_async twins, so both
+# paths send byte-identical requests.
+def _text_contents(text: str) -> list:
+    return [genai_types.Content(role="user", parts=[genai_types.Part(text=text)])]
+
+
+def _file_contents(uploaded: object, mime_type: str = "text/plain") -> list:
+    return [
+        genai_types.Content(
+            role="user",
+            parts=[
+                genai_types.Part(
+                    file_data=genai_types.FileData(
+                        mime_type=mime_type, file_uri=uploaded.uri
+                    )
+                )
+            ],
+        )
+    ]
+
+
+def _generate_config(
+    max_output_tokens: int = MAX_OUTPUT_TOKENS,
+    cache: "object | None" = None,
+    disable_afc: bool = False,
+    response_schema: "dict | None" = None,
+) -> object:
+    cfg_kwargs = dict(max_output_tokens=max_output_tokens)
+    if cache is not None:
+        cfg_kwargs["cached_content"] = cache.name
+    if response_schema is not None:
+        # Constrained decoding: the answer is JSON matching the schema (see
+        # helpers.structured_output).
+        cfg_kwargs["response_mime_type"] = JSON_MIME_TYPE
+        cfg_kwargs["response_schema"] = response_schema
+    if disable_afc:
+        # automatic_function_calling disabled: we don't use tools, and leaving it
+        # enabled (the SDK default) causes a noisy "AFC is enabled" log per call.
+        cfg_kwargs["automatic_function_calling"] = (
+            genai_types.AutomaticFunctionCallingConfig(disable=True)
+        )
+    return genai_types.GenerateContentConfig(**cfg_kwargs)
+
+
+def _log_file_api_prompt(token_count: int) -> None:
+    print(f"    [File API] Prompt is {token_count:,} tokens — uploading via Files API")
+
+
+def call_gemini(
+    model,
+    full_prompt: str,
+    reservation: "Reservation | None" = None,
+    label: str = "gemini",
+    items: int = 1,
+    token_count: "int | None" = None,
+    response_schema: "dict | None" = None,
+) -> GeminiResult:
+    """Send full_prompt to Gemini and return a GeminiResult whose text has the
+    surrounding code fences stripped. Prompts over FILE_API_THRESHOLD_TOKENS go
+    via the Files API; output is capped at MAX_OUTPUT_TOKENS. response_schema
+    asks for JSON matching it (helpers.structured_output). model is ignored
+    (kept for back-compat) — the client singleton is used. The caller reserves
+    rate-limit capacity up front (reserve_api_request) and passes it as
+    reservation so it can be reconciled with the real usage; retry/split is the
+    caller's too. label/items file the usage in usage_ledger. token_count, when
+    the caller already knows it, saves re-tokenising a large prompt. Failures
+    propagate."""
     client = get_client()
 
-    token_count = count_tokens(full_prompt)
+    if token_count is None:
+        token_count = count_tokens(full_prompt)
     if token_count > FILE_API_THRESHOLD_TOKENS:
-        print(
-            f"    [File API] Prompt is {token_count:,} tokens — uploading via Files API"
-        )
+        _log_file_api_prompt(token_count)
         uploaded = _upload_prompt_as_file(full_prompt)
         try:
             response = client.models.generate_content(
                 model=MODEL_NAME,
-                contents=[
-                    genai_types.Content(
-                        role="user",
-                        parts=[
-                            genai_types.Part(
-                                file_data=genai_types.FileData(
-                                    mime_type="text/plain",
-                                    file_uri=uploaded.uri,
-                                )
-                            )
-                        ],
-                    )
-                ],
-                config=genai_types.GenerateContentConfig(
-                    max_output_tokens=MAX_OUTPUT_TOKENS,
-                ),
+                contents=_file_contents(uploaded),
+                config=_generate_config(response_schema=response_schema),
             )
         finally:
             try:
@@ -337,18 +487,12 @@ def call_gemini(model, full_prompt: str) -> str:
     else:
         response = client.models.generate_content(
             model=MODEL_NAME,
-            contents=[
-                genai_types.Content(
-                    role="user",
-                    parts=[genai_types.Part(text=full_prompt)],
-                )
-            ],
-            config=genai_types.GenerateContentConfig(
-                max_output_tokens=MAX_OUTPUT_TOKENS,
-            ),
+            contents=_text_contents(full_prompt),
+            config=_generate_config(response_schema=response_schema),
         )
 
-    return _strip_code_fences(response.text)
+    usage = _account_usage(response, reservation, label, items)
+    return GeminiResult(strip_code_fences(response.text), usage)
 
 
 def extract_retry_delay(error_str: str, default_wait: float = 60.0) -> float:
@@ -502,12 +646,20 @@ def delete_gemini_cache(cache: object) -> None:
 
 
 def call_gemini_with_cache(
-    cache: object, dynamic_prompt: str, model: str = MODEL_NAME
-) -> str:
+    cache: object,
+    dynamic_prompt: str,
+    model: str = MODEL_NAME,
+    reservation: "Reservation | None" = None,
+    label: str = "gemini",
+    items: int = 1,
+    response_schema: "dict | None" = None,
+) -> GeminiResult:
     """Send dynamic_prompt as the user turn against a pre-created cache (the static
     context), so the model sees [cached static instructions] + [dynamic content].
-    Returns text with fences stripped. Caller handles rate-limit accounting;
-    failures propagate."""
+    Returns a GeminiResult with fences stripped from the text; response_schema
+    as in call_gemini. reservation (from reserve_api_request) is reconciled
+    with the real usage, which is filed in usage_ledger under label; failures
+    propagate."""
     if cache is None:
         raise ValueError(
             "call_gemini_with_cache: cache is None. "
@@ -518,24 +670,74 @@ def call_gemini_with_cache(
 
     response = client.models.generate_content(
         model=model,
-        contents=[
-            genai_types.Content(
-                role="user",
-                parts=[genai_types.Part(text=dynamic_prompt)],
-            )
-        ],
-        config=genai_types.GenerateContentConfig(
-            cached_content=cache.name,
-            max_output_tokens=MAX_OUTPUT_TOKENS,
-        ),
+        contents=_text_contents(dynamic_prompt),
+        config=_generate_config(cache=cache, response_schema=response_schema),
     )
 
-    return _strip_code_fences(response.text)
+    usage = _account_usage(response, reservation, label, items)
+    return GeminiResult(strip_code_fences(response.text), usage)
 
 
 # 4 MB threshold — images larger than this are uploaded via Files API
 _MAX_INLINE_IMAGE_BYTES = 4 * 1024 * 1024
 
+# Pre-call input estimate for one image: Gemini bills 258 tokens per 768px
+# tile, and a typical CLMS figure is about six tiles. Reconciled after the call.
+VISION_IMAGE_TOKEN_ESTIMATE = 1_548
+
+
+def _image_mime_type(image_path: "_Path") -> str:
+    """Prefer the explicit IMAGE_MIME_TYPES map; fall back to mimetypes stdlib."""
+    import mimetypes as _mimetypes
+
+    return (
+        IMAGE_MIME_TYPES.get(_Path(image_path).suffix.lower())
+        or _mimetypes.guess_type(str(image_path))[0]
+        or "image/png"
+    )
+
+
+def _inline_image_part(img_bytes: bytes, mime_type: str) -> object:
+    return genai_types.Part(
+        inline_data=genai_types.Blob(mime_type=mime_type, data=img_bytes)
+    )
+
+
+def _file_image_part(uploaded: object, mime_type: str) -> object:
+    return genai_types.Part(
+        file_data=genai_types.FileData(mime_type=mime_type, file_uri=uploaded.uri)
+    )
+
+
+def _vision_contents(img_part: object, context_text: str) -> list:
+    parts = []
+    if context_text:
+        parts.append(genai_types.Part(text=context_text))
+    parts.append(img_part)
+    return [genai_types.Content(role="user", parts=parts)]
+
+
+def _vision_text(response) -> str:
+    """Answer text of a vision response. Thinking models (e.g.
+    gemini-3-flash-preview) include `thought_signature` parts alongside the
+    actual answer, so only genuine text parts are concatenated — avoids the SDK
+    warning and guarantees we return the model's answer."""
+    try:
+        text_parts = [
+            part.text
+            for candidate in response.candidates
+            for part in candidate.content.parts
+            if hasattr(part, "text")
+            and part.text
+            and not getattr(part, "thought", False)
+        ]
+        if text_parts:
+            return "\n".join(text_parts)
+    except Exception:
+        pass
+    # Fallback — let the SDK assemble the text (may warn for thinking models)
+    return response.text
+
 
 def call_gemini_vision(
     image_path: "_Path",
@@ -543,35 +745,29 @@ def call_gemini_vision(
     cache: "object | None" = None,
     model: str = MODEL_NAME,
     max_output_tokens: int = MAX_OUTPUT_TOKENS,
-) -> str:
-    """Send an image (plus optional context_text) to Gemini and return the raw text.
-    Images <= 4 MB go inline; larger ones upload via the Files API and the remote
-    temp file is deleted after. With a cache, context_text rides as the dynamic turn
-    on top of the cached static context; without one it's the only text. Caller
-    handles rate-limit accounting; failures propagate."""
-    import mimetypes as _mimetypes
-
+    reservation: "Reservation | None" = None,
+    label: str = "images",
+    response_schema: "dict | None" = None,
+) -> GeminiResult:
+    """Send an image (plus optional context_text) to Gemini and return a
+    GeminiResult holding the raw answer text.
+    The image is first downscaled/re-encoded by helpers.image_prep (when
+    Pillow is installed). Images <= 4 MB go inline; larger ones upload via the
+    Files API and the remote temp file is deleted after. With a cache, context_text rides as the dynamic turn
+    on top of the cached static context; without one it's the only text.
+    response_schema asks for JSON matching it (helpers.structured_output).
+    reservation (from reserve_api_request) is reconciled with the real usage,
+    which is filed in usage_ledger under label; failures propagate."""
     client = get_client()
-    suffix = _Path(image_path).suffix.lower()
-    # Prefer the explicit IMAGE_MIME_TYPES map; fall back to mimetypes stdlib.
-    mime_type = (
-        IMAGE_MIME_TYPES.get(suffix)
-        or _mimetypes.guess_type(str(image_path))[0]
-        or "image/png"
-    )
-
-    img_bytes = _Path(image_path).read_bytes()
+    prepared = prepare_image(image_path, _image_mime_type(image_path))
+    img_bytes, mime_type = prepared.data, prepared.mime_type
     uploaded_file = None
 
     if len(img_bytes) <= _MAX_INLINE_IMAGE_BYTES:
-        img_part = genai_types.Part(
-            inline_data=genai_types.Blob(mime_type=mime_type, data=img_bytes)
-        )
+        img_part = _inline_image_part(img_bytes, mime_type)
     else:
         print(f"    [File API] Image {_Path(image_path).name} is large — uploading...")
-        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
-            tmp.write(img_bytes)
-            tmp_path = tmp.name
+        tmp_path = _write_temp_file(img_bytes, prepared.suffix)
         try:
             uploaded_file = client.files.upload(
                 file=tmp_path,
@@ -579,34 +775,18 @@ def call_gemini_vision(
             )
         finally:
             os.unlink(tmp_path)
-        img_part = genai_types.Part(
-            file_data=genai_types.FileData(
-                mime_type=mime_type, file_uri=uploaded_file.uri
-            )
-        )
-
-    parts = []
-    if context_text:
-        parts.append(genai_types.Part(text=context_text))
-    parts.append(img_part)
-
-    contents = [genai_types.Content(role="user", parts=parts)]
-
-    # automatic_function_calling disabled: we don't use tools, and leaving it
-    # enabled (the SDK default) causes a noisy "AFC is enabled" log per call.
-    cfg_kwargs = dict(
-        max_output_tokens=max_output_tokens,
-        automatic_function_calling=genai_types.AutomaticFunctionCallingConfig(disable=True),
-    )
-    if cache is not None:
-        cfg_kwargs["cached_content"] = cache.name
-    cfg = genai_types.GenerateContentConfig(**cfg_kwargs)
+        img_part = _file_image_part(uploaded_file, mime_type)
 
     try:
         response = client.models.generate_content(
             model=model,
-            contents=contents,
-            config=cfg,
+            contents=_vision_contents(img_part, context_text),
+            config=_generate_config(
+                max_output_tokens,
+                cache=cache,
+                disable_afc=True,
+                response_schema=response_schema,
+            ),
         )
     finally:
         if uploaded_file is not None:
@@ -615,21 +795,375 @@ def call_gemini_vision(
             except Exception:
                 pass
 
-    # Thinking models (e.g. gemini-3-flash-preview) include `thought_signature`
-    # parts alongside the actual answer.  Concatenate only genuine text parts
-    # to avoid the SDK warning and guarantee we return the model's answer.
+    usage = _account_usage(response, reservation, label, 1)
+    return GeminiResult(_vision_text(response), usage)
+
+
+# ---------------------------------------------------------------------------
+# Async API calls  (same requests as above, sent through the async transport)
+# ---------------------------------------------------------------------------
+async def _upload_async(data: "str | bytes", suffix: str, mime_type: str) -> object:
+    transport = get_async_transport()
+    tmp_path = await asyncio.to_thread(_write_temp_file, data, suffix)
     try:
-        text_parts = [
-            part.text
-            for candidate in response.candidates
-            for part in candidate.content.parts
-            if hasattr(part, "text")
-            and part.text
-            and not getattr(part, "thought", False)
-        ]
-        if text_parts:
-            return "\n".join(text_parts)
+        return await transport.upload_file(
+            file=tmp_path, config=genai_types.UploadFileConfig(mime_type=mime_type)
+        )
+    finally:
+        os.unlink(tmp_path)
+
+
+async def _delete_quietly(uploaded: object) -> None:
+    try:
+        await get_async_transport().delete_file(name=uploaded.name)
     except Exception:
         pass
-    # Fallback — let the SDK assemble the text (may warn for thinking models)
-    return response.text
+
+
+async def call_gemini_async(
+    full_prompt: str,
+    reservation: "Reservation | None" = None,
+    label: str = "gemini",
+    items: int = 1,
+    token_count: "int | None" = None,
+    response_schema: "dict | None" = None,
+) -> GeminiResult:
+    """Async twin of call_gemini (without the legacy model argument). Reserve
+    with reserve_api_request_async."""
+    transport = get_async_transport()
+
+    if token_count is None:
+        token_count = count_tokens(full_prompt)
+    if token_count > FILE_API_THRESHOLD_TOKENS:
+        _log_file_api_prompt(token_count)
+        uploaded = await _upload_async(full_prompt, ".txt", "text/plain")
+        try:
+            response = await transport.generate_content(
+                model=MODEL_NAME,
+                contents=_file_contents(uploaded),
+                config=_generate_config(response_schema=response_schema),
+            )
+        finally:
+            await _delete_quietly(uploaded)
+    else:
+        response = await transport.generate_content(
+            model=MODEL_NAME,
+            contents=_text_contents(full_prompt),
+            config=_generate_config(response_schema=response_schema),
+        )
+
+    usage = _account_usage(response, reservation, label, items)
+    return GeminiResult(strip_code_fences(response.text), usage)
+
+
+async def call_gemini_with_cache_async(
+    cache: object,
+    dynamic_prompt: str,
+    model: str = MODEL_NAME,
+    reservation: "Reservation | None" = None,
+    label: str = "gemini",
+    items: int = 1,
+    response_schema: "dict | None" = None,
+) -> GeminiResult:
+    """Async twin of call_gemini_with_cache."""
+    if cache is None:
+        raise ValueError(
+            "call_gemini_with_cache_async: cache is None. "
+            "Use call_gemini_async() with the full combined prompt instead."
+        )
+
+    response = await get_async_transport().generate_content(
+        model=model,
+        contents=_text_contents(dynamic_prompt),
+        config=_generate_config(cache=cache, response_schema=response_schema),
+    )
+
+    usage = _account_usage(response, reservation, label, items)
+    return GeminiResult(strip_code_fences(response.text), usage)
+
+
+async def call_gemini_vision_async(
+    image_path: "_Path",
+    context_text: str = "",
+    cache: "object | None" = None,
+    model: str = MODEL_NAME,
+    max_output_tokens: int = MAX_OUTPUT_TOKENS,
+    reservation: "Reservation | None" = None,
+    label: str = "images",
+    response_schema: "dict | None" = None,
+) -> GeminiResult:
+    """Async twin of call_gemini_vision. The image is read and prepared off the
+    event loop."""
+    img_part, uploaded_file = await _image_part_async(image_path)
+    try:
+        response = await get_async_transport().generate_content(
+            model=model,
+            contents=_vision_contents(img_part, context_text),
+            config=_generate_config(
+                max_output_tokens,
+                cache=cache,
+                disable_afc=True,
+                response_schema=response_schema,
+            ),
+        )
+    finally:
+        if uploaded_file is not None:
+            await _delete_quietly(uploaded_file)
+
+    usage = _account_usage(response, reservation, label, 1)
+    return GeminiResult(_vision_text(response), usage)
+
+
+async def _image_part_async(image_path: "_Path") -> tuple:
+    """(Part, uploaded file or None) for image_path, prepared off the event
+    loop; images over 4 MB go through the Files API."""
+    prepared = await asyncio.to_thread(
+        prepare_image, image_path, _image_mime_type(image_path)
+    )
+    if len(prepared.data) <= _MAX_INLINE_IMAGE_BYTES:
+        return _inline_image_part(prepared.data, prepared.mime_type), None
+    print(f"    [File API] Image {_Path(image_path).name} is large — uploading...")
+    uploaded = await _upload_async(prepared.data, prepared.suffix, prepared.mime_type)
+    return _file_image_part(uploaded, prepared.mime_type), uploaded
+
+
+async def call_gemini_vision_batch_async(
+    images: list,
+    instruction: str,
+    cache: "object | None" = None,
+    model: str = MODEL_NAME,
+    max_output_tokens: int = MAX_OUTPUT_TOKENS,
+    reservation: "Reservation | None" = None,
+    label: str = "images",
+    response_schema: "dict | None" = None,
+) -> GeminiResult:
+    """Send several images in one request: instruction, then for each
+    (image_path, text) in images its text followed by the image. The caller
+    puts a marker naming each image in its text and asks for one answer per
+    marker; splitting the answer is up to the caller (response_schema can
+    ask for one JSON property per marker). Usage is filed as len(images)
+    items."""
+    parts = [genai_types.Part(text=instruction)]
+    uploaded = []
+    try:
+        for image_path, text in images:
+            img_part, uploaded_file = await _image_part_async(image_path)
+            if uploaded_file is not None:
+                uploaded.append(uploaded_file)
+            parts += [genai_types.Part(text=text), img_part]
+        response = await get_async_transport().generate_content(
+            model=model,
+            contents=[genai_types.Content(role="user", parts=parts)],
+            config=_generate_config(
+                max_output_tokens,
+                cache=cache,
+                disable_afc=True,
+                response_schema=response_schema,
+            ),
+        )
+    finally:
+        for uploaded_file in uploaded:
+            await _delete_quietly(uploaded_file)
+
+    usage = _account_usage(response, reservation, label, len(images))
+    return GeminiResult(_vision_text(response), usage)
+
+
+# ---------------------------------------------------------------------------
+# Bulk mode  (batch prediction: one JSONL job file, polled to completion)
+# ---------------------------------------------------------------------------
+# Backend for run_bulk_job. Built lazily over the shared client; tests install
+# a FakeBatchBackend instead.
+_batch_backend: Optional[BatchBackend] = None
+
+BULK_POLL_SECONDS = 60
+BULK_TIMEOUT_SECONDS = 24 * 3600  # the batch API's own turnaround target
+
+
+def set_batch_backend(backend: "BatchBackend | None") -> None:
+    """Route run_bulk_job through backend (None = back to the real batches API
+    on next use)."""
+    global _batch_backend
+    _batch_backend = backend
+
+
+def get_batch_backend() -> BatchBackend:
+    """Return the batch backend, wrapping the shared client on first use."""
+    global _batch_backend
+    if _batch_backend is None:
+        _batch_backend = GenaiBatchBackend(get_client())
+    return _batch_backend
+
+
+def _bulk_request(
+    parts: list,
+    system_instruction: "str | None",
+    max_output_tokens: int,
+    response_schema: "dict | None",
+) -> dict:
+    request = {
+        "contents": [{"role": "user", "parts": parts}],
+        "generationConfig": {"maxOutputTokens": max_output_tokens},
+    }
+    if response_schema is not None:
+        request["generationConfig"]["responseMimeType"] = JSON_MIME_TYPE
+        request["generationConfig"]["responseSchema"] = response_schema
+    if system_instruction:
+        request["systemInstruction"] = {"parts": [{"text": system_instruction}]}
+    return request
+
+
+def bulk_text_request(
+    prompt: str,
+    system_instruction: "str | None" = None,
+    max_output_tokens: int = MAX_OUTPUT_TOKENS,
+    response_schema: "dict | None" = None,
+) -> dict:
+    """A text request for write_bulk_job."""
+    return _bulk_request(
+        [{"text": prompt}], system_instruction, max_output_tokens, response_schema
+    )
+
+
+def bulk_vision_request(
+    image_path: "_Path",
+    context_text: str = "",
+    system_instruction: "str | None" = None,
+    user_prompt: "str | None" = None,
+    max_output_tokens: int = MAX_OUTPUT_TOKENS,
+    response_schema: "dict | None" = None,
+) -> "dict | None":
+    """A vision request for write_bulk_job: the same turn as
+    call_gemini_vision, with the static prompt sent inline since a job has no
+    context cache. The image is prepared by helpers.image_prep and inlined;
+    None when it is still over _MAX_INLINE_IMAGE_BYTES (a job can't upload
+    files, so such an image has to go through call_gemini_vision)."""
+    prepared = prepare_image(image_path, _image_mime_type(image_path))
+    if len(prepared.data) > _MAX_INLINE_IMAGE_BYTES:
+        return None
+    parts = [{"text": text} for text in (user_prompt, context_text) if text]
+    parts.append(
+        {
+            "inlineData": {
+                "mimeType": prepared.mime_type,
+                "data": base64.b64encode(prepared.data).decode("ascii"),
+            }
+        }
+    )
+    return _bulk_request(parts, system_instruction, max_output_tokens, response_schema)
+
+
+def write_bulk_job(job_file: "_Path", requests) -> int:
+    """Write requests as a job file, one line per request; returns the number
+    of requests. requests is {key: request} or an iterable of (key, request)
+    pairs — pass a generator to keep only one request (e.g. one inlined
+    image) in memory at a time."""
+    job_file = _Path(job_file)
+    job_file.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(requests, dict):
+        requests = requests.items()
+    count = 0
+    with job_file.open("w", encoding="utf-8") as f:
+        for key, request in requests:
+            f.write(json.dumps({"key": key, "request": request}, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def _bulk_result(line: dict) -> "GeminiResult | None":
+    """GeminiResult from one result line; None for an error or empty answer."""
+    response = line.get("response")
+    if not isinstance(response, dict):
+        return None
+    texts = [
+        part["text"]
+        for candidate in response.get("candidates") or []
+        for part in (candidate.get("content") or {}).get("parts") or []
+        if part.get("text") and not part.get("thought")
+    ]
+    if not texts:
+        return None
+    meta = response.get("usageMetadata")
+    usage = None
+    if isinstance(meta, dict):
+        usage = TokenUsage(
+            prompt_tokens=meta.get("promptTokenCount", 0),
+            cached_tokens=meta.get("cachedContentTokenCount", 0),
+            output_tokens=meta.get("candidatesTokenCount", 0),
+            thinking_tokens=meta.get("thoughtsTokenCount", 0),
+        )
+    return GeminiResult("\n".join(texts), usage)
+
+
+def run_bulk_job(
+    job_file: "_Path",
+    display_name: str,
+    model: str = MODEL_NAME,
+    label: str = "bulk",
+    poll_seconds: "float | None" = None,
+    timeout_seconds: "float | None" = None,
+) -> dict:
+    """Submit job_file (see write_bulk_job), poll until the job finishes and
+    return {key: GeminiResult, or None for a request that failed}. Texts are
+    returned as the model wrote them.
+
+    The job name is kept next to the file (<job_file>.job.json) with the
+    file's hash, so a re-run over the same file re-attaches to the job
+    instead of paying for it twice. Usage is filed in usage_ledger under
+    label; batch requests don't count against the interactive limits or the
+    daily quota ledger. Raises RuntimeError when the job doesn't succeed."""
+    poll_seconds = BULK_POLL_SECONDS if poll_seconds is None else poll_seconds
+    timeout_seconds = BULK_TIMEOUT_SECONDS if timeout_seconds is None else timeout_seconds
+    job_file = _Path(job_file)
+    sidecar = job_file.with_name(job_file.name + ".job.json")
+    digest = hashlib.sha256(job_file.read_bytes()).hexdigest()
+    backend = get_batch_backend()
+
+    try:
+        job = json.loads(sidecar.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        job = {}
+    if job.get("sha256") == digest and job.get("name"):
+        print(f"[BULK] Re-attaching to {job['name']} for {job_file.name}")
+    else:
+        name = backend.submit(
+            job_file=str(job_file), model=model, display_name=display_name
+        )
+        job = {"name": name, "sha256": digest}
+        sidecar.write_text(json.dumps(job), encoding="utf-8")
+        print(f"[BULK] Submitted {job_file.name} as {name}")
+
+    started = time.monotonic()
+    while True:
+        state = backend.state(job_name=job["name"])
+        if state in TERMINAL_STATES:
+            break
+        waited = time.monotonic() - started
+        if waited > timeout_seconds:
+            raise RuntimeError(
+                f"Batch job {job['name']} still {state} after {waited / 3600:.1f} h "
+                "— run again later to re-attach."
+            )
+        print(f"[BULK] {job['name']}: {state} ({waited / 60:.0f} min)")
+        time.sleep(poll_seconds)
+    if state != JOB_SUCCEEDED:
+        sidecar.unlink(missing_ok=True)  # nothing to re-attach to
+        raise RuntimeError(f"Batch job {job['name']} ended in {state}")
+
+    results = {}
+    for raw in backend.results(job_name=job["name"]):
+        try:
+            line = json.loads(raw)
+            key = line["key"]
+        except (ValueError, KeyError, TypeError):
+            continue
+        result = _bulk_result(line)
+        if result is None:
+            print(f"[BULK] No answer for {key}: {line.get('error') or 'empty response'}")
+        else:
+            usage_ledger.add(label, result.usage, items=1)
+        results[key] = result
+    answered = sum(result is not None for result in results.values())
+    print(f"[BULK] {job['name']}: {answered}/{len(results)} answered")
+    return results
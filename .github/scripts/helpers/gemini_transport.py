@@ -0,0 +1,90 @@
+"""Async transports behind gemini_client's *_async calls.
+
+GenaiAsyncTransport goes through the shared google-genai Client's `.aio`
+surface, so every async call reuses the one HTTP connection pool the Client
+owns. FakeAsyncTransport answers from a Python callable instead, for offline
+tests and dry runs; install either with gemini_client.set_async_transport()."""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+from typing import Callable
+
+
+class AsyncGeminiTransport(ABC):
+    """The three operations the async calls need. Subclasses must implement
+    all of them; a missing one fails when the transport is created."""
+
+    @abstractmethod
+    async def generate_content(self, *, model: str, contents, config): ...
+
+    @abstractmethod
+    async def upload_file(self, *, file: str, config): ...
+
+    @abstractmethod
+    async def delete_file(self, *, name: str) -> None: ...
+
+
+class GenaiAsyncTransport(AsyncGeminiTransport):
+    """Real transport: delegates to client.aio (one pooled HTTP client)."""
+
+    def __init__(self, client) -> None:
+        self._aio = client.aio
+
+    async def generate_content(self, *, model: str, contents, config):
+        return await self._aio.models.generate_content(
+            model=model, contents=contents, config=config
+        )
+
+    async def upload_file(self, *, file: str, config):
+        return await self._aio.files.upload(file=file, config=config)
+
+    async def delete_file(self, *, name: str) -> None:
+        await self._aio.files.delete(name=name)
+
+
+def fake_response(
+    text: str,
+    prompt_tokens: int = 0,
+    output_tokens: int = 0,
+    cached_tokens: int = 0,
+    thinking_tokens: int = 0,
+):
+    """A response object shaped like the SDK's (text, candidates, usage_metadata)."""
+    part = SimpleNamespace(text=text, thought=False)
+    return SimpleNamespace(
+        text=text,
+        candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))],
+        usage_metadata=SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            cached_content_token_count=cached_tokens,
+            candidates_token_count=output_tokens,
+            thoughts_token_count=thinking_tokens,
+        ),
+    )
+
+
+class FakeAsyncTransport(AsyncGeminiTransport):
+    """Offline transport. responder(model, contents, config) returns either a
+    response object or a plain string (wrapped with fake_response). Every
+    request is kept in .requests; uploads get fake URIs and are tracked in
+    .uploaded until deleted."""
+
+    def __init__(self, responder: Callable) -> None:
+        self._responder = responder
+        self.requests: list[dict] = []
+        self.uploaded: dict[str, str] = {}
+
+    async def generate_content(self, *, model: str, contents, config):
+        self.requests.append({"model": model, "contents": contents, "config": config})
+        result = self._responder(model, contents, config)
+        return fake_response(result) if isinstance(result, str) else result
+
+    async def upload_file(self, *, file: str, config):
+        name = f"files/fake-{len(self.uploaded) + 1}"
+        self.uploaded[name] = file
+        return SimpleNamespace(name=name, uri=f"https://fake.invalid/{name}")
+
+    async def delete_file(self, *, name: str) -> None:
+        self.uploaded.pop(name, None)
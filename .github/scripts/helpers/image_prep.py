@@ -0,0 +1,186 @@
+"""Shrink images before they go to Gemini vision.
+
+Many CLMS figures are multi-megabyte PNG screenshots and maps. Anything over
+the 4 MB inline limit costs a temp file, a Files API upload and a delete, and
+Gemini scales the pixels down to fit MAX_EDGE x MAX_EDGE anyway. So before a
+vision call, prepare_image() downscales images over REENCODE_ABOVE_BYTES to
+that size. It re-encodes them as WebP or JPEG when the result is smaller,
+and always does so for formats Gemini doesn't take (GIF/BMP/TIFF). Smaller
+images in a supported format are sent as they are.
+
+Results are cached by source MD5 and settings under .llm_cache/prepared_images/
+(gitignored: binary and cheap to rebuild), so a retry or a re-run doesn't
+decode the image again. Pillow is optional: without it images are sent
+unchanged, as before."""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+try:
+    from PIL import Image
+except ImportError:  # optional: images are sent unchanged
+    Image = None
+
+# helpers/ -> scripts/ -> .github/ -> repo root
+PREP_CACHE_DIR = Path(__file__).resolve().parents[3] / ".llm_cache" / "prepared_images"
+MAX_EDGE = 3072  # Gemini fits larger images into 3072x3072 before tiling
+REENCODE_ABOVE_BYTES = 512 * 1024  # smaller supported images go as they are
+LOSSY_QUALITY = 90  # text in tables and legends stays legible
+SUPPORTED_MIME_TYPES = {"image/png", "image/jpeg", "image/webp"}
+_SUFFIX = {"image/png": ".png", "image/jpeg": ".jpg", "image/webp": ".webp"}
+# Part of every cache name, so changing a setting re-prepares everything.
+_SETTINGS = hashlib.sha256(
+    f"{MAX_EDGE}:{REENCODE_ABOVE_BYTES}:{LOSSY_QUALITY}".encode()
+).hexdigest()[:8]
+
+
+@dataclass
+class PreparedImage:
+    data: bytes
+    mime_type: str
+    original_bytes: int
+
+    @property
+    def suffix(self) -> str:
+        return _SUFFIX.get(self.mime_type, ".png")
+
+
+class PrepStats:
+    """Per-run totals for the summary."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.images = 0
+        self.reencoded = 0
+        self.cache_hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def add(self, prepared: PreparedImage, reencoded: bool, cache_hit: bool) -> None:
+        with self._lock:
+            self.images += 1
+            self.reencoded += reencoded
+            self.cache_hits += cache_hit
+            self.bytes_in += prepared.original_bytes
+            self.bytes_out += len(prepared.data)
+
+    def print_summary(self) -> None:
+        if not self.reencoded:
+            return
+        saved = self.bytes_in - self.bytes_out
+        print(
+            f"  Images re-encoded         : {self.reencoded}/{self.images} "
+            f"({saved / 1024 / 1024:.1f} MB smaller, {self.cache_hits} from cache)"
+        )
+
+
+prep_stats = PrepStats()
+
+
+def _has_alpha(img) -> bool:
+    return img.mode in ("RGBA", "LA", "PA") or (
+        img.mode == "P" and "transparency" in img.info
+    )
+
+
+def _encode(img, fmt: str) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "JPEG":
+        img.convert("RGB").save(buf, "JPEG", quality=LOSSY_QUALITY, optimize=True)
+    else:
+        mode = "RGBA" if _has_alpha(img) else "RGB"
+        img.convert(mode).save(buf, "WEBP", quality=LOSSY_QUALITY, method=4)
+    return buf.getvalue()
+
+
+def _reencode(data: bytes, mime_type: str) -> "tuple[bytes, str] | None":
+    """The smallest acceptable encoding of data, or None to send it as is."""
+    with Image.open(io.BytesIO(data)) as img:
+        if getattr(img, "n_frames", 1) > 1:
+            return None  # animation: leave it to Gemini
+        img.load()
+        resized = max(img.size) > MAX_EDGE
+        if resized:
+            img.thumbnail((MAX_EDGE, MAX_EDGE), Image.LANCZOS)
+        candidates = [(_encode(img, "WEBP"), "image/webp")]
+        if not _has_alpha(img):
+            candidates.append((_encode(img, "JPEG"), "image/jpeg"))
+    best = min(candidates, key=lambda c: len(c[0]))
+    if resized or mime_type not in SUPPORTED_MIME_TYPES or len(best[0]) < len(data):
+        return best
+    return None
+
+
+def _cache_paths(cache_dir: Path, md5: str) -> dict:
+    stem = f"{md5}-{_SETTINGS}"
+    paths = {mime: cache_dir / f"{stem}{suffix}" for mime, suffix in _SUFFIX.items()}
+    paths["original"] = cache_dir / f"{stem}.orig"  # marker: original was best
+    return paths
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".prep-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def prepare_image(
+    image_path: "Path | str", mime_type: str, cache_dir: Path = PREP_CACHE_DIR
+) -> PreparedImage:
+    """The bytes and MIME type to send for image_path. Falls back to the
+    file as it is when Pillow is missing or can't read it."""
+    data = Path(image_path).read_bytes()
+    needed = len(data) > REENCODE_ABOVE_BYTES or mime_type not in SUPPORTED_MIME_TYPES
+    if Image is None or not needed:
+        prepared = PreparedImage(data, mime_type, len(data))
+        prep_stats.add(prepared, reencoded=False, cache_hit=False)
+        return prepared
+
+    paths = _cache_paths(Path(cache_dir), hashlib.md5(data).hexdigest())
+    if paths["original"].exists():
+        prepared = PreparedImage(data, mime_type, len(data))
+        prep_stats.add(prepared, reencoded=False, cache_hit=True)
+        return prepared
+    for cached_mime in _SUFFIX:
+        try:
+            cached = paths[cached_mime].read_bytes()
+        except OSError:
+            continue
+        prepared = PreparedImage(cached, cached_mime, len(data))
+        prep_stats.add(prepared, reencoded=True, cache_hit=True)
+        return prepared
+
+    try:
+        best = _reencode(data, mime_type)
+    except Exception as e:  # unreadable or exotic file: send it unchanged
+        print(f"    [WARNING] Could not prepare {Path(image_path).name}: {e}")
+        best = None
+    try:
+        if best is None:
+            _write_atomic(paths["original"], b"")
+        else:
+            _write_atomic(paths[best[1]], best[0])
+    except OSError as e:
+        print(f"    [WARNING] Could not cache prepared image: {e}")
+
+    if best is None:
+        prepared = PreparedImage(data, mime_type, len(data))
+        prep_stats.add(prepared, reencoded=False, cache_hit=False)
+    else:
+        prepared = PreparedImage(best[0], best[1], len(data))
+        prep_stats.add(prepared, reencoded=True, cache_hit=False)
+    return prepared
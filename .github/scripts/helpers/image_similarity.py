@@ -0,0 +1,194 @@
+"""Perceptual near-duplicate detection for DOCS images (describe_images.py).
+
+The same logo, legend or flowchart is re-exported at a new resolution into the
+*-media/ folder of every _vN of a document, so exact-MD5 dedup still sends
+each copy to Gemini. A difference hash (dHash) survives rescaling and
+re-encoding: the image is flattened onto white, greyed, shrunk to
+(HASH_SIZE + 1) x HASH_SIZE, and each bit says whether a pixel is brighter
+than its right-hand neighbour. Two images are the same visual when their
+hashes differ in at most max_distance bits and their aspect ratios agree.
+
+HASH_SIZE is 16 (256 bits) rather than the usual 8, so tables and charts that
+share a layout but not their content stay apart. Near-blank images (too few
+edges to tell apart) are never matched.
+
+Signatures are cached by MD5 in .llm_cache/images/dhash.jsonl, committed with
+the descriptions, so each image is decoded once. Pillow is optional: without
+it nothing is hashed and every image is described on its own, as before."""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from helpers.jsonl_store import JsonlStore
+
+try:
+    from PIL import Image
+except ImportError:  # optional: no near-duplicate reuse
+    Image = None
+
+HASH_SIZE = 16
+HASH_BITS = HASH_SIZE * HASH_SIZE
+DEFAULT_MAX_DISTANCE = 4  # of HASH_BITS; at 6, step badges "6" and "7" match
+ASPECT_TOLERANCE = 0.03  # relative difference in width / height
+MIN_EDGE_BITS = 16  # fewer set (or unset) bits than this: near-blank
+HASH_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+_ALGORITHM = f"dhash{HASH_SIZE}"  # stored with each signature
+
+
+def _popcount(value: int) -> int:
+    return bin(value).count("1")
+
+
+@dataclass(frozen=True)
+class Signature:
+    bits: int
+    width: int
+    height: int
+
+    @property
+    def informative(self) -> bool:
+        return MIN_EDGE_BITS <= _popcount(self.bits) <= HASH_BITS - MIN_EDGE_BITS
+
+    def distance(self, other: "Signature") -> int:
+        return _popcount(self.bits ^ other.bits)
+
+    def same_shape(self, other: "Signature") -> bool:
+        a = self.width / max(1, self.height)
+        b = other.width / max(1, other.height)
+        return abs(a - b) <= ASPECT_TOLERANCE * max(a, b)
+
+
+def dhash(image_path: "Path | str") -> Signature:
+    """The dHash signature of one image file (raises if Pillow can't read it)."""
+    with Image.open(image_path) as img:
+        width, height = img.size
+        img.draft("RGB", (HASH_SIZE * 8, HASH_SIZE * 8))  # JPEG: decode smaller
+        rgba = img.convert("RGBA")
+    flat = Image.new("RGBA", rgba.size, "white")
+    flat.alpha_composite(rgba)
+    # No reducing_gap: its intermediate box reduction adds ringing that flips
+    # the bits of flat regions (white backgrounds) between rescaled copies.
+    small = flat.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS)
+    px = small.tobytes()
+    bits = 0
+    for row in range(HASH_SIZE):
+        base = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            bits = (bits << 1) | (px[base + col] > px[base + col + 1])
+    return Signature(bits, width, height)
+
+
+class SignatureCache:
+    """{md5: Signature} over a JsonlStore; misses are hashed in parallel."""
+
+    def __init__(self, path: "Path | str") -> None:
+        self.store = JsonlStore(path, "image dHash cache")
+
+    @staticmethod
+    def _decode(value) -> "Signature | None":
+        if not isinstance(value, dict) or value.get("algorithm") != _ALGORITHM:
+            return None
+        return Signature(int(value["dhash"], 16), value["width"], value["height"])
+
+    def get(self, md5: str) -> "Signature | None":
+        return self._decode(self.store.get(md5))
+
+    def items(self) -> Iterator[tuple]:
+        for md5, value in self.store.items():
+            signature = self._decode(value)
+            if signature is not None:
+                yield md5, signature
+
+    def signatures(self, paths: dict, workers: int = HASH_WORKERS) -> dict:
+        """{md5: Signature} for {md5: image path}, hashing and recording the
+        ones not cached yet. Unreadable images (or no Pillow) are left out."""
+        found = {md5: self.get(md5) for md5 in paths}
+        missing = [md5 for md5, signature in found.items() if signature is None]
+        found = {md5: s for md5, s in found.items() if s is not None}
+        if not missing or Image is None:
+            return found
+
+        def _hash(md5):
+            try:
+                return md5, dhash(paths[md5])
+            except Exception as e:
+                print(f"    [WARNING] Could not hash {Path(paths[md5]).name}: {e}")
+                return md5, None
+
+        records = []
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for md5, signature in pool.map(_hash, missing):
+                if signature is None:
+                    continue
+                found[md5] = signature
+                records.append(
+                    (
+                        md5,
+                        {
+                            "algorithm": _ALGORITHM,
+                            "dhash": f"{signature.bits:0{HASH_BITS // 4}x}",
+                            "width": signature.width,
+                            "height": signature.height,
+                        },
+                    )
+                )
+        self.store.put_many(records)
+        return found
+
+
+class NearDuplicateIndex:
+    """Signatures indexed for "what is within max_distance bits?" lookups.
+
+    Two hashes within d bits agree exactly on at least one of d + 1 bands
+    (pigeonhole), so a lookup only compares keys sharing a band with it."""
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE) -> None:
+        self.max_distance = max_distance
+        n = min(max_distance + 1, HASH_BITS)
+        self._bands = [(i * HASH_BITS // n, (i + 1) * HASH_BITS // n) for i in range(n)]
+        self._tables: list = [{} for _ in self._bands]
+        self._signatures: dict = {}
+        self._rank: dict = {}  # insertion order, for ties
+
+    def _band_values(self, bits: int) -> Iterator[int]:
+        for lo, hi in self._bands:
+            yield (bits >> lo) & ((1 << (hi - lo)) - 1)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def add(self, key: str, signature: Signature) -> bool:
+        """Index key; near-blank signatures are skipped (returns False)."""
+        if not signature.informative or key in self._signatures:
+            return False
+        self._signatures[key] = signature
+        self._rank[key] = len(self._rank)
+        for table, value in zip(self._tables, self._band_values(signature.bits)):
+            table.setdefault(value, []).append(key)
+        return True
+
+    def nearest(self, signature: Signature) -> "tuple[str, int] | None":
+        """(key, distance) of the closest indexed image of the same shape
+        within max_distance, earliest added on a tie; None if there is none."""
+        if not signature.informative:
+            return None
+        seen, best = set(), None
+        for table, value in zip(self._tables, self._band_values(signature.bits)):
+            for key in table.get(value, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                other = self._signatures[key]
+                distance = signature.distance(other)
+                if distance > self.max_distance or not signature.same_shape(other):
+                    continue
+                if best is None or distance < best[1] or (
+                    distance == best[1] and self._rank[key] < self._rank[best[0]]
+                ):
+                    best = (key, distance)
+        return best
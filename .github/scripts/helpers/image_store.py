@@ -0,0 +1,165 @@
+"""Image descriptions keyed by image MD5, read through one manifest.
+
+describe_images.py writes one raw <md5>.json per image into .llm_cache/images/
+and the build-time injector looks them up per image. Opening a file per lookup
+doesn't scale with the media library, so every description is also indexed in
+.llm_cache/images/manifest.jsonl (a JsonlStore of md5 -> {image_type,
+description}). The manifest is read once per process; lookups are then dict
+hits with no per-image file I/O.
+
+Raw files stay the per-image record and live either flat (<md5>.json) or in a
+two-level shard (ab/cd/<md5>.json); index_image_cache.py moves them between
+the two. Opening the store lists the raw files once (names only) and indexes
+any the manifest doesn't know yet, so raw files written by an older describer
+or merged from another branch are picked up without a rebuild. Editing an
+indexed raw file by hand needs index_image_cache.py --rebuild."""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+
+from helpers.jsonl_store import JsonlStore
+
+MANIFEST_FILE = "manifest.jsonl"
+_RAW_NAME_RE = re.compile(r"^[0-9a-f]{32}\.json$")
+_SHARD_DIR_RE = re.compile(r"^[0-9a-f]{2}$")
+
+
+def raw_path(cache_dir: Path, md5: str, shard: bool) -> Path:
+    """Where the raw JSON for md5 lives in the flat or sharded layout."""
+    if shard:
+        return Path(cache_dir) / md5[:2] / md5[2:4] / f"{md5}.json"
+    return Path(cache_dir) / f"{md5}.json"
+
+
+def scan_raw_files(cache_dir: Path) -> dict:
+    """{md5: path} of every raw description file, flat or sharded. Lists
+    directories only; no file is opened."""
+    found = {}
+
+    def _walk(directory, depth):
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+        for entry in entries:
+            if entry.is_file() and _RAW_NAME_RE.match(entry.name):
+                found.setdefault(entry.name[:-5], Path(entry.path))
+            elif depth < 2 and entry.is_dir() and _SHARD_DIR_RE.match(entry.name):
+                _walk(entry.path, depth + 1)
+
+    _walk(cache_dir, 0)
+    return found
+
+
+def read_raw_file(path: Path) -> "dict | None":
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or not data.get("description"):
+        return None
+    return {"image_type": data.get("image_type", ""), "description": data["description"]}
+
+
+class ImageDescriptionStore:
+    """{md5: {"image_type", "description"}} for one .llm_cache/images dir.
+
+    shard picks the layout new raw files are written in; None follows the
+    layout already on disk (sharded as soon as any shard directory exists).
+    A read_only store (the build-time injector) keeps unindexed raw files in
+    memory instead of appending them to the manifest."""
+
+    def __init__(
+        self,
+        cache_dir: "Path | str",
+        shard: "bool | None" = None,
+        read_only: bool = False,
+    ) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.manifest = JsonlStore(self.cache_dir / MANIFEST_FILE, "image manifest")
+        self.read_only = read_only
+        self._shard = shard
+        self._lock = threading.Lock()
+        self._raw: dict | None = None
+        self._unindexed: dict = {}
+
+    def _synced(self) -> dict:
+        """Index raw files the manifest is missing, once per process."""
+        with self._lock:
+            if self._raw is None:
+                self._raw = scan_raw_files(self.cache_dir)
+                missing = [md5 for md5 in self._raw if md5 not in self.manifest]
+                records = []
+                for md5 in missing:
+                    entry = read_raw_file(self._raw[md5])
+                    if entry:
+                        records.append((md5, entry))
+                if records and self.read_only:
+                    self._unindexed = dict(records)
+                elif records:
+                    self.manifest.put_many(records)
+                    print(f"[IMAGES] Indexed {len(records)} raw description(s) into the manifest")
+            return self._raw
+
+    @property
+    def shard(self) -> bool:
+        if self._shard is None:
+            raw = self._synced()
+            self._shard = any(p.parent != self.cache_dir for p in raw.values())
+        return self._shard
+
+    def get(self, md5: str) -> "dict | None":
+        self._synced()
+        entry = self.manifest.get(md5)
+        return entry if entry is not None else self._unindexed.get(md5)
+
+    def description(self, md5: str) -> "str | None":
+        entry = self.get(md5)
+        return (entry or {}).get("description") or None
+
+    def __contains__(self, md5: str) -> bool:
+        return self.get(md5) is not None
+
+    def __len__(self) -> int:
+        self._synced()
+        return len(self.manifest) + len(self._unindexed)
+
+    def put(self, md5: str, image_type: str, description: str) -> None:
+        """Write the raw file, then index it."""
+        raw = self._synced()
+        entry = {"image_type": image_type, "description": description}
+        path = raw_path(self.cache_dir, md5, self.shard)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+        with self._lock:
+            raw[md5] = path
+        self.manifest.put(md5, entry)
+
+    def delete(self, md5: str) -> bool:
+        """Drop md5 from the manifest and remove its raw file."""
+        raw = self._synced()
+        with self._lock:
+            path = raw.pop(md5, None)
+        if path is not None:
+            path.unlink(missing_ok=True)
+        existed = md5 in self.manifest
+        self.manifest.delete(md5)
+        return existed or path is not None
+
+
+_image_stores: dict = {}
+
+
+def image_description_store(
+    cache_dir: Path, read_only: bool = False
+) -> ImageDescriptionStore:
+    """The process-wide ImageDescriptionStore for cache_dir."""
+    key = (Path(cache_dir).resolve(), read_only)
+    if key not in _image_stores:
+        _image_stores[key] = ImageDescriptionStore(key[0], read_only=read_only)
+    return _image_stores[key]
@@ -0,0 +1,183 @@
+"""Append-only JSONL key/value file with an in-memory index.
+
+Every put() appends one {"key": ..., "value": ...} line (value null deletes),
+so a write never rewrites the file and the git diff of a run is just the lines
+it added. The whole file is read once per process into a dict where the last
+line for a key wins; a torn last line from an interrupted writer is skipped,
+and the next append starts on a fresh line so its own record survives.
+compact() rewrites the file with one line per live key, sorted, once
+superseded lines outnumber live ones.
+
+Appends and compaction take an exclusive flock on a sidecar .lock file (see
+quota_ledger), so concurrent processes never interleave partial lines."""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: no cross-process locking, still atomic compaction
+    fcntl = None
+
+
+class JsonlStore:
+    """{key: JSON value} over an append-only JSONL file at path. Values read
+    before being overwritten since the last compaction stay available through
+    superseded(), e.g. to find an earlier version by content."""
+
+    def __init__(self, path: "Path | str", label: str = "JSONL store") -> None:
+        self.path = Path(path)
+        self.label = label
+        self._lock_path = self.path.with_name(self.path.name + ".lock")
+        self._lock = threading.Lock()
+        self._live: dict | None = None
+        self._superseded: list = []
+        self._lines = 0
+
+    @contextmanager
+    def _file_locked(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _append(self, lines: list) -> None:
+        """Append lines under the file lock, first ending a torn last line
+        left by an interrupted writer so the new records aren't glued to it."""
+        data = "".join(line + "\n" for line in lines).encode("utf-8")
+        with self._file_locked():
+            with self.path.open("a+b") as f:
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        data = b"\n" + data
+                f.write(data)
+
+    def _read(self) -> tuple[dict, list, int]:
+        live, superseded, lines = {}, [], 0
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        key = record["key"]
+                    except (ValueError, KeyError, TypeError):
+                        continue  # torn or foreign line
+                    lines += 1
+                    old = live.pop(key, None)
+                    if old is not None:
+                        superseded.append(old)
+                    if record.get("value") is not None:
+                        live[key] = record["value"]
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"[WARNING] Could not load {self.label}: {e}")
+        return live, superseded, lines
+
+    def _loaded(self) -> dict:
+        """The live dict, reading the file on first use (caller holds the lock)."""
+        if self._live is None:
+            self._live, self._superseded, self._lines = self._read()
+        return self._live
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            return self._loaded().get(key, default)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._loaded()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._loaded())
+
+    def items(self) -> list:
+        with self._lock:
+            return list(self._loaded().items())
+
+    def superseded(self) -> list:
+        with self._lock:
+            self._loaded()
+            return list(self._superseded)
+
+    def put(self, key: str, value) -> None:
+        """Set key (value None deletes it) and append the change to the file.
+        Writing the value a key already has is a no-op."""
+        with self._lock:
+            live = self._loaded()
+            old = live.get(key)
+            if old == value:
+                return
+            line = json.dumps({"key": key, "value": value}, ensure_ascii=False)
+            self._append([line])
+            self._lines += 1
+            if old is not None:
+                self._superseded.append(old)
+                del live[key]
+            if value is not None:
+                live[key] = value
+
+    def delete(self, key: str) -> None:
+        self.put(key, None)
+
+    def put_many(self, records: "Iterator[tuple] | list") -> int:
+        """put() for many (key, value) pairs with one append. Returns how many
+        changed something."""
+        with self._lock:
+            live = self._loaded()
+            lines = []
+            for key, value in records:
+                old = live.get(key)
+                if old == value:
+                    continue
+                lines.append(json.dumps({"key": key, "value": value}, ensure_ascii=False))
+                if old is not None:
+                    self._superseded.append(old)
+                    del live[key]
+                if value is not None:
+                    live[key] = value
+            if lines:
+                self._append(lines)
+                self._lines += len(lines)
+            return len(lines)
+
+    def compact(self, force: bool = False) -> bool:
+        """Rewrite the file with one sorted line per live key when superseded
+        lines outnumber live ones (or force). Re-reads the file under the file
+        lock first, so other processes' appends are kept. Returns whether it
+        rewrote the file."""
+        with self._lock:
+            self._loaded()
+            if not force and self._lines - len(self._live) <= len(self._live):
+                return False
+            with self._file_locked():
+                live, _, _ = self._read()
+                fd, tmp = tempfile.mkstemp(
+                    dir=self.path.parent, prefix=".jsonl-", suffix=".tmp"
+                )
+                try:
+                    with os.fdopen(fd, "w", encoding="utf-8") as f:
+                        for key in sorted(live):
+                            record = {"key": key, "value": live[key]}
+                            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    os.replace(tmp, self.path)
+                except BaseException:
+                    if os.path.exists(tmp):
+                        os.unlink(tmp)
+                    raise
+            self._live, self._superseded, self._lines = live, [], len(live)
+            return True
@@ -0,0 +1,180 @@
+"""Persistent path -> MD5 index for DOCS media, validated by stat.
+
+Image descriptions are keyed by file MD5, and the media tree is hundreds of
+MB, so describe_images.py and the build-time injector used to re-hash every
+image on every run (the injector once per reference, on the build copies).
+This index remembers each hashed file as [size, mtime_ns, dev, inode, md5]
+under its absolute path; a file whose stat still matches costs one stat call.
+
+A miss on the path falls back to the (dev, inode) pair, so files renamed in
+place (build-docs.sh moves DOCS to origin_DOCS) still hit. Copies made with
+shutil.copy2/copytree keep size and mtime but not the inode:
+group_docs_by_category records them with carry(). Misses are hashed in
+parallel by md5_many().
+
+The index lives at .llm_cache/media_md5.json and is gitignored: stat data
+is only meaningful on the machine that recorded it."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# helpers/ -> scripts/ -> .github/ -> repo root
+DEFAULT_INDEX_PATH = Path(__file__).resolve().parents[3] / ".llm_cache" / "media_md5.json"
+HASH_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+CHUNK_SIZE = 1 << 20  # hashlib releases the GIL on large updates
+
+
+def md5_of_file(path: Path) -> str:
+    h = hashlib.md5()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _signature(st: os.stat_result) -> list:
+    return [st.st_size, st.st_mtime_ns, st.st_dev, st.st_ino]
+
+
+class MediaMd5Index:
+    """Thread-safe {absolute path: [size, mtime_ns, dev, inode, md5]}, read
+    from path on first use. Call save() to write it back."""
+
+    def __init__(self, path: "Path | str" = DEFAULT_INDEX_PATH) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: dict | None = None
+        self._by_inode: dict = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def _loaded(self) -> dict:
+        """The entries, reading the file on first use (caller holds the lock)."""
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with self.path.open("r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                data = {}
+            except (OSError, ValueError) as e:
+                print(f"[WARNING] Could not load media MD5 index: {e}")
+                data = {}
+            for key, entry in (data.get("entries") or {}).items():
+                if isinstance(entry, list) and len(entry) == 5:
+                    self._entries[key] = entry
+                    self._by_inode[(entry[2], entry[3])] = key
+        return self._entries
+
+    def _record(self, key: str, sig: list, md5: str) -> None:
+        """Caller holds the lock."""
+        entries = self._loaded()
+        entries[key] = sig + [md5]
+        self._by_inode[(sig[2], sig[3])] = key
+        self._dirty = True
+
+    def lookup(self, path: "Path | str") -> "str | None":
+        """The MD5 of path if its stat matches an entry; never reads the file.
+        Raises OSError if path can't be stat'ed."""
+        key = os.path.abspath(path)
+        sig = _signature(os.stat(key))
+        with self._lock:
+            entries = self._loaded()
+            entry = entries.get(key)
+            if entry is None:
+                moved_from = self._by_inode.get((sig[2], sig[3]))
+                entry = entries.get(moved_from) if moved_from else None
+            if entry is None or entry[:4] != sig:
+                return None
+            if key not in entries:
+                self._record(key, sig, entry[4])
+            self.hits += 1
+            return entry[4]
+
+    def md5(self, path: "Path | str") -> str:
+        """The MD5 of path, hashing it only when the index can't vouch for it.
+        Raises OSError if the file can't be read."""
+        return self.md5_many([path], workers=1, strict=True)[path]
+
+    def md5_many(self, paths, workers: int = HASH_WORKERS, strict: bool = False) -> dict:
+        """{path: md5} for paths, hashing the misses in parallel. Unreadable
+        files map to None (or raise OSError when strict)."""
+        results, misses = {}, []
+        for path in dict.fromkeys(paths):
+            try:
+                results[path] = self.lookup(path)
+            except OSError:
+                if strict:
+                    raise
+                results[path] = None
+                continue
+            if results[path] is None:
+                misses.append(path)
+
+        def _hash(path):
+            # Stat before reading: if the file changes meanwhile, the stored
+            # signature is the old one and the next lookup re-hashes.
+            key = os.path.abspath(path)
+            sig = _signature(os.stat(key))
+            return key, sig, md5_of_file(key)
+
+        if misses:
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(misses)))) as pool:
+                futures = [(path, pool.submit(_hash, path)) for path in misses]
+                for path, future in futures:
+                    try:
+                        key, sig, md5 = future.result()
+                    except OSError:
+                        if strict:
+                            raise
+                        results[path] = None
+                        continue
+                    with self._lock:
+                        self._record(key, sig, md5)
+                        self.misses += 1
+                    results[path] = md5
+        return results
+
+    def carry(self, src: "Path | str", dst: "Path | str") -> bool:
+        """Record dst, a stat-preserving copy of src, under src's MD5 without
+        hashing it. Returns False when src isn't indexed or dst differs."""
+        try:
+            md5 = self.lookup(src)
+            if md5 is None:
+                return False
+            src_st, dst_st = os.stat(src), os.stat(dst)
+        except OSError:
+            return False
+        if (src_st.st_size, src_st.st_mtime_ns) != (dst_st.st_size, dst_st.st_mtime_ns):
+            return False
+        with self._lock:
+            self._record(os.path.abspath(dst), _signature(dst_st), md5)
+        return True
+
+    def save(self) -> None:
+        """Write the index back if anything changed, dropping entries whose
+        files are gone (atomic replace)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = {k: v for k, v in self._loaded().items() if os.path.exists(k)}
+            self._dirty = False
+        tmp = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".md5-", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"entries": entries}, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[WARNING] Could not save media MD5 index: {e}")
+            if tmp and os.path.exists(tmp):
+                os.unlink(tmp)
@@ -0,0 +1,201 @@
+"""On-disk ledger of Gemini requests and tokens per UTC day.
+
+The in-process rate limiter forgets everything when a script exits, but the
+deploy workflow runs update_documentation.py and describe_images.py as separate
+processes several times a day. Both record into this one JSON file, which lets
+a run see how much of RPD_LIMIT is really left before it starts.
+
+The file is gitignored, so it is per checkout: the deploy workflow carries it
+between runs of the same branch with actions/cache, but branches don't see
+each other's requests (merging one shared file between develop, test and main
+would conflict on every promotion). Gemini's own 429s remain the backstop.
+
+Writers take an exclusive flock on a sidecar .lock file and replace the JSON
+atomically, so concurrent processes never lose each other's counts. Per-call
+counting goes through DailyQuota, which keeps the counts in memory and only
+writes the file every FLUSH_EVERY requests and at exit."""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: no cross-process locking, still atomic writes
+    fcntl = None
+
+# Days older than this are dropped on every write to keep the file tiny.
+KEEP_DAYS = 7
+# DailyQuota writes its pending counts to the ledger after this many requests.
+FLUSH_EVERY = 25
+
+_EMPTY_DAY = {"requests": 0, "prompt_tokens": 0, "output_tokens": 0}
+
+
+class DailyQuotaExceeded(RuntimeError):
+    """Today's request limit is used up."""
+
+
+def utc_day(now: datetime | None = None) -> str:
+    """The ledger key for *now* (default: the current UTC date), e.g. 2026-01-31."""
+    return (now or datetime.now(timezone.utc)).strftime("%Y-%m-%d")
+
+
+class DailyQuotaLedger:
+    """Per-UTC-day counters shared by every process that points at *path*."""
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self._lock_path = self.path.with_name(self.path.name + ".lock")
+
+    @contextmanager
+    def _locked(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read(self) -> dict:
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] Could not load quota ledger: {e}")
+            return {}
+
+    def _write(self, data: dict) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".quota-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def add(
+        self,
+        requests: int = 0,
+        prompt_tokens: int = 0,
+        output_tokens: int = 0,
+        day: str | None = None,
+    ) -> dict:
+        """Add to today's counters (read-modify-write under the lock) and return
+        the updated day."""
+        day = day or utc_day()
+        cutoff = (
+            datetime.strptime(day, "%Y-%m-%d") - timedelta(days=KEEP_DAYS)
+        ).strftime("%Y-%m-%d")
+        with self._locked():
+            data = self._read()
+            data = {d: v for d, v in data.items() if d > cutoff}
+            counts = {**_EMPTY_DAY, **data.get(day, {})}
+            counts["requests"] += requests
+            counts["prompt_tokens"] += prompt_tokens
+            counts["output_tokens"] += output_tokens
+            data[day] = counts
+            self._write(data)
+        return counts
+
+    def day(self, day: str | None = None) -> dict:
+        """Counters for *day* (default today, UTC); zeros if nothing recorded."""
+        data = self._read()
+        return {**_EMPTY_DAY, **data.get(day or utc_day(), {})}
+
+    def requests_today(self) -> int:
+        return self.day()["requests"]
+
+
+class DailyQuota:
+    """In-memory request quota for one process, synced with a ledger.
+
+    reserve() checks and counts a request in one step under a thread lock, so
+    concurrent callers can't all pass the check and overshoot the limit. Counts
+    are kept in memory and added to the ledger every flush_every requests (and
+    on flush(), e.g. at exit), which also picks up what other processes have
+    recorded since. Across processes the limit can be overshot by at most the
+    requests each one has not flushed yet."""
+
+    def __init__(
+        self, ledger: DailyQuotaLedger, limit: int, flush_every: int = FLUSH_EVERY
+    ) -> None:
+        self.ledger = ledger
+        self.limit = limit
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._day: str | None = None
+        self._recorded = 0  # ledger requests for _day at the last sync
+        self._pending = dict(_EMPTY_DAY)
+
+    def _sync(self) -> None:
+        """Add the pending counts to the ledger and re-read the day's total
+        (caller holds the lock). A ledger that can't be written is skipped:
+        quota accounting must not fail the API call."""
+        day = self._day or utc_day()
+        try:
+            if any(self._pending.values()):
+                counts = self.ledger.add(**self._pending, day=day)
+            else:
+                counts = self.ledger.day(day)
+        except OSError as e:
+            print(f"[WARNING] Could not update quota ledger: {e}")
+            counts = {"requests": self._recorded + self._pending["requests"]}
+        self._recorded = counts["requests"]
+        self._pending = dict(_EMPTY_DAY)
+
+    def _roll_day(self) -> None:
+        today = utc_day()
+        if self._day != today:
+            if self._day is not None:
+                self._sync()  # finish the old day's counts
+            self._day = today
+            self._sync()
+
+    def requests_today(self) -> int:
+        with self._lock:
+            self._roll_day()
+            return self._recorded + self._pending["requests"]
+
+    def reserve(self) -> "int | None":
+        """Count one request against today's limit and return today's total
+        including it, or None (nothing counted) when the limit is reached."""
+        with self._lock:
+            self._roll_day()
+            used = self._recorded + self._pending["requests"]
+            if used >= self.limit:
+                return None
+            self._pending["requests"] += 1
+            if self._pending["requests"] >= self.flush_every:
+                self._sync()
+            return used + 1
+
+    def release(self) -> None:
+        """Give back a reserve()d request that was never sent."""
+        with self._lock:
+            self._pending["requests"] -= 1
+
+    def add_usage(self, prompt_tokens: int = 0, output_tokens: int = 0) -> None:
+        """Count tokens; they reach the ledger with the next flush."""
+        with self._lock:
+            self._pending["prompt_tokens"] += prompt_tokens
+            self._pending["output_tokens"] += output_tokens
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._day is not None and any(self._pending.values()):
+                self._sync()
@@ -0,0 +1,216 @@
+"""Sliding-window rate limiter for the Gemini RPM / TPM / RPD quotas.
+
+One instance (gemini_client.rate_limiter) is shared by every AI script in the
+process, so describe_images, generate_intros and update_versions_and_changelogs
+all draw from the same budget. Each request is remembered with its timestamp,
+so capacity frees up exactly when the oldest request leaves the window instead
+of waiting for a fixed minute boundary.
+
+Callers reserve before the call (acquire / acquire_blocking hand back a
+Reservation holding the estimated tokens) and reconcile once the response's
+real usage is known, so concurrent callers see each other's requests the
+moment they are admitted."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+MINUTE_SECONDS = 60.0
+DAY_SECONDS = 86_400.0
+
+
+class Reservation:
+    """One admitted request. reconcile() swaps the estimated token count for the
+    real one; cancel() gives the slot back when the request was never sent."""
+
+    def __init__(self, limiter: "SlidingWindowRateLimiter", entry: list, waited: float):
+        self._limiter = limiter
+        self._entry = entry
+        self.estimated_tokens = entry[1]
+        self.waited = waited
+
+    @property
+    def tokens(self) -> int:
+        return self._entry[1]
+
+    def reconcile(self, actual_tokens: int) -> None:
+        self._limiter._amend(self._entry, actual_tokens)
+
+    def cancel(self) -> None:
+        self._limiter._remove(self._entry)
+
+
+class SlidingWindowRateLimiter:
+    """Thread-safe limiter over a rolling minute (requests + tokens) and a rolling
+    day (requests). try_acquire never blocks; acquire (async) and acquire_blocking
+    sleep for exactly as long as the windows need to refill. The check and the
+    reservation happen under one lock, so parallel callers can't all pass the
+    check before any of them counts. clock is injectable for tests."""
+
+    def __init__(
+        self,
+        rpm: int,
+        tpm: int,
+        rpd: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rpm = rpm
+        self.tpm = tpm
+        self.rpd = rpd
+        self._clock = clock
+        self._lock = threading.Lock()
+        # [timestamp, tokens] entries — lists so a reservation can amend its
+        # tokens; the same entry object sits in both windows.
+        self._minute: deque = deque()
+        self._minute_tokens = 0
+        self._day: deque = deque()
+        self._total_requests = 0
+        self._total_tokens = 0
+
+    # ------------------------------------------------------------------
+    # Internals (caller holds the lock)
+    # ------------------------------------------------------------------
+    def _prune(self, now: float) -> None:
+        while self._minute and now - self._minute[0][0] >= MINUTE_SECONDS:
+            _, tokens = self._minute.popleft()
+            self._minute_tokens -= tokens
+        while self._day and now - self._day[0][0] >= DAY_SECONDS:
+            self._day.popleft()
+
+    def _wait_needed(self, tokens: int, now: float) -> tuple[float, str]:
+        """(seconds until a request of *tokens* fits, limiting window). (0, "")
+        means it fits right now."""
+        self._prune(now)
+
+        if len(self._day) >= self.rpd:
+            idx = len(self._day) - self.rpd
+            return self._day[idx][0] + DAY_SECONDS - now, "RPD"
+
+        if len(self._minute) >= self.rpm:
+            idx = len(self._minute) - self.rpm
+            return self._minute[idx][0] + MINUTE_SECONDS - now, "RPM"
+
+        # A request bigger than the whole budget is let through once the
+        # window is empty — otherwise it could never run.
+        budget = self.tpm - min(tokens, self.tpm)
+        if self._minute_tokens > budget:
+            freed = 0
+            for ts, used in self._minute:
+                freed += used
+                if self._minute_tokens - freed <= budget:
+                    return ts + MINUTE_SECONDS - now, "TPM"
+
+        return 0.0, ""
+
+    def _record(self, tokens: int, now: float) -> list:
+        entry = [now, tokens]
+        self._minute.append(entry)
+        self._minute_tokens += tokens
+        self._day.append(entry)
+        self._total_requests += 1
+        self._total_tokens += tokens
+        return entry
+
+    def _in_minute_window(self, entry: list) -> bool:
+        return any(e is entry for e in self._minute)
+
+    def _amend(self, entry: list, tokens: int) -> None:
+        with self._lock:
+            delta = tokens - entry[1]
+            if self._in_minute_window(entry):
+                self._minute_tokens += delta
+            entry[1] = tokens
+            self._total_tokens += delta
+
+    def _remove(self, entry: list) -> None:
+        with self._lock:
+            if self._in_minute_window(entry):
+                self._minute = deque(e for e in self._minute if e is not entry)
+                self._minute_tokens -= entry[1]
+            if any(e is entry for e in self._day):
+                self._day = deque(e for e in self._day if e is not entry)
+                self._total_requests -= 1
+                self._total_tokens -= entry[1]
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def time_until_available(self, tokens: int = 0) -> float:
+        """Seconds until a request needing *tokens* would be admitted (0.0 = now)."""
+        with self._lock:
+            wait, _ = self._wait_needed(tokens, self._clock())
+            return max(0.0, wait)
+
+    def try_acquire(self, tokens: int = 0) -> Optional[Reservation]:
+        """Reserve one request of *tokens* if it fits now, else return None.
+        Never blocks."""
+        with self._lock:
+            now = self._clock()
+            wait, _ = self._wait_needed(tokens, now)
+            if wait > 0:
+                return None
+            return Reservation(self, self._record(tokens, now), 0.0)
+
+    def acquire_blocking(
+        self,
+        tokens: int = 0,
+        on_wait: Optional[Callable[[float, str], None]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> Reservation:
+        """Sleep until the request fits and reserve it. on_wait(seconds, window)
+        is called before each sleep (for logging)."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                wait, window = self._wait_needed(tokens, now)
+                if wait <= 0:
+                    return Reservation(self, self._record(tokens, now), waited)
+            if on_wait is not None:
+                on_wait(wait, window)
+            sleep(wait)
+            waited += wait
+
+    async def acquire(
+        self,
+        tokens: int = 0,
+        on_wait: Optional[Callable[[float, str], None]] = None,
+    ) -> Reservation:
+        """Async twin of acquire_blocking — awaits instead of blocking the loop."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                wait, window = self._wait_needed(tokens, now)
+                if wait <= 0:
+                    return Reservation(self, self._record(tokens, now), waited)
+            if on_wait is not None:
+                on_wait(wait, window)
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def record(self, tokens: int = 0) -> Reservation:
+        """Record a request that was made without acquiring first."""
+        with self._lock:
+            now = self._clock()
+            self._prune(now)
+            return Reservation(self, self._record(tokens, now), 0.0)
+
+    def snapshot(self) -> dict:
+        """Current window usage plus process totals, for status lines and summaries."""
+        with self._lock:
+            self._prune(self._clock())
+            return {
+                "requests_minute": len(self._minute),
+                "tokens_minute": self._minute_tokens,
+                "requests_today": len(self._day),
+                "requests_total": self._total_requests,
+                "tokens_total": self._total_tokens,
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+                "rpd": self.rpd,
+            }
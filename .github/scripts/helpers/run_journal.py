@@ -0,0 +1,88 @@
+"""Crash-safe per-item journal for long batch runs (describe_images.py).
+
+A run records its whole work plan first (each item "pending", with what is
+needed to process it without rediscovery), then one line per finished item:
+"done" or "failed" with attempts, latency, tokens and the last error. It is
+a JsonlStore, so every update is one appended line and an interrupted or
+timed-out run leaves a journal that is valid up to its last finished item.
+
+The next run can then work from the journal alone: pending items to resume,
+failed ones to retry. Attempts and tokens accumulate across runs; fields
+named in transient (e.g. the QMD context) are dropped once an item is done,
+so compaction keeps the file small."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Optional
+
+from helpers.jsonl_store import JsonlStore
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+class RunJournal:
+    """{item id: {"status", "attempts", ...}} over an append-only JSONL file."""
+
+    def __init__(
+        self, path: "Path | str", transient: Iterable[str] = (), label: str = "run journal"
+    ) -> None:
+        self.store = JsonlStore(path, label)
+        self.transient = tuple(transient)
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    def plan(self, items: dict) -> int:
+        """Mark {item id: fields} pending, keeping what earlier runs recorded
+        (attempts, tokens, last error). Returns how many lines were written."""
+        records = []
+        for item_id, fields in items.items():
+            entry = dict(self.store.get(item_id) or {})
+            entry.update(fields)
+            entry["status"] = PENDING
+            records.append((item_id, entry))
+        return self.store.put_many(records)
+
+    def record(
+        self,
+        item_id: str,
+        status: str,
+        attempts: int = 0,
+        latency_s: Optional[float] = None,
+        prompt_tokens: int = 0,
+        output_tokens: int = 0,
+        error: Optional[str] = None,
+    ) -> None:
+        """Append the outcome of one item; counters add to earlier runs'."""
+        entry = dict(self.store.get(item_id) or {})
+        entry["status"] = status
+        entry["attempts"] = entry.get("attempts", 0) + attempts
+        entry["prompt_tokens"] = entry.get("prompt_tokens", 0) + prompt_tokens
+        entry["output_tokens"] = entry.get("output_tokens", 0) + output_tokens
+        if latency_s is not None:
+            entry["latency_s"] = round(latency_s, 2)
+        if error:
+            entry["error"] = error
+        else:
+            entry.pop("error", None)
+        if status == DONE:
+            for name in self.transient:
+                entry.pop(name, None)
+        entry["updated"] = self._now()
+        self.store.put(item_id, entry)
+
+    def entries(self, *statuses: str) -> dict:
+        """{item id: entry} with one of statuses (all when none given)."""
+        return {
+            item_id: entry
+            for item_id, entry in self.store.items()
+            if not statuses or entry.get("status") in statuses
+        }
+
+    def compact(self) -> bool:
+        return self.store.compact()
@@ -0,0 +1,106 @@
+"""Schema-constrained JSON answers from Gemini.
+
+Every AI task declares the shape of its answer as a response schema, in the
+OpenAPI subset Gemini accepts: OBJECT / ARRAY / STRING / INTEGER / NUMBER /
+BOOLEAN types with properties, required, items and enum. The schema goes out
+with the request (response_mime_type="application/json" plus
+response_schema, see gemini_client), so the model decodes under it instead
+of following a free-form format from the prompt. The same schema then checks
+the answer in parse_structured(), the one parser every task goes through.
+
+With constrained decoding a malformed answer is in practice a truncated one,
+so a StructuredOutputError usually means the output token cap was hit, not
+that the model ignored the format."""
+
+from __future__ import annotations
+
+import json
+import re
+
+JSON_MIME_TYPE = "application/json"
+
+_FENCE_RE_START = re.compile(r"^```(?:json)?\s*", re.MULTILINE)
+_FENCE_RE_END = re.compile(r"\s*```$", re.MULTILINE)
+
+_PYTHON_TYPES = {
+    "OBJECT": dict,
+    "ARRAY": list,
+    "STRING": str,
+    "INTEGER": int,
+    "NUMBER": (int, float),
+    "BOOLEAN": bool,
+}
+
+
+class StructuredOutputError(ValueError):
+    """An answer that is not JSON or does not match its schema."""
+
+
+def strip_code_fences(text: str) -> str:
+    """Strip a leading ```/```json fence and trailing ``` from a model response."""
+    text = _FENCE_RE_START.sub("", text.strip())
+    return _FENCE_RE_END.sub("", text).strip()
+
+
+def string_schema(enum: "list | None" = None) -> dict:
+    schema = {"type": "STRING"}
+    if enum is not None:
+        schema["enum"] = list(enum)
+    return schema
+
+
+def array_schema(items: dict) -> dict:
+    return {"type": "ARRAY", "items": items}
+
+
+def object_schema(properties: dict, required: "list | None" = None) -> dict:
+    """An OBJECT schema; every property is required unless required is given.
+    Properties keep their order (propertyOrdering), which Gemini also uses
+    as the order to write them in."""
+    return {
+        "type": "OBJECT",
+        "properties": dict(properties),
+        "required": list(properties if required is None else required),
+        "propertyOrdering": list(properties),
+    }
+
+
+def validate(value, schema: dict, path: str = "$") -> list:
+    """Error messages for value against schema (empty when it matches).
+    Properties the schema doesn't list are allowed."""
+    kind = schema.get("type", "").upper()
+    expected = _PYTHON_TYPES.get(kind)
+    if expected is not None and (
+        not isinstance(value, expected) or (kind != "BOOLEAN" and isinstance(value, bool))
+    ):
+        return [f"{path}: expected {kind.lower()}, got {type(value).__name__}"]
+    if "enum" in schema and value not in schema["enum"]:
+        return [f"{path}: {value!r} is not one of {schema['enum']}"]
+
+    errors = []
+    if kind == "OBJECT":
+        properties = schema.get("properties", {})
+        for key in schema.get("required", ()):
+            if key not in value:
+                errors.append(f"{path}: missing {key!r}")
+        for key, subschema in properties.items():
+            if key in value:
+                errors += validate(value[key], subschema, f"{path}.{key}")
+    elif kind == "ARRAY" and "items" in schema:
+        for i, item in enumerate(value):
+            errors += validate(item, schema["items"], f"{path}[{i}]")
+    return errors
+
+
+def parse_structured(text: str, schema: dict):
+    """The JSON value in text (code fences tolerated), checked against schema.
+    Raises StructuredOutputError when it is not JSON or doesn't match."""
+    try:
+        value = json.loads(strip_code_fences(text))
+    except json.JSONDecodeError as e:
+        raise StructuredOutputError(f"not JSON: {e}") from e
+    errors = validate(value, schema)
+    if errors:
+        more = f" (+{len(errors) - 3} more)" if len(errors) > 3 else ""
+        raise StructuredOutputError("; ".join(errors[:3]) + more)
+    return value
@@ -0,0 +1,137 @@
+"""Token counts memoised by content hash.
+
+The same documents and diffs are tokenised several times per run (batching,
+truncation checks, rate-limit estimates) and again on every later run while
+they are unchanged. TokenCountCache keys each count by a SHA-1 of the text, so
+a hit costs one hash instead of a tiktoken encode. An in-process LRU serves
+the run; with a path, counts for texts of at least PERSIST_MIN_CHARS are also
+kept in a JSON file under .llm_cache/ for the next run. That file is a pure
+performance cache: it is gitignored (like media_md5.json) and the deploy
+workflow carries it between runs with actions/cache."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+# Short prompts and snippets are cheap to re-count; only persist big texts.
+PERSIST_MIN_CHARS = 2_000
+DEFAULT_MAX_ENTRIES = 50_000
+# The file keeps only the most recently used counts (a few times the DOCS
+# corpus plus a release's diffs), so it can't grow without bound.
+PERSIST_MAX_ENTRIES = 5_000
+
+
+def content_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class TokenCountCache:
+    """Thread-safe LRU of {content sha1: token count}, optionally backed by a
+    JSON file. namespace (e.g. the encoding name) is part of the file so counts
+    from another tokenizer are never reused."""
+
+    def __init__(
+        self,
+        path: "Path | str | None" = None,
+        namespace: str = "cl100k_base",
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.path = Path(path) if path else None
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._counts: OrderedDict = OrderedDict()
+        self._persistent: set = set()
+        self._loaded = self.path is None
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def attach(self, path: "Path | str") -> None:
+        """Back the cache with path from now on (loaded on the next lookup)."""
+        with self._lock:
+            if self.path == Path(path):
+                return
+            self.path = Path(path)
+            self._loaded = False
+
+    def _load(self) -> None:
+        """Read the persistent file once (caller holds the lock)."""
+        self._loaded = True
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] Could not load token count cache: {e}")
+            return
+        if not isinstance(data, dict) or data.get("namespace") != self.namespace:
+            return
+        for key, count in (data.get("counts") or {}).items():
+            if isinstance(count, int):
+                self._counts[key] = count
+                self._persistent.add(key)
+
+    def _store(self, key: str, count: int, persist: bool) -> None:
+        self._counts[key] = count
+        self._counts.move_to_end(key)
+        if persist and self.path is not None:
+            self._persistent.add(key)
+            self._dirty = True
+        while len(self._counts) > self.max_entries:
+            old, _ = self._counts.popitem(last=False)
+            self._persistent.discard(old)
+
+    def count(self, text: str, compute: Callable[[str], int]) -> int:
+        """Token count of text, from the cache or compute(text) on a miss."""
+        key = content_key(text)
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            cached = self._counts.get(key)
+            if cached is not None:
+                self._counts.move_to_end(key)
+                self.hits += 1
+                return cached
+        count = compute(text)
+        with self._lock:
+            self.misses += 1
+            self._store(key, count, persist=len(text) >= PERSIST_MIN_CHARS)
+        return count
+
+    def save(self) -> None:
+        """Write the persistent entries back if anything new was counted.
+        Atomic replace; a failure only costs re-tokenising next run."""
+        with self._lock:
+            if self.path is None or not self._dirty:
+                return
+            recent = [k for k in reversed(self._counts) if k in self._persistent]
+            data = {
+                "namespace": self.namespace,
+                # Oldest first, so reloading keeps the LRU order.
+                "counts": {
+                    k: self._counts[k] for k in reversed(recent[:PERSIST_MAX_ENTRIES])
+                },
+            }
+            self._dirty = False
+        tmp = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(
+                dir=self.path.parent, prefix=".tokens-", suffix=".tmp"
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[WARNING] Could not save token count cache: {e}")
+            if tmp and os.path.exists(tmp):
+                os.unlink(tmp)
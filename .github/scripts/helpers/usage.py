@@ -0,0 +1,112 @@
+"""Real token usage from Gemini responses and a per-run ledger of it.
+
+TokenUsage is read straight from a response's usage_metadata (Gemini's own
+tokenizer), so it is what the rate limiter reconciles against and what the
+run summary reports. tiktoken counts stay in use only as pre-call estimates."""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+
+
+@dataclass
+class TokenUsage:
+    """Token counts for one response. prompt_tokens includes cached_tokens;
+    thinking_tokens are billed as output but reported separately."""
+
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    thinking_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.output_tokens + self.thinking_tokens
+
+    @classmethod
+    def from_response(cls, response) -> "TokenUsage | None":
+        """Build from response.usage_metadata, or None when the SDK gave none."""
+        meta = getattr(response, "usage_metadata", None)
+        if meta is None:
+            return None
+
+        def _count(name):
+            value = getattr(meta, name, None)
+            return value if isinstance(value, int) else 0
+
+        return cls(
+            prompt_tokens=_count("prompt_token_count"),
+            cached_tokens=_count("cached_content_token_count"),
+            output_tokens=_count("candidates_token_count"),
+            thinking_tokens=_count("thoughts_token_count"),
+        )
+
+    def __add__(self, other: "TokenUsage") -> "TokenUsage":
+        return TokenUsage(
+            self.prompt_tokens + other.prompt_tokens,
+            self.cached_tokens + other.cached_tokens,
+            self.output_tokens + other.output_tokens,
+            self.thinking_tokens + other.thinking_tokens,
+        )
+
+
+@dataclass
+class _LedgerRow:
+    calls: int = 0
+    items: int = 0
+    usage: TokenUsage = field(default_factory=TokenUsage)
+
+
+class UsageLedger:
+    """Thread-safe per-run totals, keyed by a task label ("versions",
+    "intros-tier2", "images", ...). items is how many files/images a call
+    covered, so the summary shows tokens per item for batch-size tuning."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._rows: dict[str, _LedgerRow] = {}
+
+    def add(self, label: str, usage: "TokenUsage | None", items: int = 1) -> None:
+        with self._lock:
+            row = self._rows.setdefault(label, _LedgerRow())
+            row.calls += 1
+            row.items += items
+            if usage is not None:
+                row.usage = row.usage + usage
+
+    def totals(self) -> TokenUsage:
+        with self._lock:
+            total = TokenUsage()
+            for row in self._rows.values():
+                total = total + row.usage
+            return total
+
+    def rows(self) -> dict:
+        """{label: {"calls", "items", "prompt_tokens", ...}} — a plain-dict copy."""
+        with self._lock:
+            return {
+                label: {
+                    "calls": row.calls,
+                    "items": row.items,
+                    "prompt_tokens": row.usage.prompt_tokens,
+                    "cached_tokens": row.usage.cached_tokens,
+                    "output_tokens": row.usage.output_tokens,
+                    "thinking_tokens": row.usage.thinking_tokens,
+                }
+                for label, row in self._rows.items()
+            }
+
+    def print_summary(self) -> None:
+        rows = self.rows()
+        if not rows:
+            return
+        print("\n📈 Token usage (from Gemini usage_metadata):")
+        for label, r in sorted(rows.items()):
+            per_item = r["prompt_tokens"] // r["items"] if r["items"] else 0
+            print(
+                f"   {label}: {r['calls']} call(s), {r['items']} item(s) — "
+                f"prompt {r['prompt_tokens']:,} (cached {r['cached_tokens']:,}), "
+                f"output {r['output_tokens']:,}, thinking {r['thinking_tokens']:,}, "
+                f"~{per_item:,} prompt tokens/item"
+            )
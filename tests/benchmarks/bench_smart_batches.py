@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Benchmark: best-fit-decreasing batching vs the old greedy packer.
+
+Sizes come from the real DOCS/*.qmd files (tiktoken counts when installed,
+otherwise bytes/4), resampled to release-sized workloads. Both packers run
+with the limits the AI scripts use: version analysis (600k tokens, 15 files)
+and Tier 2 intros (200k tokens, 8 files).
+
+Usage:
+    python tests/benchmarks/bench_smart_batches.py [--files 300] [--seed 1]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / ".github/scripts"))
+
+from helpers.bin_packing import pack_best_fit_decreasing  # noqa: E402
+
+PROMPT_OVERHEAD_TOKENS = 5_000
+SCENARIOS = {
+    "versions (600k / 15 files)": (600_000, 15),
+    "intros tier 2 (200k / 8 files)": (200_000, 8),
+}
+
+
+def legacy_greedy(sizes, max_tokens, max_files):
+    """The previous create_smart_batches: largest first, close on first overflow."""
+    order = sorted(range(len(sizes)), key=lambda i: sizes[i], reverse=True)
+    batches, current, current_tokens = [], [], 0
+    for i in order:
+        full = len(current) >= max_files
+        exceed = current_tokens + sizes[i] + PROMPT_OVERHEAD_TOKENS > max_tokens
+        if (full or exceed) and current:
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += sizes[i]
+    if current:
+        batches.append(current)
+    return batches
+
+
+def docs_token_sizes():
+    try:
+        import tiktoken
+
+        enc = tiktoken.get_encoding("cl100k_base")
+        measure = lambda text: len(enc.encode(text))  # noqa: E731
+        unit = "tiktoken"
+    except ImportError:
+        measure = lambda text: len(text.encode("utf-8")) // 4  # noqa: E731
+        unit = "bytes/4"
+    sizes = [
+        measure(p.read_text(encoding="utf-8", errors="replace"))
+        for p in sorted((ROOT / "DOCS").rglob("*.qmd"))
+    ]
+    return [s for s in sizes if s > 0], unit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    base, unit = docs_token_sizes()
+    if not base:
+        sys.exit("No DOCS/*.qmd files found")
+    print(f"{len(base)} DOCS files measured ({unit}); median {sorted(base)[len(base) // 2]:,} tokens")
+
+    rng = random.Random(args.seed)
+    workloads = [
+        [rng.choice(base) for _ in range(args.files)] for _ in range(args.rounds)
+    ]
+
+    for name, (max_tokens, max_files) in SCENARIOS.items():
+        totals = {"greedy": [0, 0.0], "best-fit": [0, 0.0]}
+        bound = 0
+        for sizes in workloads:
+            t0 = time.perf_counter()
+            greedy = legacy_greedy(sizes, max_tokens, max_files)
+            totals["greedy"][1] += time.perf_counter() - t0
+            totals["greedy"][0] += len(greedy)
+
+            t0 = time.perf_counter()
+            packed = pack_best_fit_decreasing(
+                sizes, max_tokens - PROMPT_OVERHEAD_TOKENS, max_files
+            )
+            totals["best-fit"][1] += time.perf_counter() - t0
+            totals["best-fit"][0] += len(packed.bins)
+            bound += packed.lower_bound
+
+        print(f"\n{name}: {args.rounds} x {args.files} files")
+        print(f"  lower bound   {bound / args.rounds:8.1f} batches")
+        for label, (batches, secs) in totals.items():
+            print(
+                f"  {label:<12}  {batches / args.rounds:8.1f} batches"
+                f"  {secs / args.rounds * 1000:7.2f} ms/pack"
+            )
+
+
+if __name__ == "__main__":
+    main()
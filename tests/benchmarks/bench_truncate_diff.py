@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: single-pass diff truncation vs the old line-by-line one.
+
+Builds a synthetic unified diff of roughly --tokens tokens (many hunks of
+edited prose) and truncates it to --max-tokens with the old implementation
+(full encode + one encode per line from both ends) and with
+helpers.diff_truncation in line and hunk mode. Needs tiktoken for realistic
+numbers; without it a regex tokenizer is used and only relative timing means
+anything.
+
+Usage:
+    python tests/benchmarks/bench_truncate_diff.py [--tokens 900000] [--max-tokens 800000]
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / ".github/scripts"))
+
+from helpers.diff_truncation import truncate_diff  # noqa: E402
+
+
+class RegexEncoding:
+    _TOKEN = re.compile(r"\w+|\s+|[^\w\s]")
+
+    def encode(self, text, disallowed_special=None):
+        return [len(p) for p in self._TOKEN.findall(text)]
+
+    def decode_with_offsets(self, tokens):
+        offsets, pos = [], 0
+        for length in tokens:
+            offsets.append(pos)
+            pos += length
+        return "", offsets
+
+
+def get_encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base"), "tiktoken cl100k_base"
+    except ImportError:
+        return RegexEncoding(), "regex stand-in (tiktoken not installed)"
+
+
+def legacy_truncate(diff, encoding, max_tokens):
+    """The previous truncate_large_diff body."""
+    tokens = len(encoding.encode(diff))
+    if tokens <= max_tokens:
+        return diff
+    half_tokens = (max_tokens - 1000) // 2
+    lines = diff.splitlines(keepends=True)
+    beginning, beginning_tokens = [], 0
+    for line in lines:
+        line_tokens = len(encoding.encode(line))
+        if beginning_tokens + line_tokens > half_tokens:
+            break
+        beginning.append(line)
+        beginning_tokens += line_tokens
+    ending, ending_tokens = [], 0
+    for line in reversed(lines):
+        line_tokens = len(encoding.encode(line))
+        if ending_tokens + line_tokens > half_tokens:
+            break
+        ending.insert(0, line)
+        ending_tokens += line_tokens
+    skipped = len(lines) - len(beginning) - len(ending)
+    return "".join(beginning) + f"\n\n... [{skipped:,} lines omitted] ...\n\n" + "".join(ending)
+
+
+def synthetic_diff(target_tokens, seed):
+    rng = random.Random(seed)
+    words = (
+        "land cover copernicus monitoring product layer raster vector pixel "
+        "resolution validation accuracy dataset metadata nomenclature class"
+    ).split()
+    out = ["diff --git a/DOCS/doc.qmd b/DOCS/doc.qmd\n", "--- a/DOCS/doc.qmd\n", "+++ b/DOCS/doc.qmd\n"]
+    approx, line_no = 0, 1
+    while approx < target_tokens:
+        out.append(f"@@ -{line_no},6 +{line_no},6 @@\n")
+        for _ in range(6):
+            sign = rng.choice("+- ")
+            text = " ".join(rng.choice(words) for _ in range(rng.randint(5, 25)))
+            out.append(f"{sign}{text}.\n")
+            approx += 2 * text.count(" ") + 4
+        line_no += 40
+    return "".join(out)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=900_000)
+    parser.add_argument("--max-tokens", type=int, default=800_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    enc, name = get_encoding()
+    diff = synthetic_diff(args.tokens, args.seed)
+    print(f"Tokenizer: {name}")
+    print(f"Diff: {len(diff) / 1e6:.1f} MB, {len(enc.encode(diff)):,} tokens -> {args.max_tokens:,}")
+
+    runs = {
+        "legacy (per-line encode)": lambda: legacy_truncate(diff, enc, args.max_tokens),
+        "single pass, lines": lambda: truncate_diff(diff, args.max_tokens, enc),
+        "single pass, hunks": lambda: truncate_diff(diff, args.max_tokens, enc, hunk_aware=True),
+    }
+    for label, fn in runs.items():
+        result, secs = timed(fn)
+        print(f"  {label:<26} {secs:7.2f}s  -> {len(enc.encode(result)):,} tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Diff-analysis cache - stored per (blob pair, prompt hash, model), reused on re-runs.
+API calls are replaced with stubs, no real requests.
+"""
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.modules.setdefault("google", MagicMock())
+sys.modules.setdefault("google.genai", sys.modules["google"].genai)
+sys.modules.setdefault("tiktoken", MagicMock())
+
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts"))
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts/ai"))
+
+import pytest
+
+import update_versions_and_changelogs as uv
+from helpers import analysis_cache
+from helpers.analysis_cache import DiffAnalysisCache, analysis_key
+
+DECISION = {
+    "version": {"bump": "minor", "reason": "r", "confidence": "high"},
+    "changelog": {"format": "paragraph", "summary": "s"},
+}
+
+
+class TestDiffAnalysisCache:
+    def test_survives_to_the_next_run(self, tmp_path):
+        path = tmp_path / "diff_analysis.json"
+        key = analysis_key("a" * 40, "b" * 40, "p1", "m")
+        first = DiffAnalysisCache(path)
+        first.put(key, DECISION)
+        first.save()
+
+        second = DiffAnalysisCache(path)
+
+        assert second.get(key) == DECISION
+        assert second.get(analysis_key("a" * 40, "b" * 40, "p2", "m")) is None
+        assert (second.hits, second.misses) == (1, 1)
+
+    def test_keeps_most_recent_entries(self, tmp_path):
+        cache = DiffAnalysisCache(tmp_path / "c.json", max_entries=2)
+        for name in ("one", "two", "three"):
+            cache.put(name, DECISION)
+
+        assert cache.get("one") is None and cache.get("three") == DECISION
+
+    def test_concurrent_saves_keep_the_newest_snapshot(self, tmp_path, monkeypatch):
+        """A slow save of an older snapshot can't replace a newer file"""
+        path = tmp_path / "c.json"
+        cache = DiffAnalysisCache(path)
+        real_dump = analysis_cache.json.dump
+
+        def slow_for_old_snapshots(data, *args, **kwargs):
+            time.sleep(0.02 * (4 - len(data["entries"])))
+            real_dump(data, *args, **kwargs)
+
+        monkeypatch.setattr(analysis_cache.json, "dump", slow_for_old_snapshots)
+
+        def put_and_save(name):
+            cache.put(name, DECISION)
+            cache.save()
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(put_and_save, ["a", "b", "c", "d"]))
+
+        assert len(DiffAnalysisCache(path)) == 4
+
+    def test_clear_removes_the_file(self, tmp_path):
+        path = tmp_path / "c.json"
+        cache = DiffAnalysisCache(path)
+        cache.put("k", DECISION)
+        cache.save()
+
+        assert DiffAnalysisCache(path).clear() == 1
+        assert not path.exists()
+
+
+class TestCachedAnalysis:
+    @pytest.fixture
+    def env(self, tmp_path, monkeypatch):
+        calls = []
+
+        def fake_batch(batch_files, batch_num, total_batches):
+            calls.append(sorted(batch_files))
+            return {fp: DECISION for fp in batch_files}
+
+        monkeypatch.setattr(uv, "analysis_cache", DiffAnalysisCache(tmp_path / "c.json"))
+        monkeypatch.setattr(uv, "process_single_batch", fake_batch)
+        monkeypatch.setattr(uv, "plan_daily_budget", lambda n, label: n)
+        monkeypatch.setattr(
+            uv, "create_smart_batches", lambda files, **kw: [dict(files)] if files else []
+        )
+        monkeypatch.setattr(uv, "DRY_RUN", False)
+        monkeypatch.setattr(uv, "TESTING_MODE", False)
+        return calls
+
+    def test_rerun_costs_no_api_calls(self, env):
+        diffs = {"DOCS/a.qmd": "+a", "DOCS/b.qmd": "+b"}
+        keys = {fp: analysis_key("0", fp, "p", "m") for fp in diffs}
+
+        first = uv.analyze_version_bumps_and_changelogs_batch(diffs, keys)
+        second = uv.analyze_version_bumps_and_changelogs_batch(diffs, keys)
+
+        assert first == second == {fp: DECISION for fp in diffs}
+        assert env == [["DOCS/a.qmd", "DOCS/b.qmd"]]
+
+    def test_only_uncached_files_are_sent(self, env):
+        keys = {"DOCS/a.qmd": "ka", "DOCS/b.qmd": "kb"}
+        uv.analysis_cache.put("ka", DECISION)
+
+        results = uv.analyze_version_bumps_and_changelogs_batch(
+            {"DOCS/a.qmd": "+a", "DOCS/b.qmd": "+b"}, keys
+        )
+
+        assert set(results) == {"DOCS/a.qmd", "DOCS/b.qmd"}
+        assert env == [["DOCS/b.qmd"]]
+
+    def test_error_answers_are_not_stored(self, env, monkeypatch):
+        """An "error" decision is asked again next run instead of replayed"""
+        error = {
+            "version": {"bump": "error", "reason": "r", "confidence": "none"},
+            "changelog": {"format": "error", "summary": "s"},
+        }
+        monkeypatch.setattr(
+            uv, "process_single_batch", lambda files, *a: {fp: error for fp in files}
+        )
+
+        uv.analyze_version_bumps_and_changelogs_batch({"DOCS/a.qmd": "+a"}, {"DOCS/a.qmd": "ka"})
+
+        assert uv.analysis_cache.get("ka") is None
+
+    def test_dry_run_results_are_not_stored(self, env, monkeypatch):
+        monkeypatch.setattr(uv, "DRY_RUN", True)
+
+        uv.analyze_version_bumps_and_changelogs_batch({"DOCS/a.qmd": "+a"}, {"DOCS/a.qmd": "ka"})
+
+        assert uv.analysis_cache.get("ka") is None
@@ -0,0 +1,83 @@
+"""
+Batch helpers - split-on-missing retries and parallel batch execution.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.modules.setdefault("google", MagicMock())
+sys.modules.setdefault("google.genai", sys.modules["google"].genai)
+sys.modules.setdefault("tiktoken", MagicMock())
+
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts"))
+
+import pytest
+
+from helpers.batch_utils import run_batches_with_retry
+
+
+def _echo(sub_batch, num):
+    return {key: (num, value) for key, value in sub_batch.items()}
+
+
+class TestRunBatchesWithRetry:
+    def test_merges_in_batch_order_regardless_of_finish_order(self):
+        """Later batches finishing first don't change the merged order"""
+        batches = [{"a": 1}, {"b": 2}, {"c": 3}]
+
+        def slow_first(sub_batch, num):
+            time.sleep(0.05 * (len(batches) - num))
+            return _echo(sub_batch, num)
+
+        results = run_batches_with_retry(batches, slow_first, max_workers=3)
+
+        assert list(results) == ["a", "b", "c"]
+        assert results["c"] == (3, 3)
+
+    def test_runs_batches_concurrently(self):
+        """Up to max_workers batches are in flight at once"""
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def track(sub_batch, num):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return _echo(sub_batch, num)
+
+        run_batches_with_retry([{i: i} for i in range(6)], track, max_workers=3)
+
+        assert peak[0] == 3
+
+    def test_missing_keys_are_split_within_their_batch(self):
+        """Split-on-missing still works per batch and keeps the batch number"""
+        calls = []
+
+        def drop_all_but_one(sub_batch, num):
+            calls.append((num, sorted(sub_batch)))
+            if len(sub_batch) > 1:
+                return {}
+            return _echo(sub_batch, num)
+
+        results = run_batches_with_retry(
+            [{"a": 1, "b": 2}, {"c": 3}], drop_all_but_one, max_workers=2
+        )
+
+        assert set(results) == {"a", "b", "c"}
+        assert results["b"] == (1, 2)
+        assert (1, ["a", "b"]) in calls and (1, ["a"]) in calls
+
+    def test_first_failing_batch_is_raised(self):
+        def fail_second(sub_batch, num):
+            if num == 2:
+                raise RuntimeError("batch 2 broke")
+            return _echo(sub_batch, num)
+
+        with pytest.raises(RuntimeError, match="batch 2"):
+            run_batches_with_retry([{"a": 1}, {"b": 2}, {"c": 3}], fail_second, max_workers=2)
@@ -0,0 +1,62 @@
+"""
+Best-fit-decreasing batch packing - token, file-count and output limits.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts"))
+
+from helpers.bin_packing import pack_best_fit_decreasing
+
+
+def _bin_sizes(result, sizes):
+    return sorted(sorted(sizes[i] for i in b) for b in result.bins)
+
+
+class TestBestFitDecreasing:
+    def test_fills_earlier_batches_instead_of_closing_them(self):
+        """Greedy first-overflow closing needs 3 batches here; best fit needs 2"""
+        sizes = [60, 50, 40, 30, 20]
+
+        result = pack_best_fit_decreasing(sizes, capacity=100, max_items=10)
+
+        assert len(result.bins) == 2
+        assert _bin_sizes(result, sizes) == [[20, 30, 50], [40, 60]]
+        assert result.lower_bound == 2
+        assert result.efficiency == 1.0
+
+    def test_respects_max_items(self):
+        result = pack_best_fit_decreasing([1] * 10, capacity=100, max_items=4)
+
+        assert [len(b) for b in result.bins] == [4, 4, 2]
+        assert result.lower_bound == 3
+
+    def test_oversized_item_gets_its_own_batch(self):
+        """An item larger than a whole batch is not dropped"""
+        sizes = [500, 10, 10]
+
+        result = pack_best_fit_decreasing(sizes, capacity=100, max_items=10)
+
+        assert _bin_sizes(result, sizes) == [[10, 10], [500]]
+
+    def test_output_budget_splits_batches(self):
+        """Estimated answer tokens are a third limit"""
+        result = pack_best_fit_decreasing(
+            [10] * 6, capacity=1_000, max_items=10, output_sizes=[100] * 6, max_output=250
+        )
+
+        assert [len(b) for b in result.bins] == [2, 2, 2]
+
+    def test_every_item_placed_once_and_deterministic(self):
+        sizes = [37, 12, 88, 12, 5, 61, 40, 40, 3]
+
+        first = pack_best_fit_decreasing(sizes, capacity=100, max_items=3)
+        second = pack_best_fit_decreasing(sizes, capacity=100, max_items=3)
+
+        assert sorted(i for b in first.bins for i in b) == list(range(len(sizes)))
+        assert first.bins == second.bins
+        assert all(sum(sizes[i] for i in b) <= 100 for b in first.bins)
+
+    def test_empty(self):
+        assert pack_best_fit_decreasing([], capacity=100, max_items=3).bins == []
@@ -0,0 +1,120 @@
+"""
+AIMD concurrency controller and throughput meter - no real API calls.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts"))
+
+import pytest
+
+from helpers.concurrency import AimdController, ThroughputMeter
+
+
+class Overloaded(Exception):
+    pass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _controller(clock, **kw):
+    return AimdController(
+        is_overload=lambda exc: isinstance(exc, Overloaded), clock=clock, **kw
+    )
+
+
+async def _call(controller, clock, latency=1.0, exc=None):
+    async with controller.slot():
+        clock.now += latency
+        if exc:
+            raise exc
+
+
+class TestAimdController:
+    def test_healthy_calls_grow_the_limit_additively(self):
+        clock = FakeClock()
+        controller = _controller(clock, initial=2, max_limit=4)
+
+        async def run():
+            for _ in range(8):  # about limit successes per +1
+                await _call(controller, clock)
+
+        asyncio.run(run())
+
+        assert controller.current_limit == 4
+        assert controller.successes == 8
+
+    def test_overload_halves_once_per_cooldown(self):
+        clock = FakeClock()
+        controller = _controller(clock, initial=8)
+
+        async def run():
+            for _ in range(3):  # one burst of 429s
+                with pytest.raises(Overloaded):
+                    await _call(controller, clock, latency=0.1, exc=Overloaded())
+            clock.now += 5
+            with pytest.raises(Overloaded):
+                await _call(controller, clock, exc=Overloaded())
+
+        asyncio.run(run())
+
+        assert controller.current_limit == 2
+        assert controller.overloads == 4 and controller.in_flight == 0
+
+    def test_slow_or_failing_calls_stop_growth(self):
+        clock = FakeClock()
+        controller = _controller(clock, initial=3)
+
+        async def run():
+            await _call(controller, clock, latency=1.0)
+            for _ in range(5):
+                await _call(controller, clock, latency=10.0)
+            grown = controller.limit
+            for _ in range(3):
+                with pytest.raises(ValueError):
+                    await _call(controller, clock, exc=ValueError())
+            await _call(controller, clock, latency=1.0)
+            return grown
+
+        grown = asyncio.run(run())
+
+        assert controller.current_limit == 3
+        assert controller.limit == grown  # neither latency nor errors let it grow
+
+    def test_never_more_in_flight_than_the_limit(self):
+        controller = AimdController(initial=2, max_limit=2)
+        peak = 0
+
+        async def task():
+            nonlocal peak
+            async with controller.slot():
+                peak = max(peak, controller.in_flight)
+                await asyncio.sleep(0.001)
+
+        async def run():
+            await asyncio.gather(*(task() for _ in range(10)))
+
+        asyncio.run(run())
+
+        assert peak == 2 and controller.in_flight == 0
+
+
+class TestThroughputMeter:
+    def test_rate_over_the_window(self):
+        clock = FakeClock()
+        meter = ThroughputMeter(window=60, clock=clock)
+        for _ in range(30):
+            clock.now += 1
+            meter.tick()
+
+        assert meter.per_minute() == pytest.approx(60.0)
+        clock.now += 120
+        assert meter.per_minute() == 0
@@ -0,0 +1,312 @@
+"""
+describe_images - discovery (one indexed pass per .qmd, project folders
+walked in parallel), the run journal behind --resume / --retry-failed,
+near-duplicates reusing a description, batched requests and bulk mode.
+API calls are replaced with stubs, no real requests.
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+sys.modules.setdefault("google", MagicMock())
+sys.modules.setdefault("google.genai", sys.modules["google"].genai)
+sys.modules.setdefault("tiktoken", MagicMock())
+
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts"))
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts/ai"))
+
+import pytest
+
+import describe_images
+from describe_images import _reference_index, discover_images, parse_batch_response
+from helpers import gemini_client
+from helpers.gemini_batch import FakeBatchBackend
+from helpers.media_index import MediaMd5Index
+from helpers.run_journal import RunJournal
+
+
+REAL_DESCRIBE_IMAGE = describe_images.describe_image
+DESCRIPTION = {
+    "image_type": "diagram",
+    "title": "Workflow",
+    "description": "A long enough description. " * 3,
+    "keywords": ["workflow"],
+}
+ANSWER = json.dumps(DESCRIPTION)
+
+
+def _doc(path, body):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(body, encoding="utf-8")
+
+
+def _image(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"png")
+
+
+class TestReferenceIndex:
+    def test_names_are_indexed_from_every_boundary(self):
+        refs = _reference_index(
+            [
+                "intro",
+                "![A](<a-media/my image.png>)",
+                '<img src="a-media/chart.JPG" width=3>',
+                "![B](a-media/my image.png)",
+            ]
+        )
+
+        assert refs["my image.png"] == 1 and refs["image.png"] == 1
+        assert refs["chart.JPG"] == 2
+        assert "intro" not in refs
+
+    def test_brackets_and_quotes_can_be_part_of_a_name(self):
+        refs = _reference_index(["![](fig(1).png)", "see [it's [v2].png]"])
+
+        assert refs["fig(1).png"] == 0 and refs["1).png"] == 0
+        assert refs["it's [v2].png"] == 1 and refs["v2].png"] == 1
+
+
+class TestParseBatchResponse:
+    def test_each_image_is_validated_on_its_own(self):
+        text = json.dumps(
+            {
+                "image_1": DESCRIPTION,
+                "image_2": {**DESCRIPTION, "image_type": "nonsense"},
+                "image_3": {**DESCRIPTION, "description": "short"},
+                "image_7": DESCRIPTION,
+            }
+        )
+
+        parsed = parse_batch_response(text, count=4)
+
+        assert list(parsed) == [1]
+        assert parsed[1][0] == "diagram"
+
+    def test_fenced_answer_is_unwrapped_and_truncated_one_is_empty(self):
+        text = json.dumps({"image_1": DESCRIPTION, "image_2": DESCRIPTION})
+
+        assert sorted(parse_batch_response(f"```json\n{text}\n```", count=2)) == [1, 2]
+        assert parse_batch_response(text[:-40], count=2) == {}
+
+
+class TestDiscoverImages:
+    def test_primary_qmd_then_siblings_then_orphans(self, tmp_path):
+        project = tmp_path / "proj"
+        _doc(project / "a.qmd", "Before A\n![](a-media/one.png)\nAfter A\n")
+        _doc(project / "b.qmd", "Before B\n![](a-media/two.png)\n![](a-media/one.png)\n")
+        for name in ("one.png", "two.png", "three.png", "notes.txt"):
+            _image(project / "a-media" / name)
+        _image(tmp_path / "top-media" / "root.png")
+
+        found = {r["image_path"].name: r for r in discover_images(tmp_path, workers=2)}
+
+        assert sorted(found) == ["one.png", "root.png", "three.png", "two.png"]
+        assert found["one.png"]["qmd_path"] == project / "a.qmd"
+        assert found["one.png"]["context"] == "Before A\nAfter A"
+        assert found["two.png"]["qmd_path"] == project / "b.qmd"
+        assert found["three.png"]["qmd_path"] is None
+        assert found["three.png"]["context"] == ""
+
+    def test_each_qmd_is_read_once(self, tmp_path, monkeypatch):
+        project = tmp_path / "proj"
+        _doc(project / "a.qmd", "\n".join(f"![](a-media/{i}.png)" for i in range(20)))
+        for i in range(20):
+            _image(project / "a-media" / f"{i}.png")
+        reads = []
+        real_init = describe_images._QmdContext.__init__
+
+        def counting_init(self, qmd_path):
+            reads.append(qmd_path)
+            real_init(self, qmd_path)
+
+        monkeypatch.setattr(describe_images._QmdContext, "__init__", counting_init)
+
+        assert len(discover_images(tmp_path)) == 20
+        assert reads == [project / "a.qmd"]
+
+
+class TestRunJournal:
+    @pytest.fixture
+    def env(self, tmp_path, monkeypatch):
+        docs = tmp_path / "DOCS"
+        _doc(docs / "proj" / "a.qmd", "![](a-media/good.png)\n![](a-media/bad.png)\n")
+        (docs / "proj" / "a-media").mkdir(parents=True)
+        (docs / "proj" / "a-media" / "good.png").write_bytes(b"good")
+        (docs / "proj" / "a-media" / "bad.png").write_bytes(b"bad")
+        (docs / "proj" / "a-media" / "later.png").write_bytes(b"later")
+        prompt = tmp_path / "prompt.md"
+        prompt.write_text(
+            "## System Instruction\n```\ns\n```\n## User Prompt\n```\nu\n```\n"
+            "## Optional: Context Injection Block\n```\nc\n```\n"
+        )
+        cache_dir = tmp_path / "cache"
+        calls = []
+
+        async def fake_describe(cache_state, image_path, *args, report=None, **kw):
+            calls.append(image_path.name)
+            report.update(attempts=1, latency_s=0.5, prompt_tokens=10, output_tokens=5)
+            if image_path.name == "bad.png" and not env_state["fixed"]:
+                report["error"] = "unparseable response"
+                return None
+            return ("diagram", "A long enough description of the image for the cache.")
+
+        env_state = {"fixed": False, "budget": 2}
+        monkeypatch.setattr(describe_images, "DOCS_DIR", str(docs))
+        monkeypatch.setattr(describe_images, "CACHE_DIR", str(cache_dir))
+        monkeypatch.setattr(describe_images, "JOURNAL_FILE", str(cache_dir / "journal.jsonl"))
+        monkeypatch.setattr(describe_images, "SIGNATURE_FILE", str(cache_dir / "dhash.jsonl"))
+        monkeypatch.setattr(
+            describe_images, "NEAR_DUPLICATES_FILE", str(cache_dir / "near_duplicates.jsonl")
+        )
+        monkeypatch.setattr(
+            describe_images, "MediaMd5Index", lambda: MediaMd5Index(tmp_path / "md5.json")
+        )
+        monkeypatch.setattr(describe_images, "describe_image", fake_describe)
+        monkeypatch.setattr(describe_images, "setup_gemini", lambda **kw: None)
+        monkeypatch.setattr(describe_images, "_CacheState", MagicMock())
+        monkeypatch.setattr(
+            describe_images, "plan_daily_budget", lambda n, label: min(n, env_state["budget"])
+        )
+        return SimpleNamespace(
+            calls=calls, state=env_state, prompt=prompt, journal=cache_dir / "journal.jsonl"
+        )
+
+    def _run(self, env, *flags):
+        args = describe_images.build_parser().parse_args(
+            ["--prompt-file", str(env.prompt), *flags]
+        )
+        env.calls.clear()
+        asyncio.run(describe_images.run(args))
+        return sorted(env.calls)
+
+    def test_resume_and_retry_work_from_the_journal(self, env, monkeypatch):
+        # bad.png then good.png are described; later.png is deferred by the budget.
+        assert self._run(env) == ["bad.png", "good.png"]
+        journal = RunJournal(env.journal).entries()
+        statuses = sorted(entry["status"] for entry in journal.values())
+        assert statuses == ["done", "failed", "pending"]
+
+        def no_discovery(*a, **kw):
+            raise AssertionError("--resume must not rediscover DOCS")
+
+        monkeypatch.setattr(describe_images, "discover_images", no_discovery)
+        assert self._run(env, "--resume") == ["later.png"]
+
+        env.state["fixed"] = True
+        assert self._run(env, "--retry-failed") == ["bad.png"]
+        entries = RunJournal(env.journal).entries()
+        assert {entry["status"] for entry in entries.values()} == {"done"}
+        retried = next(e for e in entries.values() if e["image_path"].endswith("bad.png"))
+        assert retried["attempts"] == 2 and retried["prompt_tokens"] == 20
+        assert "context" not in retried and "error" not in retried
+
+    def test_near_duplicates_reuse_one_description(self, env, tmp_path):
+        Image = pytest.importorskip("PIL.Image")
+        from PIL import ImageDraw
+
+        media = tmp_path / "DOCS" / "proj" / "a-media"
+        for name in ("good.png", "bad.png", "later.png"):
+            (media / name).unlink()
+        logo = Image.new("RGB", (200, 100), "white")
+        draw = ImageDraw.Draw(logo)
+        draw.ellipse((10, 10, 90, 90), fill="navy", outline="black", width=3)
+        draw.rectangle((110, 20, 190, 80), fill="orange", outline="black", width=3)
+        logo.resize((800, 400), Image.LANCZOS).save(media / "logo.png")
+        logo.save(media / "logo_small.jpg")
+
+        assert len(self._run(env)) == 1
+        store = describe_images.image_description_store(tmp_path / "cache")
+        assert len(store) == 2
+
+        report = describe_images.JsonlStore(tmp_path / "cache" / "near_duplicates.jsonl")
+        [(md5, entry)] = report.items()
+        assert store.description(md5) == store.description(entry["source"])
+        assert {entry["image_path"], entry["source_path"]} == {
+            "DOCS/proj/a-media/logo.png",
+            "DOCS/proj/a-media/logo_small.jpg",
+        }
+        assert {e["status"] for e in RunJournal(env.journal).entries().values()} == {"done"}
+
+    def test_batched_request_falls_back_to_single_images(self, env, monkeypatch):
+        monkeypatch.setattr(describe_images, "describe_image", REAL_DESCRIBE_IMAGE)
+        env.prompt.write_text(
+            env.prompt.read_text()
+            + "## Optional: Batch Instruction Block\n```\n{count} images\n```\n"
+        )
+        batches, singles = [], []
+
+        async def fake_batch(images, instruction, **kw):
+            batches.append((instruction, [path.name for path, _ in images]))
+            assert kw["response_schema"]["required"] == ["image_1", "image_2", "image_3"]
+            return SimpleNamespace(text=json.dumps({"image_1": DESCRIPTION}), usage=None)
+
+        async def fake_single(image_path, **kw):
+            singles.append(image_path.name)
+            return SimpleNamespace(text=ANSWER, usage=None)
+
+        async def no_reservation(tokens):
+            return None
+
+        monkeypatch.setattr(describe_images, "call_gemini_vision_batch_async", fake_batch)
+        monkeypatch.setattr(describe_images, "call_gemini_vision_async", fake_single)
+        monkeypatch.setattr(describe_images, "reserve_api_request_async", no_reservation)
+        monkeypatch.setattr(describe_images, "count_tokens", len)
+        env.state["budget"] = 1  # requests, so the one batch carries all three
+
+        self._run(env, "--batch-size", "3")
+
+        assert batches == [("3 images", ["bad.png", "good.png", "later.png"])]
+        assert sorted(singles) == ["good.png", "later.png"]
+        entries = RunJournal(env.journal).entries()
+        assert {entry["status"] for entry in entries.values()} == {"done"}
+
+    def test_bulk_mode_ingests_job_results(self, env, monkeypatch, tmp_path):
+        monkeypatch.setattr(
+            describe_images, "BULK_JOB_FILE", str(tmp_path / "bulk" / "job.jsonl")
+        )
+        monkeypatch.setattr(gemini_client, "BULK_POLL_SECONDS", 0)
+
+        def responder(key, request):
+            image = request["contents"][0]["parts"][-1]["inlineData"]["data"]
+            return "unparseable" if image == "YmFk" else ANSWER  # base64 of b"bad"
+
+        backend = FakeBatchBackend(responder)
+        gemini_client.set_batch_backend(backend)
+        try:
+            assert self._run(env, "--bulk") == []  # no interactive calls
+        finally:
+            gemini_client.set_batch_backend(None)
+
+        [job] = backend.jobs.values()
+        assert len(job["lines"]) == 3
+        config = job["lines"][0]["request"]["generationConfig"]
+        assert config["responseSchema"] == describe_images.IMAGE_SCHEMA
+        statuses = sorted(e["status"] for e in RunJournal(env.journal).entries().values())
+        assert statuses == ["done", "done", "failed"]
+
+    def test_bulk_mode_leaves_images_too_large_to_inline_out(
+        self, env, monkeypatch, tmp_path
+    ):
+        monkeypatch.setattr(
+            describe_images, "BULK_JOB_FILE", str(tmp_path / "bulk" / "job.jsonl")
+        )
+        monkeypatch.setattr(gemini_client, "BULK_POLL_SECONDS", 0)
+        monkeypatch.setattr(gemini_client, "_MAX_INLINE_IMAGE_BYTES", 4)  # b"later" is 5
+        backend = FakeBatchBackend(lambda key, request: ANSWER)
+        gemini_client.set_batch_backend(backend)
+        try:
+            assert self._run(env, "--bulk") == []
+        finally:
+            gemini_client.set_batch_backend(None)
+
+        [job] = backend.jobs.values()
+        assert len(job["lines"]) == 2
+        entries = RunJournal(env.journal).entries().values()
+        assert [e["error"] for e in entries if e["status"] == "failed"] == [
+            "too large for a bulk job"
+        ]
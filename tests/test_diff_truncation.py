@@ -0,0 +1,110 @@
+"""
+Diff truncation - single-pass line cuts and whole-hunk truncation.
+A small regex tokenizer stands in for tiktoken.
+"""
+
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts"))
+
+from helpers.diff_truncation import line_token_prefix, truncate_diff
+
+
+class WordEncoding:
+    """Words, whitespace runs and punctuation are tokens; counts encode calls."""
+
+    _TOKEN = re.compile(r"\w+|\s+|[^\w\s]")
+
+    def __init__(self):
+        self.vocab = []
+        self.encode_calls = 0
+
+    def encode(self, text, disallowed_special=None):
+        self.encode_calls += 1
+        ids = []
+        for piece in self._TOKEN.findall(text):
+            self.vocab.append(piece)
+            ids.append(len(self.vocab) - 1)
+        return ids
+
+    def decode_with_offsets(self, tokens):
+        offsets, pos, parts = [], 0, []
+        for t in tokens:
+            offsets.append(pos)
+            parts.append(self.vocab[t])
+            pos += len(self.vocab[t])
+        return "".join(parts), offsets
+
+
+class LineEncoding:
+    """No decode_with_offsets: the fallback sums per-line counts."""
+
+    def encode(self, text):
+        return [0] * (len(text.splitlines()) * 10)
+
+
+def _diff(hunks, lines_per_hunk):
+    out = ["diff --git a/doc.qmd b/doc.qmd\n", "--- a/doc.qmd\n", "+++ b/doc.qmd\n"]
+    for h in range(hunks):
+        out.append(f"@@ -{h * 10},3 +{h * 10},3 @@\n")
+        out += [f"+hunk {h} line {i}\n" for i in range(lines_per_hunk)]
+    return "".join(out)
+
+
+class TestLineTokenPrefix:
+    def test_prefix_matches_per_line_counts(self):
+        text = "alpha beta\ngamma\ndelta, epsilon\n"
+        enc = WordEncoding()
+
+        lines, prefix = line_token_prefix(text, enc)
+
+        per_line = [len(WordEncoding().encode(line)) for line in lines]
+        assert prefix[-1] == len(WordEncoding().encode(text))
+        assert [b - a for a, b in zip(prefix, prefix[1:])] == per_line
+        assert enc.encode_calls == 1
+
+    def test_fallback_without_offsets(self):
+        lines, prefix = line_token_prefix("a\nb\nc\n", LineEncoding())
+
+        assert prefix == [0, 10, 20, 30]
+
+
+class TestTruncateDiff:
+    def test_small_diff_unchanged(self):
+        diff = _diff(2, 3)
+        assert truncate_diff(diff, 10_000, WordEncoding()) == diff
+
+    def test_line_mode_keeps_head_and_tail_within_budget(self):
+        diff = "".join(f"Line {i}\n" for i in range(5_000))
+        enc = WordEncoding()
+
+        result = truncate_diff(diff, 2_000, enc)
+
+        assert result.startswith("Line 0\n")
+        assert result.endswith("Line 4999\n")
+        assert "lines omitted due to size" in result
+        assert len(WordEncoding().encode(result)) <= 2_000
+        assert enc.encode_calls == 1
+
+    def test_hunk_mode_keeps_whole_hunks_and_header(self):
+        diff = _diff(hunks=40, lines_per_hunk=20)
+
+        result = truncate_diff(diff, 3_000, WordEncoding(), hunk_aware=True)
+
+        assert result.startswith("diff --git a/doc.qmd b/doc.qmd\n")
+        assert "@@ -0,3 +0,3 @@\n" in result and "@@ -390,3 +390,3 @@\n" in result
+        assert "hunk(s)" in result
+        kept = re.findall(r"\+hunk (\d+) line (\d+)", result)
+        for h in {int(h) for h, _ in kept}:
+            assert sum(1 for k, _ in kept if int(k) == h) == 20  # never cut mid-hunk
+        assert len(WordEncoding().encode(result)) <= 3_000
+
+    def test_hunk_mode_falls_back_to_lines_for_one_giant_hunk(self):
+        diff = _diff(hunks=1, lines_per_hunk=2_000)
+
+        result = truncate_diff(diff, 2_000, WordEncoding(), hunk_aware=True)
+
+        assert "lines omitted due to size" in result
+        assert "+hunk 0 line 0\n" in result and "+hunk 0 line 1999\n" in result
@@ -0,0 +1,153 @@
+"""
+Async Gemini calls over the injectable fake transport - no network.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.modules.setdefault("google", MagicMock())
+sys.modules.setdefault("google.genai", sys.modules["google"].genai)
+sys.modules.setdefault("tiktoken", MagicMock())
+
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts"))
+
+import pytest
+
+from helpers import gemini_client
+from helpers.gemini_transport import AsyncGeminiTransport, FakeAsyncTransport, fake_response
+from helpers.quota_ledger import DailyQuota, DailyQuotaExceeded, DailyQuotaLedger
+from helpers.rate_limiter import SlidingWindowRateLimiter
+from helpers.usage import UsageLedger
+
+
+@pytest.fixture
+def fake_env(tmp_path, monkeypatch):
+    """Fresh limiter/ledgers and a short prompt count so nothing touches the repo."""
+    monkeypatch.setattr(
+        gemini_client, "daily_quota", DailyQuota(DailyQuotaLedger(tmp_path / "q.json"), 100)
+    )
+    monkeypatch.setattr(gemini_client, "rate_limiter", SlidingWindowRateLimiter(10, 10_000, 100))
+    monkeypatch.setattr(gemini_client, "usage_ledger", UsageLedger())
+    monkeypatch.setattr(gemini_client, "count_tokens", lambda text: len(text.split()))
+    yield
+    gemini_client.set_async_transport(None)
+
+
+class TestAsyncCalls:
+    def test_call_strips_fences_and_reconciles_usage(self, fake_env):
+        """Real usage from the response replaces the reservation's estimate"""
+        transport = FakeAsyncTransport(
+            lambda model, contents, config: fake_response(
+                '```json\n{"ok": true}\n```', prompt_tokens=420, output_tokens=7
+            )
+        )
+        gemini_client.set_async_transport(transport)
+
+        async def run():
+            reservation = await gemini_client.reserve_api_request_async(100)
+            return await gemini_client.call_gemini_async(
+                "short prompt", reservation=reservation, label="versions", items=3
+            )
+
+        result = asyncio.run(run())
+
+        assert result.text == '{"ok": true}'
+        assert result.usage.prompt_tokens == 420
+        assert gemini_client.rate_limiter.snapshot()["tokens_minute"] == 420
+        assert gemini_client.usage_ledger.rows()["versions"]["items"] == 3
+        assert gemini_client.daily_quota.requests_today() == 1
+        assert len(transport.requests) == 1
+
+    def test_used_up_quota_raises_instead_of_exiting(
+        self, fake_env, monkeypatch, tmp_path
+    ):
+        ledger = DailyQuotaLedger(tmp_path / "full.json")
+        monkeypatch.setattr(gemini_client, "daily_quota", DailyQuota(ledger, 0))
+
+        with pytest.raises(DailyQuotaExceeded):
+            asyncio.run(gemini_client.reserve_api_request_async(100))
+
+    def test_cancelled_wait_gives_the_quota_request_back(self, fake_env, monkeypatch):
+        async def never(*args, **kwargs):
+            await asyncio.sleep(3600)
+
+        monkeypatch.setattr(gemini_client.rate_limiter, "acquire", never)
+
+        async def run():
+            task = asyncio.create_task(gemini_client.reserve_api_request_async(100))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+
+        assert gemini_client.daily_quota.requests_today() == 0
+
+    def test_large_prompt_goes_through_file_upload(self, fake_env, monkeypatch):
+        """Prompts over the threshold are uploaded, then the upload is deleted"""
+        monkeypatch.setattr(gemini_client, "FILE_API_THRESHOLD_TOKENS", 3)
+        transport = FakeAsyncTransport(lambda model, contents, config: "done")
+        gemini_client.set_async_transport(transport)
+
+        result = asyncio.run(gemini_client.call_gemini_async("one two three four five"))
+
+        assert result.text == "done"
+        assert transport.uploaded == {}
+
+    def test_concurrent_vision_calls_share_one_transport(self, fake_env, tmp_path):
+        """Many images run concurrently on one transport without threads"""
+        image = tmp_path / "figure.png"
+        image.write_bytes(b"\x89PNG fake")
+        transport = FakeAsyncTransport(lambda model, contents, config: "A map.")
+        gemini_client.set_async_transport(transport)
+
+        async def run():
+            calls = [
+                gemini_client.call_gemini_vision_async(image, context_text=f"ctx {i}")
+                for i in range(20)
+            ]
+            return await asyncio.gather(*calls)
+
+        results = asyncio.run(run())
+
+        assert [r.text for r in results] == ["A map."] * 20
+        assert len(transport.requests) == 20
+        assert gemini_client.usage_ledger.rows()["images"]["calls"] == 20
+
+    def test_batch_vision_call_is_one_request_for_all_images(self, fake_env, tmp_path):
+        """Several images share one request and are filed as that many items"""
+        images = []
+        for i in range(3):
+            image = tmp_path / f"icon{i}.png"
+            image.write_bytes(b"\x89PNG fake")
+            images.append((image, f"=== IMAGE {i + 1} ==="))
+        transport = FakeAsyncTransport(lambda model, contents, config: "answers")
+        gemini_client.set_async_transport(transport)
+
+        result = asyncio.run(
+            gemini_client.call_gemini_vision_batch_async(images, "Describe 3 images.")
+        )
+
+        assert result.text == "answers"
+        assert len(transport.requests) == 1
+        assert gemini_client.usage_ledger.rows()["images"]["items"] == 3
+
+    def test_cache_call_requires_cache(self, fake_env):
+        gemini_client.set_async_transport(FakeAsyncTransport(lambda *a: "x"))
+
+        with pytest.raises(ValueError):
+            asyncio.run(gemini_client.call_gemini_with_cache_async(None, "prompt"))
+
+    def test_transport_missing_an_operation_fails_when_created(self):
+        class NoDelete(AsyncGeminiTransport):
+            async def generate_content(self, *, model, contents, config):
+                return None
+
+            async def upload_file(self, *, file, config):
+                return None
+
+        with pytest.raises(TypeError):
+            NoDelete()
@@ -0,0 +1,114 @@
+"""
+Bulk mode - job file, submit, poll, re-attach and result parsing, over the
+offline FakeBatchBackend.
+"""
+
+import json
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.modules.setdefault("google", MagicMock())
+sys.modules.setdefault("google.genai", sys.modules["google"].genai)
+sys.modules.setdefault("tiktoken", MagicMock())
+
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts"))
+
+import pytest
+
+from helpers import gemini_client
+from helpers.gemini_batch import BatchBackend, FakeBatchBackend
+from helpers.usage import UsageLedger
+
+
+@pytest.fixture
+def bulk_env(tmp_path, monkeypatch):
+    monkeypatch.setattr(gemini_client, "usage_ledger", UsageLedger())
+    yield tmp_path / "job.jsonl"
+    gemini_client.set_batch_backend(None)
+
+
+def _answer(key, request):
+    if key == "broken":
+        return RuntimeError("INTERNAL")
+    return f"answer to {request['contents'][0]['parts'][0]['text']}"
+
+
+class TestRunBulkJob:
+    def test_job_is_polled_and_results_come_back_by_key(self, bulk_env):
+        backend = FakeBatchBackend(_answer, polls_until_done=2)
+        gemini_client.set_batch_backend(backend)
+        gemini_client.write_bulk_job(
+            bulk_env,
+            {
+                "a": gemini_client.bulk_text_request("intro a", system_instruction="s"),
+                "broken": gemini_client.bulk_text_request("intro b"),
+            },
+        )
+
+        results = gemini_client.run_bulk_job(bulk_env, "intros", poll_seconds=0)
+
+        assert results["a"].text == "answer to intro a"
+        assert results["broken"] is None
+        [job] = backend.jobs.values()
+        assert job["polls"] == 3
+        assert job["lines"][0]["request"]["systemInstruction"]["parts"][0]["text"] == "s"
+        assert gemini_client.usage_ledger.rows()["bulk"]["items"] == 1
+
+    def test_rerun_over_the_same_file_reattaches(self, bulk_env):
+        backend = FakeBatchBackend(_answer)
+        gemini_client.set_batch_backend(backend)
+        gemini_client.write_bulk_job(bulk_env, {"a": gemini_client.bulk_text_request("x")})
+
+        gemini_client.run_bulk_job(bulk_env, "intros", poll_seconds=0)
+        gemini_client.run_bulk_job(bulk_env, "intros", poll_seconds=0)
+        gemini_client.write_bulk_job(bulk_env, {"b": gemini_client.bulk_text_request("y")})
+        gemini_client.run_bulk_job(bulk_env, "intros", poll_seconds=0)
+
+        assert len(backend.jobs) == 2
+
+    def test_failed_job_raises_and_is_not_reattached(self, bulk_env):
+        gemini_client.set_batch_backend(
+            FakeBatchBackend(_answer, final_state="JOB_STATE_EXPIRED")
+        )
+        gemini_client.write_bulk_job(bulk_env, {"a": gemini_client.bulk_text_request("x")})
+
+        with pytest.raises(RuntimeError, match="JOB_STATE_EXPIRED"):
+            gemini_client.run_bulk_job(bulk_env, "intros", poll_seconds=0)
+        assert not bulk_env.with_name("job.jsonl.job.json").exists()
+
+    def test_vision_request_inlines_the_image(self, bulk_env, tmp_path):
+        image = tmp_path / "figure.png"
+        image.write_bytes(b"\x89PNG fake")
+
+        request = gemini_client.bulk_vision_request(image, "ctx", user_prompt="describe")
+
+        parts = request["contents"][0]["parts"]
+        assert [p.get("text") for p in parts[:2]] == ["describe", "ctx"]
+        assert parts[2]["inlineData"]["mimeType"] == "image/png"
+        assert json.dumps(request)  # the job file line must serialise
+
+    def test_vision_request_over_the_inline_limit_is_none(self, tmp_path, monkeypatch):
+        image = tmp_path / "figure.png"
+        image.write_bytes(b"\x89PNG fake")
+        monkeypatch.setattr(gemini_client, "_MAX_INLINE_IMAGE_BYTES", 4)
+
+        assert gemini_client.bulk_vision_request(image, "ctx") is None
+
+    def test_job_file_is_written_from_a_generator(self, bulk_env):
+        requests = ((k, gemini_client.bulk_text_request(k)) for k in ("a", "b"))
+
+        assert gemini_client.write_bulk_job(bulk_env, requests) == 2
+        lines = [json.loads(line) for line in bulk_env.read_text().splitlines()]
+        assert [line["key"] for line in lines] == ["a", "b"]
+
+    def test_backend_missing_an_operation_fails_when_created(self):
+        class NoResults(BatchBackend):
+            def submit(self, *, job_file, model, display_name):
+                return "batches/1"
+
+            def state(self, *, job_name):
+                return "JOB_STATE_SUCCEEDED"
+
+        with pytest.raises(TypeError):
+            NoResults()
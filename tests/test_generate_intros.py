@@ -0,0 +1,399 @@
+"""
+Intro generation - concurrent Tier 1 with escalations streaming into Tier 2,
+the pipelined Tier 2 batches, the bulk Tier 2 job and the schema-validated
+responses.
+API calls are replaced with stubs, no real requests.
+"""
+
+import json
+import queue
+import re
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.modules.setdefault("google", MagicMock())
+sys.modules.setdefault("google.genai", sys.modules["google"].genai)
+sys.modules.setdefault("tiktoken", MagicMock())
+
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts"))
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts/ai"))
+
+import pytest
+
+from helpers import gemini_client
+from helpers.file_updater import IntroCacheStore, intro_body_hash
+from helpers.gemini_batch import FakeBatchBackend
+from helpers.usage import UsageLedger
+from tasks import generate_intros
+
+
+def _tier1_info(tmp_path, name):
+    full_path = tmp_path / name
+    full_path.write_text("---\ntitle: x\n---\nBody of " + name, encoding="utf-8")
+    return {
+        "clean_diff": "+change",
+        "raw_diff": "+change",
+        "meta": {},
+        "keywords": ["old"],
+        "introduction": "Old intro.",
+        "bump_level": "patch",
+        "full_path": full_path,
+        "yaml_end": 3,
+        "cached": {"intro": "Old intro.", "keywords": ["old"]},
+        "body_hash": "h-" + name,
+    }
+
+
+def _stats():
+    return {
+        "tier1_no_change": 0,
+        "tier1_update": 0,
+        "tier1_escalate": 0,
+        "tier1_parse_failure": 0,
+        "tier2_escalated": 0,
+    }
+
+
+KEYWORDS = [f"keyword {i}" for i in range(8)]
+
+
+class TestParseResponses:
+    def test_tier1_actions(self):
+        update = json.dumps(
+            {"action": "update", "introduction": "An\nintro.", "keywords": KEYWORDS}
+        )
+
+        assert generate_intros._parse_tier1_response('{"action": "escalate"}') == {
+            "action": "escalate"
+        }
+        assert generate_intros._parse_tier1_response(update) == {
+            "action": "update",
+            "introduction": "An intro.",
+            "keywords": KEYWORDS,
+        }
+        assert generate_intros._parse_tier1_response('{"action": "rewrite"}') is None
+        assert generate_intros._parse_tier1_response('{"action": "update"}') is None
+
+    def test_tier2_keeps_answered_files_and_drops_error_entries(self):
+        files = [Path("DOCS/a.qmd"), Path("DOCS/b.qmd")]
+        good = {"introduction": "Intro.", "keywords": KEYWORDS}
+        error = {"introduction": "error", "keywords": ["error"]}
+
+        parsed = generate_intros._parse_tier2_response(
+            json.dumps({"DOCS/a.qmd": good, "DOCS/b.qmd": error}), files
+        )
+
+        assert parsed == {"DOCS/a.qmd": good}
+        assert generate_intros._parse_tier2_response(
+            json.dumps({"DOCS/a.qmd": good}), files
+        ) == {"DOCS/a.qmd": good}
+        assert generate_intros._parse_tier2_response(
+            json.dumps({"DOCS/a.qmd": {"introduction": "Intro."}}), files
+        ) == {}
+
+
+class TestTier1Concurrency:
+    def test_escalations_stream_before_tier1_finishes(self, tmp_path, monkeypatch):
+        """An escalation reaches the Tier 2 queue while other Tier 1 calls still run"""
+        release_slow = threading.Event()
+        escalations = queue.Queue()
+
+        def fake_tier1(*, clean_diff, introduction, **kwargs):
+            if introduction == "slow":
+                assert release_slow.wait(timeout=5)
+                return {"action": "no_change"}
+            return {"action": "escalate"}
+
+        monkeypatch.setattr(generate_intros, "_call_tier1_single", fake_tier1)
+        fast = _tier1_info(tmp_path, "fast.qmd")
+        slow = {**_tier1_info(tmp_path, "slow.qmd"), "introduction": "slow"}
+        tier1_queue = {Path("DOCS/fast.qmd"): fast, Path("DOCS/slow.qmd"): slow}
+        stats = _stats()
+
+        runner = threading.Thread(
+            target=generate_intros._run_tier1_all,
+            args=(None, None, tier1_queue, escalations, tmp_path, False, stats, 2),
+        )
+        runner.start()
+        doc_path, entry = escalations.get(timeout=5)
+        release_slow.set()
+        runner.join(timeout=5)
+
+        assert doc_path == Path("DOCS/fast.qmd")
+        assert generate_intros._load_tier2_content(entry) == "Body of fast.qmd"
+        assert entry["prev_keywords"] == ["old"]
+        assert stats["tier1_escalate"] == 1
+        assert stats["tier1_no_change"] == 1
+
+    def test_tier2_stream_batches_escalations_until_done(self, tmp_path, monkeypatch):
+        """The Tier 2 worker handles new files first, then every escalation,
+        taking what is waiting up to TIER2_CONCURRENCY batches at a time"""
+        seen = []
+
+        def fake_process(model, cache, tier2_queue, cache_dir, dry_run):
+            if tier2_queue:
+                seen.append(sorted(str(p) for p in tier2_queue))
+            return len(tier2_queue)
+
+        monkeypatch.setattr(generate_intros, "_process_tier2_all", fake_process)
+        monkeypatch.setattr(generate_intros, "DEFAULT_MAX_FILES_PER_BATCH", 2)
+        monkeypatch.setattr(generate_intros, "TIER2_CONCURRENCY", 2)
+        escalations = queue.Queue()
+        for name in ("a", "b", "c", "d", "e"):
+            escalations.put((Path(name), {"content": name}))
+        escalations.put(generate_intros._TIER1_DONE)
+
+        saved = generate_intros._run_tier2_stream(
+            None, None, {Path("new"): {"content": "n"}}, escalations, tmp_path, False
+        )
+
+        assert saved == 6
+        assert seen == [["new"], ["a", "b", "c", "d"], ["e"]]
+
+
+def _pairs(files, **kwargs):
+    items = list(files.items())
+    return [dict(items[i : i + 2]) for i in range(0, len(items), 2)]
+
+
+def _tier2_queue(tmp_path, count):
+    entries = {}
+    for i in range(count):
+        full_path = tmp_path / f"doc{i}.qmd"
+        full_path.write_text(f"---\ntitle: {i}\n---\nBody {i}", encoding="utf-8")
+        entries[Path(f"DOCS/doc{i}.qmd")] = generate_intros._tier2_new_entry(
+            full_path, 3
+        )
+    return entries
+
+
+class TestTier2Pipeline:
+    def test_every_file_is_saved_with_missing_ones_retried_singly(
+        self, tmp_path, monkeypatch
+    ):
+        """Batches run concurrently; a file dropped from a batch is retried alone"""
+        store = IntroCacheStore(tmp_path)
+        monkeypatch.setattr(generate_intros, "create_smart_batches", _pairs)
+        monkeypatch.setattr(generate_intros, "intro_cache_store", lambda d: store)
+
+        def fake_call(model, cache, batch_files, dry_run, dynamic=None):
+            keys = [str(fp) for fp in batch_files]
+            if len(keys) > 1:
+                keys = keys[:-1]  # drop the last file of every multi-file batch
+            return {k: {"introduction": f"Intro {k}", "keywords": ["k"]} for k in keys}
+
+        monkeypatch.setattr(generate_intros, "_call_tier2_batch_once", fake_call)
+
+        count = generate_intros._process_tier2_all(
+            None, None, _tier2_queue(tmp_path, 6), tmp_path, False, concurrency=3
+        )
+
+        assert count == 6
+        assert len(store.store) == 6
+        assert store.get(Path("DOCS/doc0.qmd"))["body_hash"] == intro_body_hash("Body 0")
+
+    def test_dispatcher_failure_is_raised(self, tmp_path, monkeypatch):
+        """A dispatcher exiting (e.g. daily quota) stops the pipeline and surfaces"""
+        monkeypatch.setattr(generate_intros, "create_smart_batches", _pairs)
+
+        def quota_exit(*args, **kwargs):
+            raise SystemExit(1)
+
+        monkeypatch.setattr(generate_intros, "_call_tier2_batch_once", quota_exit)
+
+        with pytest.raises(SystemExit):
+            generate_intros._process_tier2_all(
+                None, None, _tier2_queue(tmp_path, 5), tmp_path, False, concurrency=2
+            )
+
+
+class TestTier2Bulk:
+    @pytest.fixture
+    def bulk_env(self, tmp_path, monkeypatch):
+        store = IntroCacheStore(tmp_path)
+        monkeypatch.setattr(generate_intros, "create_smart_batches", _pairs)
+        monkeypatch.setattr(generate_intros, "intro_cache_store", lambda d: store)
+        monkeypatch.setattr(gemini_client, "usage_ledger", UsageLedger())
+        yield store
+        gemini_client.set_batch_backend(None)
+
+    def test_one_job_answers_every_batch_into_the_store(self, tmp_path, bulk_env):
+        """Each smart batch is one request of one job; a failed request leaves
+        its files uncached"""
+
+        def answer(key, request):
+            if key == "batch-2":
+                return RuntimeError("INTERNAL")
+            prompt = request["contents"][0]["parts"][0]["text"]
+            paths = re.findall(r"---FILE: (.+?)---", prompt)
+            return json.dumps(
+                {p: {"introduction": f"Intro {p}", "keywords": KEYWORDS} for p in paths}
+            )
+
+        backend = FakeBatchBackend(answer, polls_until_done=0)
+        gemini_client.set_batch_backend(backend)
+        entries = _tier2_queue(tmp_path, 5)
+
+        saved = generate_intros._process_tier2_bulk(entries, tmp_path, dry_run=False)
+
+        [job] = backend.jobs.values()
+        assert [line["key"] for line in job["lines"]] == ["batch-1", "batch-2", "batch-3"]
+        assert saved == 3
+        assert bulk_env.get(Path("DOCS/doc2.qmd")) == {}
+        entry = bulk_env.get(Path("DOCS/doc4.qmd"))
+        assert entry["intro"] == "Intro DOCS/doc4.qmd"
+        assert entry["body_hash"] == intro_body_hash("Body 4")
+        assert (tmp_path / generate_intros.BULK_JOB_FILE).exists()
+
+
+class TestContentAddressedCache:
+    """Classification by body hash: unchanged bodies skip, known bodies are
+    reused, bodies changed behind HEAD~1 go to Tier 2"""
+
+    @pytest.fixture
+    def env(self, tmp_path, monkeypatch):
+        root = tmp_path
+        docs = root / "DOCS"
+        cache_dir = root / ".llm_cache"
+        docs.mkdir()
+        cache_dir.mkdir()
+        sent = {}
+
+        def fake_process(model, cache, tier2_queue, cache_dir, dry_run, concurrency=None):
+            sent.update(tier2_queue)
+            return 0
+
+        monkeypatch.setattr(generate_intros, "_process_tier2_all", fake_process)
+        monkeypatch.setattr(generate_intros, "plan_daily_budget", lambda n, label: n)
+        monkeypatch.setattr(generate_intros, "create_gemini_cache", lambda path: None)
+        monkeypatch.setattr(generate_intros, "_get_git_diff", lambda *a: "@@ -9 +9 @@\n+x")
+        store = IntroCacheStore(cache_dir)
+        monkeypatch.setattr(generate_intros, "intro_cache_store", lambda d: store)
+        return root, docs, cache_dir, store, sent
+
+    def _doc(self, docs, name, body):
+        path = docs / name
+        path.write_text(f"---\ntitle: {name}\n---\n{body}", encoding="utf-8")
+        return path
+
+    def _entry(self, body, **extra):
+        return {
+            "intro": f"Intro of {body}",
+            "keywords": ["k"],
+            "body_hash": intro_body_hash(body),
+            "prompt_version": generate_intros.PROMPT_VERSION,
+            **extra,
+        }
+
+    def _run(self, root, docs, cache_dir, modified=()):
+        return generate_intros.run(
+            None, list(modified), docs, root, cache_dir, set(), dry_run=False
+        )
+
+    def test_rename_reuses_the_old_entry(self, env):
+        root, docs, cache_dir, store, sent = env
+        self._doc(docs, "new_name.qmd", "Same body")
+        store.put(Path("DOCS/old_name.qmd"), self._entry("Same body"))
+
+        stats = self._run(root, docs, cache_dir, ["DOCS/new_name.qmd"])
+
+        assert stats["files_reused_by_content"] == 1
+        assert not sent
+        copied = store.get(Path("DOCS/new_name.qmd"))
+        assert copied["intro"] == "Intro of Same body"
+
+    def test_unchanged_body_skips_despite_a_diff(self, env):
+        root, docs, cache_dir, store, sent = env
+        self._doc(docs, "a.qmd", "Body A")
+        store.put(Path("DOCS/a.qmd"), self._entry("Body A"))
+
+        stats = self._run(root, docs, cache_dir, ["DOCS/a.qmd"])
+
+        assert stats["files_skipped_cached"] == 1
+        assert not sent
+
+    def test_body_changed_outside_last_commit_goes_to_tier2(self, env):
+        root, docs, cache_dir, store, sent = env
+        self._doc(docs, "a.qmd", "Body A, edited two commits ago")
+        store.put(Path("DOCS/a.qmd"), self._entry("Body A"))
+
+        stats = self._run(root, docs, cache_dir)
+
+        assert stats["files_stale"] == 1
+        assert sent[Path("DOCS/a.qmd")]["prev_introduction"] == "Intro of Body A"
+
+    def test_legacy_entry_is_stamped_with_its_body_hash(self, env):
+        root, docs, cache_dir, store, sent = env
+        self._doc(docs, "a.qmd", "Body A")
+        store.put(Path("DOCS/a.qmd"), {"intro": "Old", "keywords": ["k"]})
+
+        self._run(root, docs, cache_dir)
+
+        entry = store.get(Path("DOCS/a.qmd"))
+        assert entry["body_hash"] == intro_body_hash("Body A")
+        assert entry["prompt_version"] == generate_intros.PROMPT_VERSION
+        assert not sent
+
+    def test_copy_of_a_stamped_legacy_entry_is_reused(self, env):
+        root, docs, cache_dir, store, sent = env
+        self._doc(docs, "a.qmd", "Body A")
+        store.put(Path("DOCS/a.qmd"), {"intro": "Old", "keywords": ["k"]})
+        self._run(root, docs, cache_dir)
+
+        self._doc(docs, "copy.qmd", "Body A")
+        stats = self._run(root, docs, cache_dir, ["DOCS/copy.qmd"])
+
+        assert stats["files_reused_by_content"] == 1
+        assert store.get(Path("DOCS/copy.qmd"))["intro"] == "Old"
+        assert not sent
+
+    def test_same_body_files_share_one_tier2_call(self, env, monkeypatch):
+        root, docs, cache_dir, store, sent = env
+        self._doc(docs, "a.qmd", "Twin body")
+        self._doc(docs, "b.qmd", "Twin body")
+
+        def fake_process(model, cache, tier2_queue, cache_dir, dry_run, concurrency=None):
+            sent.update(tier2_queue)
+            for doc_path, info in tier2_queue.items():
+                generate_intros._save_intro(
+                    doc_path, cache_dir, "Twin intro", ["k"], intro_body_hash("Twin body")
+                )
+            return len(tier2_queue)
+
+        monkeypatch.setattr(generate_intros, "_process_tier2_all", fake_process)
+
+        stats = self._run(root, docs, cache_dir)
+
+        assert list(sent) == [Path("DOCS/a.qmd")]
+        assert stats["files_reused_by_content"] == 1
+        assert store.get(Path("DOCS/b.qmd"))["intro"] == "Twin intro"
+
+    def test_bulk_run_sends_tier2_through_one_job(self, env, monkeypatch):
+        root, docs, cache_dir, store, sent = env
+        self._doc(docs, "a.qmd", "Body A")
+        bulk = {}
+
+        def fake_bulk(tier2_queue, cache_dir, dry_run):
+            bulk.update(tier2_queue)
+            return 0
+
+        monkeypatch.setattr(generate_intros, "_process_tier2_bulk", fake_bulk)
+
+        generate_intros.run(None, [], docs, root, cache_dir, set(), bulk=True)
+
+        assert list(bulk) == [Path("DOCS/a.qmd")]
+        assert not sent
+
+    def test_revert_hits_an_overwritten_entry(self, env):
+        root, docs, cache_dir, store, sent = env
+        self._doc(docs, "a.qmd", "Version 1")
+        store.put(Path("DOCS/a.qmd"), self._entry("Version 1"))
+        store.put(Path("DOCS/a.qmd"), self._entry("Version 2"))
+
+        stats = self._run(root, docs, cache_dir, ["DOCS/a.qmd"])
+
+        assert stats["files_reused_by_content"] == 1
+        assert store.get(Path("DOCS/a.qmd"))["intro"] == "Intro of Version 1"
+        assert not sent
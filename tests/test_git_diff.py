@@ -0,0 +1,99 @@
+"""
+Batched git diffs - one git invocation split per file, renames keyed by new path.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts"))
+
+from helpers.git_diff import GitDiffProvider, tree_blobs
+
+
+def _git(repo, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        cwd=repo,
+        check=True,
+        capture_output=True,
+    )
+
+
+@pytest.fixture
+def repo(tmp_path):
+    _git(tmp_path, "init", "-q")
+    docs = tmp_path / "DOCS"
+    docs.mkdir()
+    for name in ("a.qmd", "b b/c.qmd", "old.qmd", "same.qmd"):
+        path = docs / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_text("".join(f"{name} line {i}\n" for i in range(20)))
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-q", "-m", "base")
+    _git(tmp_path, "tag", "v1")
+
+    (docs / "a.qmd").write_text((docs / "a.qmd").read_text() + "added to a\n")
+    (docs / "b b/c.qmd").write_text("rewritten c\n")
+    _git(tmp_path, "mv", "DOCS/old.qmd", "DOCS/new.qmd")
+    (docs / "new.qmd").write_text((docs / "new.qmd").read_text() + "after rename\n")
+    (docs / "added.qmd").write_text("brand new\n")
+    _git(tmp_path, "add", "-A")
+    _git(tmp_path, "commit", "-q", "-m", "change")
+    return tmp_path
+
+
+class TestGitDiffProvider:
+    def test_each_file_gets_its_own_diff(self, repo):
+        paths = ["DOCS/a.qmd", "DOCS/b b/c.qmd", "DOCS/added.qmd", "DOCS/same.qmd"]
+        diffs = GitDiffProvider("v1", paths=paths, cwd=repo)
+
+        a = diffs.get("DOCS/a.qmd")
+        assert a.startswith("diff --git a/DOCS/a.qmd b/DOCS/a.qmd\n")
+        assert "+added to a\n" in a and "rewritten" not in a
+        assert "+rewritten c\n" in diffs.get("DOCS/b b/c.qmd")
+        assert "+brand new\n" in diffs.get("DOCS/added.qmd")
+        assert diffs.get("DOCS/same.qmd") is None
+        assert diffs.invocations == 1
+
+    def test_rename_is_keyed_by_new_path(self, repo):
+        renames = [{"old": "DOCS/old.qmd", "new": "DOCS/new.qmd", "similarity": "R090"}]
+        diffs = GitDiffProvider("v1", paths=["DOCS/new.qmd"], renames=renames, cwd=repo)
+
+        diff = diffs.get("DOCS/new.qmd")
+
+        assert "rename from DOCS/old.qmd\n" in diff
+        assert "+after rename\n" in diff
+        assert "-old.qmd line 0\n" not in diff  # not a whole-file add
+
+    def test_chunks_start_lazily(self, repo):
+        paths = ["DOCS/a.qmd", "DOCS/added.qmd", "DOCS/b b/c.qmd"]
+        diffs = GitDiffProvider("v1", paths=paths, cwd=repo, chunk_size=1)
+
+        diffs.get("DOCS/added.qmd")
+        assert diffs.invocations == 1
+        assert dict(diffs.items()).keys() == set(paths)
+        assert diffs.invocations == 3
+
+    def test_git_error_returns_false(self, repo):
+        diffs = GitDiffProvider("no-such-tag", paths=["DOCS/a.qmd"], cwd=repo)
+
+        assert diffs.get("DOCS/a.qmd") is False
+
+    def test_context_lines(self, repo):
+        diffs = GitDiffProvider("v1", paths=["DOCS/a.qmd"], context_lines=0, cwd=repo)
+
+        assert "\n a.qmd line 19\n" not in diffs.get("DOCS/a.qmd")
+
+
+class TestTreeBlobs:
+    def test_blob_ids_at_each_revision(self, repo):
+        old = tree_blobs("v1", ["DOCS/old.qmd", "DOCS/added.qmd"], cwd=repo)
+        new = tree_blobs("HEAD", ["DOCS/new.qmd", "DOCS/added.qmd"], cwd=repo)
+
+        assert set(old) == {"DOCS/old.qmd"}
+        assert set(new) == {"DOCS/new.qmd", "DOCS/added.qmd"}
+        assert all(len(sha) == 40 for sha in {**old, **new}.values())
+        assert tree_blobs("no-such-tag", ["DOCS/a.qmd"], cwd=repo) is None
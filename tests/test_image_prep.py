@@ -0,0 +1,77 @@
+"""
+Image preparation before Gemini vision calls - downscale, re-encode when
+smaller, cache by MD5, and send unchanged without Pillow.
+"""
+
+import io
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts"))
+
+import pytest
+
+from helpers import image_prep
+from helpers.image_prep import prepare_image
+
+
+def _noisy_png(path, size, mode="RGB"):
+    Image = pytest.importorskip("PIL.Image")
+    rng = random.Random(0)
+    img = Image.new(mode, size)
+    channels = len(mode)
+    pixels = size[0] * size[1]
+    img.putdata([tuple(rng.randrange(256) for _ in range(channels)) for _ in range(pixels)])
+    img.save(path, "PNG")
+    return path
+
+
+class TestPrepareImage:
+    def test_large_image_is_downscaled_and_smaller(self, tmp_path, monkeypatch):
+        pytest.importorskip("PIL")
+        monkeypatch.setattr(image_prep, "MAX_EDGE", 64)
+        monkeypatch.setattr(image_prep, "REENCODE_ABOVE_BYTES", 0)
+        src = _noisy_png(tmp_path / "map.png", (256, 128))
+
+        prepared = prepare_image(src, "image/png", cache_dir=tmp_path / "cache")
+
+        from PIL import Image
+
+        with Image.open(io.BytesIO(prepared.data)) as img:
+            assert max(img.size) == 64
+        assert prepared.mime_type in ("image/webp", "image/jpeg")
+        assert len(prepared.data) < src.stat().st_size
+
+    def test_result_is_reused_from_the_cache(self, tmp_path, monkeypatch):
+        pytest.importorskip("PIL")
+        monkeypatch.setattr(image_prep, "REENCODE_ABOVE_BYTES", 0)
+        src = _noisy_png(tmp_path / "a.png", (96, 96))
+        first = prepare_image(src, "image/png", cache_dir=tmp_path / "cache")
+
+        def fail(*a, **kw):
+            raise AssertionError("should come from the cache")
+
+        monkeypatch.setattr(image_prep, "_reencode", fail)
+        second = prepare_image(src, "image/png", cache_dir=tmp_path / "cache")
+
+        assert (second.data, second.mime_type) == (first.data, first.mime_type)
+
+    def test_alpha_never_goes_to_jpeg(self, tmp_path, monkeypatch):
+        pytest.importorskip("PIL")
+        monkeypatch.setattr(image_prep, "REENCODE_ABOVE_BYTES", 0)
+        src = _noisy_png(tmp_path / "logo.png", (64, 64), mode="RGBA")
+
+        prepared = prepare_image(src, "image/png", cache_dir=tmp_path / "cache")
+
+        assert prepared.mime_type in ("image/png", "image/webp")
+
+    def test_without_pillow_images_go_unchanged(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(image_prep, "Image", None)
+        src = tmp_path / "scan.tif"
+        src.write_bytes(b"tiff bytes" * 100_000)
+
+        prepared = prepare_image(src, "image/tiff", cache_dir=tmp_path / "cache")
+
+        assert prepared.data == src.read_bytes() and prepared.mime_type == "image/tiff"
+        assert not (tmp_path / "cache").exists()
@@ -0,0 +1,88 @@
+"""
+Perceptual near-duplicates - dHash survives rescaling, the band index finds
+hashes within the distance, and signatures are cached by MD5.
+"""
+
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts"))
+
+import pytest
+
+from helpers import image_similarity
+from helpers.image_similarity import NearDuplicateIndex, Signature, SignatureCache, dhash
+
+
+def _figure(path, size, seed=0):
+    """A flowchart-like figure of outlined shapes, rendered at size."""
+    Image = pytest.importorskip("PIL.Image")
+    from PIL import ImageDraw
+
+    rng = random.Random(seed)
+    img = Image.new("RGB", (320, 240), "white")
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x, y = rng.randrange(300), rng.randrange(220)
+        box = (x, y, x + rng.randrange(20, 120), y + rng.randrange(20, 90))
+        shape = draw.ellipse if rng.random() < 0.5 else draw.rectangle
+        fill = tuple(rng.randrange(256) for _ in range(3))
+        shape(box, fill=fill, outline="black", width=3)
+    img.resize(size, Image.LANCZOS).save(path)
+    return path
+
+
+def _signature(bits, width=100, height=50):
+    return Signature(bits, width, height)
+
+
+class TestDhash:
+    def test_rescaled_copy_is_near_and_other_figure_is_far(self, tmp_path):
+        big = dhash(_figure(tmp_path / "big.png", (1600, 1200)))
+        small = dhash(_figure(tmp_path / "small.jpg", (400, 300)))
+        other = dhash(_figure(tmp_path / "other.png", (1600, 1200), seed=1))
+
+        assert big.distance(small) <= image_similarity.DEFAULT_MAX_DISTANCE
+        assert big.distance(other) > 64
+        assert (big.width, big.height) == (1600, 1200)
+
+
+class TestNearDuplicateIndex:
+    # Half the bits set, so the signatures count as informative.
+    BASE = int("0f" * 32, 16)
+
+    def test_nearest_within_distance_and_same_shape(self):
+        index = NearDuplicateIndex(max_distance=4)
+        index.add("a", _signature(self.BASE))
+        index.add("b", _signature(self.BASE ^ 0b111))
+        index.add("wide", _signature(self.BASE, width=300))
+
+        assert index.nearest(_signature(self.BASE ^ 0b1)) == ("a", 1)
+        assert index.nearest(_signature(self.BASE ^ 0b11111)) == ("b", 2)
+        assert index.nearest(_signature(self.BASE ^ 0b111111111)) is None
+        assert index.nearest(_signature(self.BASE, width=305)) == ("wide", 0)
+
+    def test_ties_go_to_the_earliest_and_blank_images_never_match(self):
+        index = NearDuplicateIndex(max_distance=2)
+        index.add("first", _signature(self.BASE ^ 0b01))
+        index.add("second", _signature(self.BASE ^ 0b10))
+
+        assert index.nearest(_signature(self.BASE)) == ("first", 1)
+        assert not index.add("blank", _signature(0))
+        assert index.nearest(_signature(1)) is None
+        assert len(index) == 2
+
+
+class TestSignatureCache:
+    def test_signatures_are_hashed_once(self, tmp_path, monkeypatch):
+        path = _figure(tmp_path / "fig.png", (64, 48))
+        cache = SignatureCache(tmp_path / "dhash.jsonl")
+        first = cache.signatures({"m1": path, "gone": tmp_path / "missing.png"})
+
+        monkeypatch.setattr(
+            image_similarity, "dhash", lambda p: pytest.fail("should be cached")
+        )
+        again = SignatureCache(tmp_path / "dhash.jsonl").signatures({"m1": path})
+
+        assert list(first) == ["m1"] and again == first
@@ -0,0 +1,80 @@
+"""
+Image description store - manifest index over flat or sharded raw files,
+shared by describe_images and the build-time injector.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts"))
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts/ai"))
+
+from helpers.image_store import MANIFEST_FILE, ImageDescriptionStore, raw_path
+import index_image_cache
+
+MD5_A = "a" * 32
+MD5_B = "b" * 32
+
+
+def _write_raw(path, description, image_type="diagram"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"image_type": image_type, "description": description}))
+
+
+class TestImageDescriptionStore:
+    def test_legacy_raw_files_are_indexed_once(self, tmp_path):
+        _write_raw(tmp_path / f"{MD5_A}.json", "A flat description")
+        _write_raw(raw_path(tmp_path, MD5_B, shard=True), "A sharded description")
+
+        store = ImageDescriptionStore(tmp_path)
+        assert store.description(MD5_A) == "A flat description"
+        assert store.get(MD5_B)["image_type"] == "diagram"
+
+        # Served from the manifest from now on: raw files are no longer read.
+        (tmp_path / f"{MD5_A}.json").write_text("not json")
+        assert ImageDescriptionStore(tmp_path).description(MD5_A) == "A flat description"
+
+    def test_put_follows_the_layout_on_disk(self, tmp_path):
+        flat = ImageDescriptionStore(tmp_path / "flat")
+        flat.put(MD5_A, "chart", "A chart")
+        assert (tmp_path / "flat" / f"{MD5_A}.json").exists()
+
+        _write_raw(raw_path(tmp_path / "sharded", MD5_B, shard=True), "B")
+        sharded = ImageDescriptionStore(tmp_path / "sharded")
+        sharded.put(MD5_A, "chart", "A chart")
+        assert raw_path(tmp_path / "sharded", MD5_A, shard=True).exists()
+        assert ImageDescriptionStore(tmp_path / "sharded").get(MD5_A) == {
+            "image_type": "chart",
+            "description": "A chart",
+        }
+
+    def test_read_only_store_never_writes_the_manifest(self, tmp_path):
+        _write_raw(tmp_path / f"{MD5_A}.json", "A")
+
+        store = ImageDescriptionStore(tmp_path, read_only=True)
+
+        assert store.description(MD5_A) == "A"
+        assert MD5_B not in store
+        assert not (tmp_path / MANIFEST_FILE).exists()
+
+
+class TestIndexImageCache:
+    def test_shard_then_flatten_round_trips(self, tmp_path):
+        _write_raw(tmp_path / f"{MD5_A}.json", "A")
+        _write_raw(tmp_path / f"{MD5_B}.json", "B")
+
+        assert index_image_cache.relayout(tmp_path, shard=True, dry_run=False) == 2
+        assert raw_path(tmp_path, MD5_A, shard=True).exists()
+        assert index_image_cache.relayout(tmp_path, shard=False, dry_run=False) == 2
+        assert sorted(p.name for p in tmp_path.iterdir()) == [f"{MD5_A}.json", f"{MD5_B}.json"]
+
+    def test_rebuild_picks_up_edited_raw_files(self, tmp_path):
+        _write_raw(tmp_path / f"{MD5_A}.json", "Old")
+        ImageDescriptionStore(tmp_path).get(MD5_A)
+        _write_raw(tmp_path / f"{MD5_A}.json", "Edited")
+
+        stats = index_image_cache.rebuild(tmp_path, dry_run=False)
+
+        assert stats == {"indexed": 1, "unreadable": 0}
+        assert ImageDescriptionStore(tmp_path).description(MD5_A) == "Edited"
@@ -0,0 +1,108 @@
+"""
+Intro cache store - append-only JSONL with compaction, legacy per-file
+fallback, and the per-file → JSONL migration.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts"))
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts/ai"))
+
+from helpers.file_updater import IntroCacheStore, save_intro_cache
+from helpers.jsonl_store import JsonlStore
+import migrate_intro_cache
+
+
+class TestJsonlStore:
+    def test_appends_and_reloads_last_write(self, tmp_path):
+        path = tmp_path / "s.jsonl"
+        store = JsonlStore(path)
+        store.put("a", {"v": 1})
+        store.put("a", {"v": 2})
+        store.put("b", {"v": 1})
+        store.delete("b")
+        store.put("a", {"v": 2})  # unchanged: no line
+
+        assert len(path.read_text().splitlines()) == 4
+        reloaded = JsonlStore(path)
+        assert reloaded.items() == [("a", {"v": 2})]
+        assert {"v": 1} in reloaded.superseded()
+
+    def test_torn_last_line_is_skipped(self, tmp_path):
+        path = tmp_path / "s.jsonl"
+        JsonlStore(path).put("a", {"v": 1})
+        with path.open("a") as f:
+            f.write('{"key": "b", "val')
+
+        assert JsonlStore(path).items() == [("a", {"v": 1})]
+
+    def test_append_after_torn_line_starts_a_new_line(self, tmp_path):
+        path = tmp_path / "s.jsonl"
+        JsonlStore(path).put("a", {"v": 1})
+        with path.open("a") as f:
+            f.write('{"key": "b", "val')
+
+        JsonlStore(path).put("c", {"v": 3})
+        JsonlStore(path).put_many([("d", {"v": 4})])
+
+        assert dict(JsonlStore(path).items()) == {
+            "a": {"v": 1},
+            "c": {"v": 3},
+            "d": {"v": 4},
+        }
+
+    def test_compaction_keeps_live_keys_and_other_writers(self, tmp_path):
+        path = tmp_path / "s.jsonl"
+        store = JsonlStore(path)
+        for i in range(5):
+            store.put("a", {"v": i})
+        JsonlStore(path).put("z", {"v": 0})  # another process appends
+
+        assert store.compact()
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert lines == [{"key": "a", "value": {"v": 4}}, {"key": "z", "value": {"v": 0}}]
+        assert not store.compact()  # nothing superseded any more
+
+
+class TestIntroCacheStore:
+    def test_legacy_file_is_a_fallback(self, tmp_path):
+        save_intro_cache(tmp_path / "DOCS__a.qmd.json", {"intro": "Old", "keywords": ["k"]})
+        store = IntroCacheStore(tmp_path)
+
+        assert store.get(Path("DOCS/a.qmd"))["intro"] == "Old"
+        store.put(Path("DOCS/a.qmd"), {"intro": "New", "keywords": ["k"]})
+        assert store.get(Path("DOCS/a.qmd"))["intro"] == "New"
+        assert store.get(Path("DOCS/missing.qmd")) == {}
+
+    def test_delete_removes_both_layouts(self, tmp_path):
+        save_intro_cache(tmp_path / "DOCS__a.qmd.json", {"intro": "Old", "keywords": ["k"]})
+        store = IntroCacheStore(tmp_path)
+
+        assert store.delete(Path("DOCS/a.qmd"))
+        assert not store.has(Path("DOCS/a.qmd"))
+        assert not (tmp_path / "DOCS__a.qmd.json").exists()
+
+
+class TestMigration:
+    def test_per_file_entries_move_into_the_store(self, tmp_path):
+        docs = tmp_path / "DOCS"
+        (docs / "my__proj").mkdir(parents=True)
+        (docs / "my__proj" / "a.qmd").write_text("---\n---\n")
+        cache_dir = tmp_path / ".llm_cache"
+        cache_dir.mkdir()
+        entry = {"intro": "I", "keywords": ["k"], "hash": "legacy"}
+        save_intro_cache(cache_dir / "DOCS__my__proj__a.qmd.json", entry)
+        save_intro_cache(cache_dir / "DOCS__gone__b.qmd.json", entry)
+
+        stats = migrate_intro_cache.migrate(
+            cache_dir, docs, keep_files=False, dry_run=False
+        )
+
+        assert stats["migrated"] == 2 and stats["guessed_paths"] == 1
+        assert not list(cache_dir.glob("*.qmd.json"))
+        store = IntroCacheStore(cache_dir)
+        assert store.get(Path("DOCS/my__proj/a.qmd")) == entry
+        assert store.get(Path("DOCS/gone/b.qmd")) == entry
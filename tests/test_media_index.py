@@ -0,0 +1,66 @@
+"""
+Media MD5 index - stat-validated path -> MD5 cache shared by describe_images,
+group_docs_by_category and the image-description injector.
+"""
+
+import hashlib
+import os
+import shutil
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts"))
+
+from helpers.media_index import MediaMd5Index
+
+
+def _image(path, data=b"png bytes"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+
+class TestMediaMd5Index:
+    def test_unchanged_files_are_not_hashed_again(self, tmp_path):
+        img = _image(tmp_path / "DOCS/a-media/image1.png")
+        index_path = tmp_path / "media_md5.json"
+        first = MediaMd5Index(index_path)
+        assert first.md5(img) == hashlib.md5(b"png bytes").hexdigest()
+        first.save()
+
+        second = MediaMd5Index(index_path)
+        assert second.md5_many([img]) == {img: hashlib.md5(b"png bytes").hexdigest()}
+        assert (second.hits, second.misses) == (1, 0)
+
+    def test_changed_file_is_rehashed(self, tmp_path):
+        img = _image(tmp_path / "image1.png")
+        index = MediaMd5Index(tmp_path / "idx.json")
+        index.md5(img)
+
+        img.write_bytes(b"other, longer bytes")
+
+        assert index.lookup(img) is None
+        assert index.md5(img) == hashlib.md5(b"other, longer bytes").hexdigest()
+
+    def test_renamed_and_copied_trees_hit(self, tmp_path):
+        _image(tmp_path / "DOCS/p/a-media/image1.png")
+        index = MediaMd5Index(tmp_path / "idx.json")
+        index.md5(tmp_path / "DOCS/p/a-media/image1.png")
+
+        # build-docs.sh: mv DOCS origin_DOCS, then copytree into the build DOCS.
+        os.rename(tmp_path / "DOCS", tmp_path / "origin_DOCS")
+        src = tmp_path / "origin_DOCS/p/a-media/image1.png"
+        dst = tmp_path / "DOCS/cat/p_a-media/image1.png"
+        dst.parent.mkdir(parents=True)
+        shutil.copy2(src, dst)
+
+        assert index.lookup(src) == hashlib.md5(b"png bytes").hexdigest()
+        assert index.carry(src, dst)
+        assert index.lookup(dst) == hashlib.md5(b"png bytes").hexdigest()
+        assert index.misses == 1
+
+    def test_unreadable_paths_map_to_none(self, tmp_path):
+        index = MediaMd5Index(tmp_path / "idx.json")
+        missing = tmp_path / "gone.png"
+
+        assert index.md5_many([missing]) == {missing: None}
@@ -0,0 +1,92 @@
+"""
+Cross-run daily quota ledger - per-UTC-day counters shared between processes,
+and the in-memory DailyQuota that checks and counts each request.
+"""
+
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts"))
+
+from helpers.quota_ledger import DailyQuota, DailyQuotaLedger, KEEP_DAYS
+
+
+def _bump(path):
+    DailyQuotaLedger(path).add(requests=1, prompt_tokens=10, day="2026-03-01")
+
+
+class TestDailyQuotaLedger:
+    def test_add_and_read_back(self, tmp_path):
+        """Counters accumulate per day"""
+        ledger = DailyQuotaLedger(tmp_path / "quota_ledger.json")
+
+        ledger.add(requests=1, day="2026-03-01")
+        ledger.add(prompt_tokens=500, output_tokens=80, day="2026-03-01")
+
+        assert ledger.day("2026-03-01") == {
+            "requests": 1,
+            "prompt_tokens": 500,
+            "output_tokens": 80,
+        }
+        assert ledger.day("2026-03-02")["requests"] == 0
+
+    def test_old_days_are_pruned(self, tmp_path):
+        """Only the last KEEP_DAYS days are kept"""
+        path = tmp_path / "quota_ledger.json"
+        ledger = DailyQuotaLedger(path)
+
+        ledger.add(requests=5, day="2026-03-01")
+        ledger.add(requests=1, day=f"2026-03-{KEEP_DAYS + 2:02d}")
+
+        assert list(json.loads(path.read_text())) == [f"2026-03-{KEEP_DAYS + 2:02d}"]
+
+    def test_concurrent_writers_do_not_lose_counts(self, tmp_path):
+        """Separate processes writing at once all get counted"""
+        path = tmp_path / "quota_ledger.json"
+
+        with ProcessPoolExecutor(max_workers=4) as pool:
+            list(pool.map(_bump, [path] * 40))
+
+        assert DailyQuotaLedger(path).day("2026-03-01")["requests"] == 40
+
+    def test_corrupt_file_reads_as_empty(self, tmp_path, capsys):
+        """A damaged ledger warns and starts over instead of crashing"""
+        path = tmp_path / "quota_ledger.json"
+        path.write_text("{not json")
+
+        assert DailyQuotaLedger(path).requests_today() == 0
+        assert "Could not load quota ledger" in capsys.readouterr().out
+
+
+class TestDailyQuota:
+    def test_concurrent_reserves_stop_exactly_at_the_limit(self, tmp_path):
+        """Check and count are one step, so threads can't overshoot"""
+        ledger = DailyQuotaLedger(tmp_path / "quota_ledger.json")
+        ledger.add(requests=90)
+        quota = DailyQuota(ledger, limit=100, flush_every=1000)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            granted = [r for r in pool.map(lambda _: quota.reserve(), range(40)) if r]
+
+        assert sorted(granted) == list(range(91, 101))
+        assert quota.requests_today() == 100
+
+    def test_counts_reach_the_ledger_every_n_requests_and_on_flush(self, tmp_path):
+        """The file is written in batches, not once per request"""
+        ledger = DailyQuotaLedger(tmp_path / "quota_ledger.json")
+        quota = DailyQuota(ledger, limit=100, flush_every=3)
+
+        quota.reserve()
+        quota.reserve()
+        quota.add_usage(prompt_tokens=50, output_tokens=5)
+        assert ledger.requests_today() == 0
+
+        quota.reserve()
+        assert ledger.requests_today() == 3
+
+        quota.reserve()
+        quota.flush()
+        assert ledger.day()["requests"] == 4
+        assert ledger.day()["prompt_tokens"] == 50
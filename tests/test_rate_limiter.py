@@ -0,0 +1,152 @@
+"""
+Sliding-window rate limiter - RPM / TPM / RPD windows with a fake clock.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts"))
+
+from helpers.rate_limiter import SlidingWindowRateLimiter
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestSlidingWindow:
+    def test_rpm_refills_when_oldest_request_expires(self):
+        """Capacity comes back when the oldest request leaves, not at a minute boundary"""
+        clock = FakeClock()
+        limiter = SlidingWindowRateLimiter(rpm=2, tpm=1_000, rpd=100, clock=clock)
+
+        assert limiter.try_acquire()
+        clock.now += 10
+        assert limiter.try_acquire()
+        assert not limiter.try_acquire()
+        assert limiter.time_until_available() == 50.0
+
+        clock.now += 50
+        assert limiter.try_acquire()
+
+    def test_tpm_waits_only_for_enough_tokens_to_free(self):
+        """TPM wait is exact: just until enough old tokens leave the window"""
+        clock = FakeClock()
+        limiter = SlidingWindowRateLimiter(rpm=100, tpm=1_000, rpd=100, clock=clock)
+
+        limiter.record(400)
+        clock.now += 5
+        limiter.record(400)
+        clock.now += 5
+
+        assert limiter.time_until_available(300) == 50.0
+        assert limiter.time_until_available(200) == 0.0
+
+    def test_oversized_request_runs_once_window_is_empty(self):
+        """A request bigger than the whole TPM budget must not deadlock"""
+        clock = FakeClock()
+        limiter = SlidingWindowRateLimiter(rpm=100, tpm=1_000, rpd=100, clock=clock)
+
+        assert limiter.try_acquire(5_000)
+        assert not limiter.try_acquire(5_000)
+        clock.now += 60
+        assert limiter.try_acquire(5_000)
+
+    def test_daily_window(self):
+        """RPD counts a rolling day"""
+        clock = FakeClock()
+        limiter = SlidingWindowRateLimiter(rpm=100, tpm=1_000, rpd=2, clock=clock)
+
+        limiter.record()
+        clock.now += 120
+        limiter.record()
+        clock.now += 120
+
+        assert not limiter.try_acquire()
+        assert limiter.time_until_available() == 86_400 - 240
+
+    def test_acquire_blocking_sleeps_exact_refill(self):
+        """acquire_blocking sleeps exactly the refill time and records the request"""
+        clock = FakeClock()
+        limiter = SlidingWindowRateLimiter(rpm=1, tpm=1_000, rpd=100, clock=clock)
+        waits = []
+
+        limiter.record()
+        reservation = limiter.acquire_blocking(
+            on_wait=lambda s, window: waits.append(window), sleep=clock.sleep
+        )
+
+        assert reservation.waited == 60.0
+        assert waits == ["RPM"]
+        assert limiter.snapshot()["requests_total"] == 2
+
+    def test_async_acquire(self):
+        """Async acquire records without blocking when there is room"""
+        limiter = SlidingWindowRateLimiter(rpm=5, tpm=1_000, rpd=100)
+
+        reservation = asyncio.run(limiter.acquire(100))
+
+        assert reservation.waited == 0.0
+        snap = limiter.snapshot()
+        assert snap["requests_minute"] == 1
+        assert snap["tokens_minute"] == 100
+
+
+class TestReservations:
+    def test_reconcile_replaces_estimate_with_actual(self):
+        """Reconciling swaps the estimated tokens for the billed ones"""
+        limiter = SlidingWindowRateLimiter(rpm=10, tpm=1_000, rpd=100)
+
+        reservation = limiter.try_acquire(100)
+        reservation.reconcile(700)
+
+        snap = limiter.snapshot()
+        assert snap["tokens_minute"] == 700
+        assert snap["tokens_total"] == 700
+        assert reservation.estimated_tokens == 100
+        assert not limiter.try_acquire(400)
+
+    def test_reconcile_after_window_expiry_only_updates_totals(self):
+        """A late reconcile must not push tokens back into an expired window"""
+        clock = FakeClock()
+        limiter = SlidingWindowRateLimiter(rpm=10, tpm=1_000, rpd=100, clock=clock)
+
+        reservation = limiter.try_acquire(100)
+        clock.now += 61
+        limiter.snapshot()  # prunes the expired entry
+        reservation.reconcile(900)
+
+        snap = limiter.snapshot()
+        assert snap["tokens_minute"] == 0
+        assert snap["tokens_total"] == 900
+
+    def test_cancel_returns_the_slot(self):
+        """Cancelling gives back both the request and its tokens"""
+        limiter = SlidingWindowRateLimiter(rpm=1, tpm=1_000, rpd=100)
+
+        reservation = limiter.try_acquire(500)
+        assert not limiter.try_acquire()
+        reservation.cancel()
+
+        assert limiter.try_acquire()
+        assert limiter.snapshot()["requests_total"] == 1
+
+    def test_parallel_reservations_never_overshoot(self):
+        """Concurrent threads can't all pass the check before any of them counts"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        limiter = SlidingWindowRateLimiter(rpm=25, tpm=10_000, rpd=1_000)
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(lambda _: limiter.try_acquire(100), range(100)))
+
+        assert sum(1 for r in results if r) == 25
+        assert limiter.snapshot()["tokens_minute"] == 2_500
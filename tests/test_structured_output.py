@@ -0,0 +1,67 @@
+"""
+Structured output - schema builders, validation against the OpenAPI subset
+Gemini accepts, and the one JSON parser every AI task goes through.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts"))
+
+import pytest
+
+from helpers.structured_output import (
+    StructuredOutputError,
+    array_schema,
+    object_schema,
+    parse_structured,
+    string_schema,
+    validate,
+)
+
+SCHEMA = object_schema(
+    {
+        "kind": string_schema(["map", "chart"]),
+        "tags": array_schema(string_schema()),
+        "note": string_schema(),
+    },
+    required=["kind", "tags"],
+)
+
+
+class TestSchemaBuilders:
+    def test_object_requires_every_property_by_default_in_order(self):
+        schema = object_schema({"b": string_schema(), "a": string_schema()})
+
+        assert schema["required"] == ["b", "a"]
+        assert schema["propertyOrdering"] == ["b", "a"]
+        assert json.dumps(SCHEMA)  # goes into bulk job files as is
+
+
+class TestValidate:
+    def test_matching_value_has_no_errors(self):
+        assert validate({"kind": "map", "tags": ["a"], "extra": 1}, SCHEMA) == []
+
+    def test_errors_name_the_path(self):
+        errors = validate({"kind": "photo", "tags": ["a", 3]}, SCHEMA)
+
+        assert errors == [
+            "$.kind: 'photo' is not one of ['map', 'chart']",
+            "$.tags[1]: expected string, got int",
+        ]
+        assert validate({"tags": []}, SCHEMA) == ["$: missing 'kind'"]
+        assert validate(True, {"type": "INTEGER"}) == ["$: expected integer, got bool"]
+
+
+class TestParseStructured:
+    def test_fenced_json_is_parsed(self):
+        text = '```json\n{"kind": "chart", "tags": []}\n```'
+
+        assert parse_structured(text, SCHEMA) == {"kind": "chart", "tags": []}
+
+    def test_truncated_or_mismatched_answer_raises(self):
+        with pytest.raises(StructuredOutputError, match="not JSON"):
+            parse_structured('{"kind": "chart", "ta', SCHEMA)
+        with pytest.raises(StructuredOutputError, match="missing 'tags'"):
+            parse_structured('{"kind": "chart"}', SCHEMA)
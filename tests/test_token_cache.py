@@ -0,0 +1,76 @@
+"""
+Token count memoisation - LRU by content hash plus the on-disk store.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts"))
+
+from helpers import token_cache
+from helpers.token_cache import TokenCountCache
+
+
+class CountingEncoder:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        return len(text.split())
+
+
+class TestTokenCountCache:
+    def test_same_text_is_tokenised_once(self):
+        cache = TokenCountCache()
+        encode = CountingEncoder()
+
+        assert cache.count("a b c", encode) == 3
+        assert cache.count("a b c", encode) == 3
+        assert cache.count("a b", encode) == 2
+
+        assert encode.calls == 2
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_lru_evicts_oldest(self):
+        cache = TokenCountCache(max_entries=2)
+        encode = CountingEncoder()
+
+        cache.count("one", encode)
+        cache.count("two", encode)
+        cache.count("one", encode)  # refresh
+        cache.count("three", encode)  # evicts "two"
+        cache.count("one", encode)
+        cache.count("two", encode)
+
+        assert encode.calls == 4
+
+    def test_counts_survive_to_the_next_run(self, tmp_path):
+        """Large texts are persisted; unchanged documents aren't re-tokenised"""
+        path = tmp_path / "token_counts.json"
+        big = "word " * token_cache.PERSIST_MIN_CHARS
+        first = TokenCountCache(path)
+        first.count(big, CountingEncoder())
+        first.count("short", CountingEncoder())
+        first.save()
+
+        encode = CountingEncoder()
+        second = TokenCountCache()
+        second.attach(path)
+
+        assert second.count(big, encode) == token_cache.PERSIST_MIN_CHARS
+        assert encode.calls == 0
+        assert len(json.loads(path.read_text())["counts"]) == 1
+
+    def test_other_tokenizer_counts_are_ignored(self, tmp_path):
+        path = tmp_path / "token_counts.json"
+        big = "word " * token_cache.PERSIST_MIN_CHARS
+        writer = TokenCountCache(path, namespace="o200k_base")
+        writer.count(big, CountingEncoder())
+        writer.save()
+
+        encode = CountingEncoder()
+        TokenCountCache(path, namespace="cl100k_base").count(big, encode)
+
+        assert encode.calls == 1
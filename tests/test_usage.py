@@ -0,0 +1,59 @@
+"""
+Token usage from Gemini usage_metadata and the per-run ledger.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent / ".github/scripts"))
+
+from helpers.usage import TokenUsage, UsageLedger
+
+
+def _response(**counts):
+    return SimpleNamespace(usage_metadata=SimpleNamespace(**counts))
+
+
+class TestTokenUsage:
+    def test_from_response_reads_all_counts(self):
+        """All four usage_metadata counts are picked up"""
+        usage = TokenUsage.from_response(
+            _response(
+                prompt_token_count=1200,
+                cached_content_token_count=1000,
+                candidates_token_count=300,
+                thoughts_token_count=50,
+            )
+        )
+
+        assert usage == TokenUsage(1200, 1000, 300, 50)
+        assert usage.total_tokens == 1550
+
+    def test_missing_counts_are_zero(self):
+        """The SDK leaves counts as None when they don't apply"""
+        usage = TokenUsage.from_response(
+            _response(prompt_token_count=10, thoughts_token_count=None)
+        )
+
+        assert usage == TokenUsage(prompt_tokens=10)
+
+    def test_no_metadata(self):
+        """No usage_metadata at all -> None, not zeros"""
+        assert TokenUsage.from_response(SimpleNamespace()) is None
+
+
+class TestUsageLedger:
+    def test_rows_and_totals(self):
+        """Ledger sums usage per label and overall"""
+        ledger = UsageLedger()
+        ledger.add("versions", TokenUsage(100, 0, 20, 5), items=4)
+        ledger.add("versions", TokenUsage(50, 0, 10, 0), items=2)
+        ledger.add("images", None)
+
+        rows = ledger.rows()
+        assert rows["versions"]["calls"] == 2
+        assert rows["versions"]["items"] == 6
+        assert rows["versions"]["prompt_tokens"] == 150
+        assert rows["images"]["calls"] == 1
+        assert ledger.totals() == TokenUsage(150, 0, 30, 5)